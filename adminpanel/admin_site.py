@@ -30,7 +30,7 @@ class EncantoIntimoAdminSite(AdminSite):
         # Inicializar variáveis
         total_pedidos = 0
         pedidos_pendentes = 0
-        total_usuarios = 0
+        total_clientes = 0
         vendas_mes = Decimal('0.00')
         produtos_ativos = 0
         recent_orders = []
@@ -69,10 +69,10 @@ class EncantoIntimoAdminSite(AdminSite):
         except ImportError:
             pass
         
-        # Buscar dados dos usuários (substituto para clientes)
+        # Clientes cadastrados
         try:
-            from django.contrib.auth.models import User
-            total_usuarios = User.objects.filter(is_active=True).count()
+            from clientes.models import Cliente
+            total_clientes = Cliente.objects.filter(ativo=True).count()
         except ImportError:
             pass
         
@@ -103,7 +103,7 @@ class EncantoIntimoAdminSite(AdminSite):
             'subtitle': None,
             'total_pedidos': total_pedidos,
             'pedidos_pendentes': pedidos_pendentes,
-            'total_clientes': total_usuarios,  # Usando usuários como proxy para clientes
+            'total_clientes': total_clientes,
             'vendas_mes': vendas_mes,
             'produtos_ativos': produtos_ativos,
             'recent_orders': recent_orders,
@@ -136,13 +136,51 @@ def register_models():
     # Registrar Pedidos
     try:
         from pedidos.models import Pedido, ItemPedido, StatusPedido
-        from django.contrib import admin
+        from pedidos.services import ConflitoTransicao, TransicaoInvalida, transicionar
+        from django.contrib import admin, messages
         
         class PedidoAdminSimples(admin.ModelAdmin):
-            list_display = ['numero_pedido', 'usuario', 'status', 'total', 'data_pedido']
+            list_display = ['numero_pedido', 'usuario', 'cliente', 'status', 'total', 'data_pedido']
             list_filter = ['status', 'pagamento_confirmado', 'data_pedido']
-            search_fields = ['numero_pedido', 'usuario__username', 'usuario__email']
-            readonly_fields = ['numero_pedido', 'data_pedido']
+            search_fields = ['numero_pedido', 'usuario__username', 'usuario__email', 'cliente__email']
+            # O status só muda pelas ações abaixo, que passam por pedidos.services.transicionar
+            readonly_fields = ['numero_pedido', 'data_pedido', 'status']
+            list_select_related = ['usuario', 'cliente']
+            raw_id_fields = ['cliente', 'cupom']
+            actions = ['confirmar_pedidos', 'enviar_pedidos', 'entregar_pedidos', 'cancelar_pedidos']
+
+            def _transicionar_selecionados(self, request, queryset, novo_status):
+                alterados = 0
+                for pedido in queryset:
+                    try:
+                        transicionar(pedido, novo_status, observacao='Alterado pelo admin', usuario=request.user)
+                        alterados += 1
+                    except ConflitoTransicao:
+                        self.message_user(
+                            request,
+                            f'Pedido {pedido.numero_pedido} foi alterado por outro processo; recarregue e tente de novo.',
+                            messages.WARNING,
+                        )
+                    except TransicaoInvalida as e:
+                        self.message_user(request, str(e), messages.ERROR)
+                if alterados:
+                    self.message_user(request, f'{alterados} pedidos passaram para "{novo_status}".')
+
+            def confirmar_pedidos(self, request, queryset):
+                self._transicionar_selecionados(request, queryset, 'confirmado')
+            confirmar_pedidos.short_description = "✅ Confirmar pedidos selecionados"
+
+            def enviar_pedidos(self, request, queryset):
+                self._transicionar_selecionados(request, queryset, 'enviado')
+            enviar_pedidos.short_description = "🚚 Marcar como enviados"
+
+            def entregar_pedidos(self, request, queryset):
+                self._transicionar_selecionados(request, queryset, 'entregue')
+            entregar_pedidos.short_description = "📦 Marcar como entregues"
+
+            def cancelar_pedidos(self, request, queryset):
+                self._transicionar_selecionados(request, queryset, 'cancelado')
+            cancelar_pedidos.short_description = "❌ Cancelar pedidos selecionados"
         
         class ItemPedidoAdminSimples(admin.ModelAdmin):
             list_display = ['pedido', 'nome_produto', 'quantidade', 'preco_unitario']
@@ -160,13 +198,29 @@ def register_models():
     except ImportError as e:
         print(f"Erro ao importar pedidos: {e}")
     
+    # Registrar Clientes
+    try:
+        from clientes.models import Cliente
+        from clientes.admin import ClienteAdmin
+        
+        admin_site.register(Cliente, ClienteAdmin)
+        
+    except ImportError as e:
+        print(f"Erro ao importar clientes: {e}")
+    
     # Registrar Produtos
     try:
-        from produtos.models import Produto, Categoria, Tag, ImagemProduto
+        from produtos.models import (
+            Produto, Categoria, Tag, ImagemProduto, ProdutoRelacionado, MetricaProduto, FunilProduto,
+            Promocao, HistoricoPreco,
+        )
+        from produtos.admin import (
+            FunilProdutoAdmin, HistoricoPrecoAdmin, MetricaProdutoAdmin, ProdutoRelacionadoAdmin, PromocaoAdmin,
+        )
         from django.contrib import admin
         
         class ProdutoAdminSimples(admin.ModelAdmin):
-            list_display = ['nome', 'categoria', 'preco', 'estoque_virtual', 'ativo']
+            list_display = ['nome', 'categoria', 'preco', 'preco_final', 'estoque_virtual', 'vendas_30_dias', 'ativo']
             list_filter = ['categoria', 'ativo']
             search_fields = ['nome', 'descricao']
             list_editable = ['preco', 'estoque_virtual', 'ativo']
@@ -187,6 +241,11 @@ def register_models():
         admin_site.register(Categoria, CategoriaAdminSimples)
         admin_site.register(Tag, TagAdminSimples)
         admin_site.register(ImagemProduto, ImagemProdutoAdminSimples)
+        admin_site.register(ProdutoRelacionado, ProdutoRelacionadoAdmin)
+        admin_site.register(MetricaProduto, MetricaProdutoAdmin)
+        admin_site.register(FunilProduto, FunilProdutoAdmin)
+        admin_site.register(Promocao, PromocaoAdmin)
+        admin_site.register(HistoricoPreco, HistoricoPrecoAdmin)
         
     except ImportError as e:
         print(f"Erro ao importar produtos: {e}")
@@ -206,6 +265,49 @@ def register_models():
     except ImportError as e:
         print(f"Erro ao importar fornecedores: {e}")
     
+    # Registrar Frete
+    try:
+        from frete.models import ZonaFrete, FaixaCep
+        from frete.admin import ZonaFreteAdmin, FaixaCepAdmin
+        
+        admin_site.register(ZonaFrete, ZonaFreteAdmin)
+        admin_site.register(FaixaCep, FaixaCepAdmin)
+        
+    except ImportError as e:
+        print(f"Erro ao importar frete: {e}")
+    
+    # Registrar Agendador
+    try:
+        from agendador.models import TarefaAgendada, ExecucaoTarefa
+        from agendador.admin import TarefaAgendadaAdmin, ExecucaoTarefaAdmin
+        
+        admin_site.register(TarefaAgendada, TarefaAgendadaAdmin)
+        admin_site.register(ExecucaoTarefa, ExecucaoTarefaAdmin)
+        
+    except ImportError as e:
+        print(f"Erro ao importar agendador: {e}")
+    
+    # Registrar Campanhas
+    try:
+        from campanhas.models import Campanha
+        from campanhas.admin import CampanhaAdmin
+        
+        admin_site.register(Campanha, CampanhaAdmin)
+        
+    except ImportError as e:
+        print(f"Erro ao importar campanhas: {e}")
+    
+    # Registrar Cupons
+    try:
+        from cupons.models import Cupom, UsoCupom
+        from cupons.admin import CupomAdmin, UsoCupomAdmin
+        
+        admin_site.register(Cupom, CupomAdmin)
+        admin_site.register(UsoCupom, UsoCupomAdmin)
+        
+    except ImportError as e:
+        print(f"Erro ao importar cupons: {e}")
+    
     # Registrar Usuários
     try:
         from usuarios.models import PerfilUsuario
@@ -0,0 +1,23 @@
+from django.contrib import admin
+from .models import TarefaAgendada, ExecucaoTarefa
+
+
+@admin.register(TarefaAgendada)
+class TarefaAgendadaAdmin(admin.ModelAdmin):
+    list_display = ['nome', 'agenda', 'ativo', 'proxima_execucao', 'ultima_execucao', 'ultimo_sucesso', 'bloqueado_por']
+    list_filter = ['ativo', 'ultimo_sucesso']
+    search_fields = ['nome']
+    list_editable = ['ativo']
+    readonly_fields = ['nome', 'agenda', 'ultima_execucao', 'ultimo_sucesso', 'bloqueado_ate', 'bloqueado_por']
+
+
+@admin.register(ExecucaoTarefa)
+class ExecucaoTarefaAdmin(admin.ModelAdmin):
+    list_display = ['tarefa', 'inicio', 'fim', 'sucesso', 'executor']
+    list_filter = ['sucesso', 'tarefa']
+    date_hierarchy = 'inicio'
+    list_select_related = ['tarefa']
+    readonly_fields = ['tarefa', 'executor', 'inicio', 'fim', 'sucesso', 'resultado']
+
+    def has_add_permission(self, request):
+        return False
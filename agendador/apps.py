@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class AgendadorConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "agendador"
+    verbose_name = "Agendador de Tarefas"
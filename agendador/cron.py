@@ -0,0 +1,96 @@
+"""
+Expressões cron de cinco campos (minuto hora dia mês dia-da-semana).
+
+Suporta ``*``, valores, intervalos ``a-b``, listas ``a,b`` e passos ``*/n``
+ou ``a-b/n``. Dia da semana vai de 0 (domingo) a 6; 7 também é domingo.
+Quando dia do mês e dia da semana são ambos restritos (não começam com
+``*``), vale qualquer um dos dois, como no cron tradicional.
+"""
+from datetime import timedelta
+
+CAMPOS = (
+    ('minuto', 0, 59),
+    ('hora', 0, 23),
+    ('dia', 1, 31),
+    ('mes', 1, 12),
+    ('dia_semana', 0, 7),
+)
+
+
+class ExpressaoCronInvalida(ValueError):
+    pass
+
+
+def _interpretar_campo(texto, minimo, maximo):
+    valores = set()
+    for parte in texto.split(','):
+        intervalo, _, passo = parte.partition('/')
+        if intervalo == '*':
+            inicio, fim = minimo, maximo
+        elif '-' in intervalo:
+            inicio, fim = (int(v) for v in intervalo.split('-', 1))
+        else:
+            inicio = fim = int(intervalo)
+            if passo:
+                fim = maximo
+        passo = int(passo) if passo else 1
+        if not (minimo <= inicio <= fim <= maximo) or passo < 1:
+            raise ExpressaoCronInvalida(f'Campo fora do intervalo {minimo}-{maximo}: "{parte}"')
+        valores.update(range(inicio, fim + 1, passo))
+    return frozenset(valores)
+
+
+class Cron:
+    """Expressão cron já interpretada, com cálculo da próxima execução"""
+
+    def __init__(self, expressao):
+        partes = expressao.split()
+        if len(partes) != len(CAMPOS):
+            raise ExpressaoCronInvalida(f'Esperados 5 campos em "{expressao}"')
+        self.expressao = expressao
+        try:
+            conjuntos = [
+                _interpretar_campo(texto, minimo, maximo)
+                for texto, (nome, minimo, maximo) in zip(partes, CAMPOS)
+            ]
+        except ValueError as e:
+            raise ExpressaoCronInvalida(f'Expressão cron inválida "{expressao}": {e}') from e
+        self.minutos, self.horas, self.dias, self.meses, dias_semana = conjuntos
+        self.dias_semana = frozenset(d % 7 for d in dias_semana)
+        # Como no cron tradicional, campo iniciado por "*" (inclusive "*/n")
+        # conta como não restrito para a regra dia-do-mês OU dia-da-semana
+        self._dia_livre = partes[2].startswith('*')
+        self._semana_livre = partes[4].startswith('*')
+
+    def __repr__(self):
+        return f'Cron({self.expressao!r})'
+
+    def _dia_confere(self, momento):
+        # isoweekday: segunda=1 ... domingo=7 -> domingo=0
+        confere_dia = momento.day in self.dias
+        confere_semana = momento.isoweekday() % 7 in self.dias_semana
+        if self._dia_livre or self._semana_livre:
+            return confere_dia and confere_semana
+        return confere_dia or confere_semana
+
+    def proxima(self, depois_de):
+        """Primeiro minuto estritamente posterior a ``depois_de`` que satisfaz a expressão"""
+        momento = depois_de.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limite = momento + timedelta(days=366 * 4)
+        while momento < limite:
+            if momento.month not in self.meses:
+                # Pula para o primeiro dia do mês seguinte
+                ano, mes = divmod(momento.month, 12)
+                momento = momento.replace(year=momento.year + ano, month=mes + 1, day=1, hour=0, minute=0)
+                continue
+            if not self._dia_confere(momento):
+                momento = (momento + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if momento.hour not in self.horas:
+                momento = (momento + timedelta(hours=1)).replace(minute=0)
+                continue
+            if momento.minute not in self.minutos:
+                momento += timedelta(minutes=1)
+                continue
+            return momento
+        raise ExpressaoCronInvalida(f'A expressão "{self.expressao}" nunca é satisfeita')
@@ -0,0 +1,100 @@
+"""
+Processo de longa duração que executa as tarefas periódicas dos apps.
+
+Uso:
+    python manage.py run_scheduler
+    python manage.py run_scheduler --listar
+    python manage.py run_scheduler --executar pedidos.expirar_pedidos
+"""
+import logging
+import random
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.utils import timezone
+
+from agendador.models import TarefaAgendada
+from agendador.registro import descobrir_tarefas
+from agendador.services import EXECUTOR, executar, executar_pendentes, reivindicar, sincronizar_tarefas
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Executa as tarefas periódicas declaradas nos módulos tarefas.py dos apps'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=getattr(settings, 'AGENDADOR_INTERVALO', 15),
+            help='Segundos entre verificações de tarefas vencidas',
+        )
+        parser.add_argument(
+            '--uma-vez',
+            action='store_true',
+            help='Executa as tarefas vencidas uma única vez e sai',
+        )
+        parser.add_argument(
+            '--listar',
+            action='store_true',
+            help='Lista as tarefas registradas e a próxima execução de cada uma',
+        )
+        parser.add_argument(
+            '--executar',
+            metavar='TAREFA',
+            help='Executa imediatamente a tarefa informada (respeitando a trava)',
+        )
+
+    def handle(self, *args, **options):
+        tarefas = descobrir_tarefas()
+        sincronizar_tarefas(tarefas)
+
+        if options['listar']:
+            for linha in TarefaAgendada.objects.filter(nome__in=tarefas):
+                situacao = 'ativa' if linha.ativo else 'inativa'
+                self.stdout.write(f'{linha.nome:40} {linha.agenda:16} {situacao:8} próxima: {timezone.localtime(linha.proxima_execucao):%d/%m/%Y %H:%M}')
+            return
+
+        if options['executar']:
+            tarefa = tarefas.get(options['executar'])
+            if tarefa is None:
+                raise CommandError(f'Tarefa "{options["executar"]}" não registrada')
+            if not reivindicar(tarefa, forcar=True):
+                raise CommandError(f'Tarefa "{tarefa.nome}" já está em execução')
+            execucao = executar(tarefa)
+            estilo = self.style.SUCCESS if execucao.sucesso else self.style.ERROR
+            self.stdout.write(estilo(execucao.resultado or 'Concluída'))
+            return
+
+        if options['uma_vez']:
+            executar_pendentes(tarefas)
+            return
+
+        parar = threading.Event()
+
+        def encerrar(signum, frame):
+            self.stdout.write('Encerrando após a tarefa em andamento...')
+            parar.set()
+
+        signal.signal(signal.SIGTERM, encerrar)
+        signal.signal(signal.SIGINT, encerrar)
+
+        self.stdout.write(self.style.SUCCESS(f'Agendador {EXECUTOR} iniciado com {len(tarefas)} tarefas.'))
+        # Atraso inicial aleatório evita que vários nós reiniciados juntos
+        # disputem as mesmas tarefas no mesmo instante
+        parar.wait(random.uniform(0, options['intervalo']))
+        while not parar.is_set():
+            try:
+                close_old_connections()
+                executar_pendentes(tarefas)
+            except Exception:
+                # Falha fora das tarefas (consulta das vencidas, trava): uma
+                # queda do banco não pode derrubar o processo; tenta de novo
+                # na próxima passagem com conexões novas
+                logger.exception('Erro na verificação de tarefas agendadas')
+                connections.close_all()
+            parar.wait(options['intervalo'])
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TarefaAgendada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, unique=True, verbose_name='Nome')),
+                ('agenda', models.CharField(max_length=100, verbose_name='Agenda (cron)')),
+                ('ativo', models.BooleanField(default=True, verbose_name='Ativo')),
+                ('proxima_execucao', models.DateTimeField(verbose_name='Próxima Execução')),
+                ('ultima_execucao', models.DateTimeField(blank=True, null=True, verbose_name='Última Execução')),
+                ('ultimo_sucesso', models.BooleanField(null=True, verbose_name='Último Resultado')),
+                ('bloqueado_ate', models.DateTimeField(blank=True, null=True, verbose_name='Bloqueado Até')),
+                ('bloqueado_por', models.CharField(blank=True, max_length=200, verbose_name='Bloqueado Por')),
+            ],
+            options={
+                'verbose_name': 'Tarefa Agendada',
+                'verbose_name_plural': 'Tarefas Agendadas',
+                'ordering': ['nome'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExecucaoTarefa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('executor', models.CharField(max_length=200, verbose_name='Executor')),
+                ('inicio', models.DateTimeField(verbose_name='Início')),
+                ('fim', models.DateTimeField(blank=True, null=True, verbose_name='Fim')),
+                ('sucesso', models.BooleanField(null=True, verbose_name='Sucesso')),
+                ('resultado', models.TextField(blank=True, verbose_name='Resultado')),
+                ('tarefa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='execucoes', to='agendador.tarefaagendada', verbose_name='Tarefa')),
+            ],
+            options={
+                'verbose_name': 'Execução de Tarefa',
+                'verbose_name_plural': 'Execuções de Tarefas',
+                'ordering': ['-inicio'],
+                'indexes': [models.Index(fields=['tarefa', '-inicio'], name='agendador_exec_tarefa_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.db import models
+
+
+class TarefaAgendada(models.Model):
+    """
+    Estado compartilhado de uma tarefa periódica.
+
+    A linha funciona também como trava: o processo que conseguir gravar
+    ``bloqueado_ate`` com um UPDATE condicional é o único a executar a tarefa
+    naquele ciclo, mesmo com vários ``run_scheduler`` em nós diferentes.
+    """
+    nome = models.CharField(max_length=100, unique=True, verbose_name="Nome")
+    agenda = models.CharField(max_length=100, verbose_name="Agenda (cron)")
+    ativo = models.BooleanField(default=True, verbose_name="Ativo")
+    proxima_execucao = models.DateTimeField(verbose_name="Próxima Execução")
+    ultima_execucao = models.DateTimeField(null=True, blank=True, verbose_name="Última Execução")
+    ultimo_sucesso = models.BooleanField(null=True, verbose_name="Último Resultado")
+    bloqueado_ate = models.DateTimeField(null=True, blank=True, verbose_name="Bloqueado Até")
+    bloqueado_por = models.CharField(max_length=200, blank=True, verbose_name="Bloqueado Por")
+
+    class Meta:
+        verbose_name = "Tarefa Agendada"
+        verbose_name_plural = "Tarefas Agendadas"
+        ordering = ['nome']
+
+    def __str__(self):
+        return self.nome
+
+
+class ExecucaoTarefa(models.Model):
+    """Histórico de execuções de uma tarefa"""
+    tarefa = models.ForeignKey(TarefaAgendada, on_delete=models.CASCADE, related_name='execucoes', verbose_name="Tarefa")
+    executor = models.CharField(max_length=200, verbose_name="Executor")
+    inicio = models.DateTimeField(verbose_name="Início")
+    fim = models.DateTimeField(null=True, blank=True, verbose_name="Fim")
+    sucesso = models.BooleanField(null=True, verbose_name="Sucesso")
+    resultado = models.TextField(blank=True, verbose_name="Resultado")
+
+    class Meta:
+        verbose_name = "Execução de Tarefa"
+        verbose_name_plural = "Execuções de Tarefas"
+        ordering = ['-inicio']
+        indexes = [
+            models.Index(fields=['tarefa', '-inicio'], name='agendador_exec_tarefa_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.tarefa} em {self.inicio:%d/%m/%Y %H:%M}'
+
+    @property
+    def duracao(self):
+        if self.fim:
+            return self.fim - self.inicio
+        return None
@@ -0,0 +1,61 @@
+"""
+Registro das tarefas periódicas declaradas pelos apps.
+
+Cada app declara suas tarefas em um módulo ``tarefas.py``, descoberto
+automaticamente pelo ``run_scheduler``::
+
+    from agendador.registro import tarefa
+
+    @tarefa('*/15 * * * *', jitter=60)
+    def expirar_pedidos():
+        ...
+
+O valor retornado pela função é gravado no histórico de execuções.
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+import random
+
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .cron import Cron
+
+_tarefas = {}
+
+
+@dataclass
+class Tarefa:
+    nome: str
+    funcao: object
+    cron: Cron
+    jitter: int = 0
+    tempo_maximo: int = 3600
+
+    def proxima_execucao(self, depois_de):
+        """Próximo horário da agenda somado a um atraso aleatório de até ``jitter`` segundos"""
+        # A agenda é interpretada no fuso do projeto (TIME_ZONE)
+        proxima = self.cron.proxima(timezone.localtime(depois_de))
+        if self.jitter:
+            proxima += timedelta(seconds=random.uniform(0, self.jitter))
+        return proxima
+
+
+def tarefa(agenda, nome=None, jitter=0, tempo_maximo=3600):
+    """
+    Registra a função como tarefa periódica.
+
+    ``agenda`` é uma expressão cron de cinco campos; ``jitter`` espalha as
+    execuções em até N segundos; ``tempo_maximo`` é a validade da trava, após
+    a qual outro nó pode assumir uma execução que travou.
+    """
+    def registrar(funcao):
+        chave = nome or f'{funcao.__module__.split(".")[0]}.{funcao.__name__}'
+        _tarefas[chave] = Tarefa(chave, funcao, Cron(agenda), jitter, tempo_maximo)
+        return funcao
+    return registrar
+
+
+def descobrir_tarefas():
+    autodiscover_modules('tarefas')
+    return dict(_tarefas)
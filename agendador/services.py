@@ -0,0 +1,112 @@
+"""
+Execução das tarefas periódicas com trava no banco.
+
+Vários processos ``run_scheduler`` podem rodar ao mesmo tempo (um por nó).
+Cada tarefa vencida é "reivindicada" com um UPDATE condicional sobre a sua
+linha em TarefaAgendada; apenas o processo cujo UPDATE afetou a linha executa
+a tarefa. A trava vale até o fim da execução (ou até ``tempo_maximo``, caso o
+processo morra), o que também impede execuções sobrepostas da mesma tarefa.
+"""
+from datetime import timedelta
+import logging
+import os
+import socket
+import traceback
+
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ExecucaoTarefa, TarefaAgendada
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR = f'{socket.gethostname()}:{os.getpid()}'
+
+
+def sincronizar_tarefas(tarefas):
+    """Cria as linhas das tarefas novas e reagenda as que mudaram de agenda"""
+    agora = timezone.now()
+    existentes = {t.nome: t for t in TarefaAgendada.objects.filter(nome__in=tarefas)}
+    novas = []
+    for nome, tarefa in tarefas.items():
+        linha = existentes.get(nome)
+        if linha is None:
+            novas.append(TarefaAgendada(
+                nome=nome,
+                agenda=tarefa.cron.expressao,
+                proxima_execucao=tarefa.proxima_execucao(agora),
+            ))
+        elif linha.agenda != tarefa.cron.expressao:
+            TarefaAgendada.objects.filter(pk=linha.pk).update(
+                agenda=tarefa.cron.expressao,
+                proxima_execucao=tarefa.proxima_execucao(agora),
+            )
+    if novas:
+        TarefaAgendada.objects.bulk_create(novas, ignore_conflicts=True)
+
+
+def _livres(agora):
+    return Q(bloqueado_ate__isnull=True) | Q(bloqueado_ate__lt=agora)
+
+
+def reivindicar(tarefa, executor=EXECUTOR, forcar=False):
+    """Tenta travar a tarefa para este executor; retorna True se conseguiu"""
+    agora = timezone.now()
+    filtro = TarefaAgendada.objects.filter(_livres(agora), nome=tarefa.nome)
+    if not forcar:
+        filtro = filtro.filter(ativo=True, proxima_execucao__lte=agora)
+    return filtro.update(
+        bloqueado_ate=agora + timedelta(seconds=tarefa.tempo_maximo),
+        bloqueado_por=executor,
+    ) == 1
+
+
+def executar(tarefa, executor=EXECUTOR):
+    """Executa uma tarefa já reivindicada, grava o histórico e libera a trava"""
+    linha = TarefaAgendada.objects.get(nome=tarefa.nome)
+    execucao = ExecucaoTarefa.objects.create(tarefa=linha, executor=executor, inicio=timezone.now())
+    try:
+        retorno = tarefa.funcao()
+        execucao.sucesso = True
+        execucao.resultado = '' if retorno is None else str(retorno)
+    except Exception:
+        logger.exception(f"Erro na tarefa agendada {tarefa.nome}")
+        execucao.sucesso = False
+        execucao.resultado = traceback.format_exc()
+        close_old_connections()
+
+    execucao.fim = timezone.now()
+    execucao.save(update_fields=['fim', 'sucesso', 'resultado'])
+
+    # Próxima execução conta a partir do fim: execuções perdidas não se acumulam
+    TarefaAgendada.objects.filter(pk=linha.pk, bloqueado_por=executor).update(
+        proxima_execucao=tarefa.proxima_execucao(execucao.fim),
+        ultima_execucao=execucao.inicio,
+        ultimo_sucesso=execucao.sucesso,
+        bloqueado_ate=None,
+        bloqueado_por='',
+    )
+    logger.info(
+        f"Tarefa {tarefa.nome} {'concluída' if execucao.sucesso else 'falhou'} "
+        f"em {execucao.duracao.total_seconds():.1f}s"
+    )
+    return execucao
+
+
+def executar_pendentes(tarefas, executor=EXECUTOR):
+    """Executa, em sequência, as tarefas vencidas que este executor conseguir travar"""
+    agora = timezone.now()
+    vencidas = TarefaAgendada.objects.filter(
+        _livres(agora),
+        nome__in=tarefas,
+        ativo=True,
+        proxima_execucao__lte=agora,
+    ).order_by('proxima_execucao').values_list('nome', flat=True)
+
+    execucoes = []
+    for nome in list(vencidas):
+        tarefa = tarefas[nome]
+        if reivindicar(tarefa, executor):
+            execucoes.append(executar(tarefa, executor))
+    return execucoes
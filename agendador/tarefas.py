@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ExecucaoTarefa
+from .registro import tarefa
+
+
+@tarefa('30 3 * * *', jitter=300)
+def limpar_historico():
+    """Remove o histórico de execuções mais antigo que AGENDADOR_HISTORICO_DIAS"""
+    dias = getattr(settings, 'AGENDADOR_HISTORICO_DIAS', 30)
+    removidas, _ = ExecucaoTarefa.objects.filter(
+        inicio__lt=timezone.now() - timedelta(days=dias)
+    ).delete()
+    return f'{removidas} execuções removidas'
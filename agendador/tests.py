@@ -0,0 +1,56 @@
+from datetime import datetime
+
+from django.test import SimpleTestCase
+
+from .cron import Cron, ExpressaoCronInvalida
+
+# Segunda-feira
+SEGUNDA = datetime(2026, 10, 19, 10, 7)
+
+
+def execucoes(expressao, depois_de, quantidade):
+    cron = Cron(expressao)
+    momentos = []
+    for _ in range(quantidade):
+        depois_de = cron.proxima(depois_de)
+        momentos.append(depois_de)
+    return momentos
+
+
+class CronTest(SimpleTestCase):
+    def test_passos(self):
+        self.assertEqual(
+            execucoes('*/15 * * * *', SEGUNDA, 3),
+            [datetime(2026, 10, 19, 10, 15), datetime(2026, 10, 19, 10, 30), datetime(2026, 10, 19, 10, 45)],
+        )
+        self.assertEqual(Cron('0 9-17/4 * * *').horas, {9, 13, 17})
+        self.assertEqual(Cron('5/20 * * * *').minutos, {5, 25, 45})
+
+    def test_intervalos_e_listas(self):
+        # Dias úteis às 8h30: de sexta depois do horário vai para segunda
+        self.assertEqual(Cron('30 8 * * 1-5').proxima(datetime(2026, 10, 23, 9, 0)), datetime(2026, 10, 26, 8, 30))
+        self.assertEqual(Cron('0 6,18 * * *').proxima(SEGUNDA), datetime(2026, 10, 19, 18, 0))
+
+    def test_domingo_como_0_ou_7(self):
+        self.assertEqual(Cron('0 0 * * 7').dias_semana, {0})
+        self.assertEqual(Cron('0 0 * * 7').proxima(SEGUNDA), datetime(2026, 10, 25, 0, 0))
+        self.assertEqual(Cron('0 0 * * 5-7').dias_semana, {5, 6, 0})
+
+    def test_dia_do_mes_ou_dia_da_semana(self):
+        # Ambos restritos: dia 13 OU sexta-feira
+        self.assertEqual(
+            [momento.date().isoformat() for momento in execucoes('0 0 13 * 5', SEGUNDA, 5)],
+            ['2026-10-23', '2026-10-30', '2026-11-06', '2026-11-13', '2026-11-20'],
+        )
+        self.assertEqual(Cron('0 0 13 * 5').proxima(datetime(2026, 12, 11, 12, 0)), datetime(2026, 12, 13, 0, 0))
+
+    def test_campo_com_asterisco_nao_conta_como_restrito(self):
+        # "*/2" começa com "*": como no cron tradicional, vale dia ímpar E segunda-feira
+        self.assertEqual(Cron('0 0 */2 * 1').proxima(SEGUNDA), datetime(2026, 11, 9, 0, 0))
+        self.assertEqual(Cron('0 0 1 * */2').proxima(SEGUNDA), datetime(2026, 11, 1, 0, 0))
+        self.assertEqual(Cron('0 0 * * 1').proxima(SEGUNDA), datetime(2026, 10, 26, 0, 0))
+
+    def test_expressoes_invalidas(self):
+        for expressao in ('60 * * * *', '* 24 * * *', '* * 0 * *', '* * * * 8', '5-1 * * * *', '*/0 * * * *', '* * * *', 'a * * * *'):
+            with self.subTest(expressao=expressao), self.assertRaises(ExpressaoCronInvalida):
+                Cron(expressao)
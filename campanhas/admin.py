@@ -0,0 +1,58 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Campanha
+from .services import total_destinatarios
+
+
+@admin.register(Campanha)
+class CampanhaAdmin(admin.ModelAdmin):
+    list_display = ['nome', 'publico', 'status', 'data_agendada', 'enviados', 'falhas', 'data_conclusao']
+    list_filter = ['status', 'publico']
+    search_fields = ['nome', 'assunto']
+    readonly_fields = [
+        'destinatarios_display', 'data_inicio', 'data_conclusao', 'fonte_atual', 'ultimo_id',
+        'enviados', 'falhas', 'ultimo_erro', 'bloqueado_ate', 'bloqueado_por',
+    ]
+    fieldsets = (
+        ('Conteúdo', {
+            'fields': ('nome', 'assunto', 'corpo_html', 'corpo_texto'),
+        }),
+        ('Público', {
+            'fields': ('publico', 'segmentos', 'destinatarios_display'),
+        }),
+        ('Envio', {
+            'fields': ('status', 'data_agendada', 'data_inicio', 'data_conclusao'),
+        }),
+        ('Progresso', {
+            'fields': ('enviados', 'falhas', 'fonte_atual', 'ultimo_id', 'ultimo_erro', 'bloqueado_ate', 'bloqueado_por'),
+            'classes': ('collapse',),
+        }),
+    )
+    actions = ['agendar_agora', 'pausar', 'retomar', 'cancelar']
+
+    def destinatarios_display(self, obj):
+        if obj.pk is None:
+            return '-'
+        return total_destinatarios(obj)
+    destinatarios_display.short_description = "Destinatários"
+
+    def agendar_agora(self, request, queryset):
+        atualizadas = queryset.filter(status='rascunho').update(status='agendada', data_agendada=timezone.now())
+        self.message_user(request, f'{atualizadas} campanhas agendadas para envio imediato.')
+    agendar_agora.short_description = "📤 Enviar agora"
+
+    def pausar(self, request, queryset):
+        atualizadas = queryset.filter(status__in=['agendada', 'enviando']).update(status='pausada')
+        self.message_user(request, f'{atualizadas} campanhas pausadas.')
+    pausar.short_description = "⏸️ Pausar envio"
+
+    def retomar(self, request, queryset):
+        atualizadas = queryset.filter(status='pausada').update(status='agendada')
+        self.message_user(request, f'{atualizadas} campanhas retomadas.')
+    retomar.short_description = "▶️ Retomar envio"
+
+    def cancelar(self, request, queryset):
+        atualizadas = queryset.exclude(status='concluida').update(status='cancelada')
+        self.message_user(request, f'{atualizadas} campanhas canceladas.')
+    cancelar.short_description = "❌ Cancelar campanha"
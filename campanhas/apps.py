@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class CampanhasConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "campanhas"
+    verbose_name = "Campanhas de E-mail"
@@ -0,0 +1,94 @@
+"""
+Envia uma campanha de e-mail, ou todas as agendadas e vencidas.
+
+Uso:
+    python manage.py enviar_campanha 12
+    python manage.py enviar_campanha 12 --teste eu@exemplo.com
+    python manage.py enviar_campanha --pendentes
+
+Para testar contra um SMTP local (nenhum e-mail sai da máquina):
+    python -m aiosmtpd -n -l localhost:1025
+    EMAIL_BACKEND=django.core.mail.backends.smtp.EmailBackend EMAIL_HOST=localhost \\
+        EMAIL_PORT=1025 EMAIL_USE_TLS=False python manage.py enviar_campanha 12 --por-segundo 50
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from campanhas.models import Campanha
+from campanhas.services import (
+    enviar_campanha, enviar_pendentes, enviar_teste, reivindicar, total_destinatarios,
+)
+
+
+class Command(BaseCommand):
+    help = 'Envia campanhas de e-mail respeitando o limite de envio e retomando do último lote gravado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('campanha', nargs='?', type=int, help='ID da campanha')
+        parser.add_argument(
+            '--pendentes',
+            action='store_true',
+            help='Envia todas as campanhas agendadas e vencidas',
+        )
+        parser.add_argument(
+            '--teste',
+            metavar='EMAIL',
+            help='Envia uma única mensagem de teste para o endereço informado',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            help='Mensagens por send_messages (padrão: CAMPANHA_LOTE)',
+        )
+        parser.add_argument(
+            '--por-segundo',
+            type=float,
+            help='Limite de mensagens por segundo (padrão: CAMPANHA_EMAILS_POR_SEGUNDO)',
+        )
+        parser.add_argument(
+            '--tempo-maximo',
+            type=float,
+            help='Segundos de envio antes de parar (o restante continua depois)',
+        )
+
+    def handle(self, *args, **options):
+        if options['pendentes']:
+            metricas = enviar_pendentes(tempo_maximo=options['tempo_maximo'])
+            self.stdout.write(self.style.SUCCESS(
+                f"{metricas['campanhas']} campanhas processadas; "
+                f"{metricas['enviados']} e-mails enviados, {metricas['falhas']} falhas."
+            ))
+            return
+
+        if options['campanha'] is None:
+            raise CommandError('Informe o ID da campanha ou use --pendentes.')
+        try:
+            campanha = Campanha.objects.get(pk=options['campanha'])
+        except Campanha.DoesNotExist:
+            raise CommandError(f"Campanha {options['campanha']} não encontrada.")
+
+        if options['teste']:
+            enviar_teste(campanha, options['teste'])
+            self.stdout.write(self.style.SUCCESS(f"Teste enviado para {options['teste']}."))
+            return
+
+        if not reivindicar(campanha, forcar=True):
+            raise CommandError(
+                f'A campanha está "{campanha.get_status_display()}" ou já está sendo enviada por {campanha.bloqueado_por}.'
+            )
+
+        self.stdout.write(f'Enviando "{campanha}" para {total_destinatarios(campanha)} destinatários...')
+        metricas = enviar_campanha(
+            campanha,
+            tempo_maximo=options['tempo_maximo'],
+            lote=options['lote'],
+            por_segundo=options['por_segundo'],
+        )
+        if metricas['erro']:
+            raise CommandError(
+                f"Envio interrompido após {metricas['enviados']} e-mails: {metricas['erro']}. "
+                f"Execute novamente para continuar."
+            )
+        situacao = 'concluída' if metricas['concluida'] else 'interrompida (execute novamente para continuar)'
+        self.stdout.write(self.style.SUCCESS(
+            f"{metricas['enviados']} e-mails enviados, {metricas['falhas']} falhas; campanha {situacao}."
+        ))
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Campanha',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=200, verbose_name='Nome')),
+                ('assunto', models.CharField(help_text='Aceita variáveis de template, ex.: {{ nome }}, temos novidades!', max_length=200, verbose_name='Assunto')),
+                ('corpo_html', models.TextField(help_text='Template Django. Variáveis: nome, email, link_descadastro, site_url', verbose_name='Corpo (HTML)')),
+                ('corpo_texto', models.TextField(blank=True, help_text='Opcional; se vazio, é gerado a partir do HTML', verbose_name='Corpo (texto)')),
+                ('publico', models.CharField(choices=[('newsletter', 'Newsletter'), ('promocoes', 'Promoções')], default='newsletter', max_length=20, verbose_name='Público')),
+                ('segmentos', models.JSONField(blank=True, default=list, help_text='Lista de segmentos RFM (ex.: ["campeoes", "em_risco"]); vazio envia para todos', verbose_name='Segmentos')),
+                ('status', models.CharField(choices=[('rascunho', 'Rascunho'), ('agendada', 'Agendada'), ('enviando', 'Enviando'), ('pausada', 'Pausada'), ('concluida', 'Concluída'), ('cancelada', 'Cancelada')], default='rascunho', max_length=20, verbose_name='Status')),
+                ('data_agendada', models.DateTimeField(blank=True, null=True, verbose_name='Enviar a partir de')),
+                ('data_inicio', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Início do Envio')),
+                ('data_conclusao', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Conclusão')),
+                ('fonte_atual', models.CharField(default='clientes', editable=False, max_length=20, verbose_name='Fonte Atual')),
+                ('ultimo_id', models.BigIntegerField(default=0, editable=False, verbose_name='Último Destinatário')),
+                ('enviados', models.PositiveIntegerField(default=0, editable=False, verbose_name='Enviados')),
+                ('falhas', models.PositiveIntegerField(default=0, editable=False, verbose_name='Falhas')),
+                ('ultimo_erro', models.TextField(blank=True, editable=False, verbose_name='Último Erro')),
+                ('bloqueado_ate', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Bloqueado Até')),
+                ('bloqueado_por', models.CharField(blank=True, editable=False, max_length=200, verbose_name='Bloqueado Por')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Última Atualização')),
+            ],
+            options={
+                'verbose_name': 'Campanha',
+                'verbose_name_plural': 'Campanhas',
+                'ordering': ['-data_criacao'],
+                'indexes': [models.Index(fields=['status', 'data_agendada'], name='campanhas_status_data_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,77 @@
+from django.db import models
+
+
+class Campanha(models.Model):
+    """
+    Campanha de e-mail (newsletter ou promoção).
+
+    O progresso do envio fica na própria linha (``fonte_atual`` e
+    ``ultimo_id``), então um envio interrompido continua de onde parou. A
+    trava segue o mesmo esquema das tarefas do agendador: só o processo que
+    gravar ``bloqueado_ate`` com um UPDATE condicional envia a campanha.
+    """
+    PUBLICO_CHOICES = [
+        ('newsletter', 'Newsletter'),
+        ('promocoes', 'Promoções'),
+    ]
+
+    STATUS_CHOICES = [
+        ('rascunho', 'Rascunho'),
+        ('agendada', 'Agendada'),
+        ('enviando', 'Enviando'),
+        ('pausada', 'Pausada'),
+        ('concluida', 'Concluída'),
+        ('cancelada', 'Cancelada'),
+    ]
+
+    nome = models.CharField(max_length=200, verbose_name="Nome")
+    assunto = models.CharField(
+        max_length=200,
+        verbose_name="Assunto",
+        help_text="Aceita variáveis de template, ex.: {{ nome }}, temos novidades!"
+    )
+    corpo_html = models.TextField(
+        verbose_name="Corpo (HTML)",
+        help_text="Template Django. Variáveis: nome, email, link_descadastro, site_url"
+    )
+    corpo_texto = models.TextField(
+        blank=True,
+        verbose_name="Corpo (texto)",
+        help_text="Opcional; se vazio, é gerado a partir do HTML"
+    )
+    publico = models.CharField(max_length=20, choices=PUBLICO_CHOICES, default='newsletter', verbose_name="Público")
+    segmentos = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name="Segmentos",
+        help_text="Lista de segmentos RFM (ex.: [\"campeoes\", \"em_risco\"]); vazio envia para todos"
+    )
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='rascunho', verbose_name="Status")
+    data_agendada = models.DateTimeField(null=True, blank=True, verbose_name="Enviar a partir de")
+    data_inicio = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Início do Envio")
+    data_conclusao = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Conclusão")
+
+    # Progresso (campanhas.services)
+    fonte_atual = models.CharField(max_length=20, default='clientes', editable=False, verbose_name="Fonte Atual")
+    ultimo_id = models.BigIntegerField(default=0, editable=False, verbose_name="Último Destinatário")
+    enviados = models.PositiveIntegerField(default=0, editable=False, verbose_name="Enviados")
+    falhas = models.PositiveIntegerField(default=0, editable=False, verbose_name="Falhas")
+    ultimo_erro = models.TextField(blank=True, editable=False, verbose_name="Último Erro")
+
+    bloqueado_ate = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Bloqueado Até")
+    bloqueado_por = models.CharField(max_length=200, blank=True, editable=False, verbose_name="Bloqueado Por")
+
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
+    data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Última Atualização")
+
+    class Meta:
+        verbose_name = "Campanha"
+        verbose_name_plural = "Campanhas"
+        ordering = ['-data_criacao']
+        indexes = [
+            models.Index(fields=['status', 'data_agendada'], name='campanhas_status_data_idx'),
+        ]
+
+    def __str__(self):
+        return self.nome
@@ -0,0 +1,359 @@
+"""
+Envio de campanhas de e-mail em massa.
+
+Os destinatários são lidos em lotes ordenados por chave primária, primeiro
+dos clientes (clientes.Cliente) e depois dos usuários cadastrados que ainda
+não têm ficha de cliente (usuarios.PerfilUsuario). Cada destinatário recebe a
+mensagem renderizada com seus próprios dados e link de descadastro.
+
+Todos os lotes saem pela mesma conexão SMTP (``send_messages``), no ritmo de
+``CAMPANHA_EMAILS_POR_SEGUNDO``. Depois de cada lote o progresso é gravado na
+campanha; se o processo morrer, o envio continua do lote seguinte ao último
+gravado (no pior caso as mensagens de um lote são reenviadas).
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+import logging
+import smtplib
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sites.models import Site
+from django.core import signing
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import OperationalError
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.template import Context, Template
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from agendador.services import EXECUTOR
+from clientes.models import Cliente
+from usuarios.models import PerfilUsuario
+from .models import Campanha
+
+logger = logging.getLogger(__name__)
+
+SALT_DESCADASTRO = 'campanhas.descadastro'
+FONTES = ('clientes', 'usuarios')
+
+
+@dataclass
+class Destinatario:
+    id: int
+    email: str
+    nome: str
+
+
+def _campo_consentimento(publico):
+    return 'aceita_newsletter' if publico == 'newsletter' else 'aceita_promocoes'
+
+
+def _consulta_clientes(campanha):
+    clientes = Cliente.objects.filter(ativo=True, **{_campo_consentimento(campanha.publico): True}).exclude(email='')
+    if campanha.segmentos:
+        clientes = clientes.filter(segmento__in=campanha.segmentos)
+    return clientes.values_list('pk', 'email', 'nome_completo')
+
+
+def _consulta_usuarios(campanha):
+    if campanha.segmentos:
+        # Usuários sem ficha de cliente não têm pedidos, logo não têm segmento
+        return None
+    return (
+        User.objects.filter(is_active=True, **{f'perfil__{_campo_consentimento(campanha.publico)}': True})
+        .exclude(email='')
+        .filter(cliente_profile__isnull=True)
+        .exclude(email__in=Cliente.objects.values('email'))
+        .values_list('pk', 'email', 'first_name')
+    )
+
+
+CONSULTAS = {
+    'clientes': _consulta_clientes,
+    'usuarios': _consulta_usuarios,
+}
+
+
+def destinatarios(campanha, lote):
+    """Gera (fonte, [Destinatario]) a partir do progresso gravado na campanha"""
+    for fonte in FONTES[FONTES.index(campanha.fonte_atual):]:
+        consulta = CONSULTAS[fonte](campanha)
+        if consulta is None:
+            continue
+        ultimo_id = campanha.ultimo_id if fonte == campanha.fonte_atual else 0
+        while True:
+            linhas = list(consulta.filter(pk__gt=ultimo_id).order_by('pk')[:lote])
+            if not linhas:
+                break
+            ultimo_id = linhas[-1][0]
+            yield fonte, [Destinatario(*linha) for linha in linhas]
+
+
+def total_destinatarios(campanha):
+    return sum(consulta.count() for consulta in (CONSULTAS[fonte](campanha) for fonte in FONTES) if consulta is not None)
+
+
+def gerar_token_descadastro(email, publico):
+    return signing.dumps([email, publico], salt=SALT_DESCADASTRO, compress=True)
+
+
+def ler_token_descadastro(token):
+    """Retorna (email, publico); levanta signing.BadSignature se o token for inválido"""
+    email, publico = signing.loads(token, salt=SALT_DESCADASTRO)
+    return email, publico
+
+
+def descadastrar(email, publico):
+    """Remove o consentimento do e-mail no cadastro de cliente e no perfil do usuário"""
+    campo = _campo_consentimento(publico)
+    Cliente.objects.filter(email__iexact=email).update(**{campo: False})
+    PerfilUsuario.objects.filter(user__email__iexact=email).update(**{campo: False})
+    logger.info(f"{email} descadastrado de {publico}")
+
+
+class Renderizador:
+    """Templates da campanha compilados uma vez e renderizados por destinatário"""
+
+    def __init__(self, campanha):
+        self.campanha = campanha
+        self.assunto = Template(campanha.assunto)
+        self.html = Template(campanha.corpo_html)
+        self.texto = Template(campanha.corpo_texto) if campanha.corpo_texto else None
+        self.site_url = f'https://{Site.objects.get_current().domain}'
+
+    def mensagem(self, destinatario, conexao=None):
+        link = self.site_url + reverse(
+            'campanhas:descadastrar',
+            args=[gerar_token_descadastro(destinatario.email, self.campanha.publico)],
+        )
+        contexto = Context({
+            'nome': destinatario.nome or 'cliente',
+            'email': destinatario.email,
+            'link_descadastro': link,
+            'site_url': self.site_url,
+        })
+        html = self.html.render(contexto)
+        mensagem = MensagemCampanha(
+            subject=' '.join(self.assunto.render(contexto).split()),
+            body=self.texto.render(contexto) if self.texto else strip_tags(html),
+            to=[destinatario.email],
+            connection=conexao,
+            headers={
+                'List-Unsubscribe': f'<{link}>',
+                'List-Unsubscribe-Post': 'List-Unsubscribe=One-Click',
+            },
+        )
+        mensagem.attach_alternative(html, 'text/html')
+        return mensagem
+
+
+class Limitador:
+    """Espaça os envios para não passar de ``por_segundo`` mensagens por segundo"""
+
+    def __init__(self, por_segundo):
+        self.intervalo = 1 / por_segundo if por_segundo else 0
+        self.liberado_em = time.monotonic()
+
+    def aguardar(self, quantidade):
+        agora = time.monotonic()
+        if self.liberado_em > agora:
+            time.sleep(self.liberado_em - agora)
+        self.liberado_em = max(self.liberado_em, agora) + quantidade * self.intervalo
+
+
+class MensagemCampanha(EmailMultiAlternatives):
+    """Marca quando o backend monta a mensagem, para saber até onde um lote foi enviado"""
+    montada = False
+
+    def message(self, *args, **kwargs):
+        self.montada = True
+        return super().message(*args, **kwargs)
+
+
+def _erro_de_conexao(erro):
+    if isinstance(erro, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(erro, smtplib.SMTPResponseException):
+        # 4xx: limite de envio ou falha temporária do servidor
+        return 400 <= erro.smtp_code < 500
+    return isinstance(erro, OSError) and not isinstance(erro, smtplib.SMTPException)
+
+
+def _erro_transitorio(erro):
+    """Falhas que podem passar sozinhas: conexão SMTP, 4xx do servidor e queda do banco"""
+    return _erro_de_conexao(erro) or isinstance(erro, OperationalError)
+
+
+def _enviar_lote(conexao, mensagens):
+    """
+    Envia o lote pela conexão aberta e retorna (enviados, falhas).
+
+    O backend SMTP envia as mensagens em ordem e para na primeira que
+    falhar; as anteriores já foram entregues. Uma recusa do destinatário
+    conta como falha e o restante do lote segue. Erros de conexão reabrem a
+    conexão uma vez e, se persistirem, sobem para interromper o envio sem
+    avançar o progresso.
+    """
+    enviados = falhas = 0
+    reconectou = False
+    while mensagens:
+        for mensagem in mensagens:
+            mensagem.montada = False
+        try:
+            entregues = conexao.send_messages(mensagens)
+            return enviados + entregues, falhas + len(mensagens) - entregues
+        except Exception as e:
+            parada = sum(mensagem.montada for mensagem in mensagens) - 1
+            if parada < 0 or not isinstance(e, OSError):
+                raise
+            enviados += parada
+            if _erro_de_conexao(e):
+                if reconectou:
+                    raise
+                logger.warning(f"Conexão SMTP perdida, reconectando: {str(e)}")
+                conexao.close()
+                conexao.open()
+                reconectou = True
+                mensagens = mensagens[parada:]
+            else:
+                falhas += 1
+                logger.warning(f"E-mail para {', '.join(mensagens[parada].to)} recusado: {str(e)}")
+                mensagens = mensagens[parada + 1:]
+    return enviados, falhas
+
+
+def _trava():
+    return timedelta(seconds=getattr(settings, 'CAMPANHA_TRAVA_SEGUNDOS', 300))
+
+
+def _vencidas(agora):
+    # Sem data agendada a campanha sai assim que for marcada como agendada
+    return Q(data_agendada__isnull=True) | Q(data_agendada__lte=agora)
+
+
+def reivindicar(campanha, executor=EXECUTOR, forcar=False):
+    """
+    Trava a campanha para este executor e a marca como "enviando".
+
+    Sem ``forcar`` só campanhas agendadas e vencidas (ou em envio com a
+    trava expirada, ou seja, cujo processo morreu) podem ser reivindicadas.
+    """
+    agora = timezone.now()
+    status = ['agendada', 'enviando'] + (['rascunho', 'pausada'] if forcar else [])
+    filtro = Campanha.objects.filter(
+        Q(bloqueado_ate__isnull=True) | Q(bloqueado_ate__lt=agora),
+        pk=campanha.pk,
+        status__in=status,
+    )
+    if not forcar:
+        filtro = filtro.filter(_vencidas(agora))
+    reivindicada = filtro.update(
+        status='enviando',
+        bloqueado_ate=agora + _trava(),
+        bloqueado_por=executor,
+        data_inicio=Coalesce(F('data_inicio'), Value(agora)),
+    ) == 1
+    if reivindicada:
+        campanha.refresh_from_db()
+    return reivindicada
+
+
+def _liberar(campanha, executor, **campos):
+    Campanha.objects.filter(pk=campanha.pk, bloqueado_por=executor).update(
+        bloqueado_ate=None, bloqueado_por='', **campos
+    )
+
+
+def enviar_campanha(campanha, executor=EXECUTOR, tempo_maximo=None, lote=None, por_segundo=None):
+    """
+    Envia (ou continua) uma campanha já reivindicada.
+
+    Com ``tempo_maximo`` o envio para ao fim do lote em que o tempo se
+    esgotar e a campanha volta para "agendada", continuando na próxima
+    chamada. Pausar ou cancelar a campanha no admin também interrompe o envio
+    no lote seguinte. Retorna as métricas desta chamada.
+    """
+    lote = lote or getattr(settings, 'CAMPANHA_LOTE', 20)
+    limitador = Limitador(por_segundo or getattr(settings, 'CAMPANHA_EMAILS_POR_SEGUNDO', 5))
+    renderizador = Renderizador(campanha)
+    inicio = time.monotonic()
+    metricas = {'enviados': 0, 'falhas': 0, 'concluida': False, 'erro': ''}
+
+    conexao = get_connection(fail_silently=False)
+    try:
+        conexao.open()
+        for fonte, lista in destinatarios(campanha, lote):
+            mensagens = [renderizador.mensagem(destinatario, conexao) for destinatario in lista]
+            limitador.aguardar(len(mensagens))
+            enviados, falhas = _enviar_lote(conexao, mensagens)
+            metricas['enviados'] += enviados
+            metricas['falhas'] += falhas
+
+            campanha.fonte_atual, campanha.ultimo_id = fonte, lista[-1].id
+            ativa = Campanha.objects.filter(pk=campanha.pk, status='enviando', bloqueado_por=executor).update(
+                fonte_atual=fonte,
+                ultimo_id=lista[-1].id,
+                enviados=F('enviados') + enviados,
+                falhas=F('falhas') + falhas,
+                bloqueado_ate=timezone.now() + _trava(),
+            )
+            if not ativa:
+                logger.info(f"Envio da campanha {campanha.pk} interrompido (pausada ou cancelada)")
+                _liberar(campanha, executor)
+                return metricas
+
+            if tempo_maximo and time.monotonic() - inicio >= tempo_maximo:
+                _liberar(campanha, executor, status='agendada')
+                return metricas
+
+        _liberar(campanha, executor, status='concluida', data_conclusao=timezone.now(), ultimo_erro='')
+        metricas['concluida'] = True
+        logger.info(f"Campanha {campanha.pk} concluída")
+    except Exception as e:
+        metricas['erro'] = str(e)
+        if _erro_transitorio(e):
+            # Progresso já gravado; a campanha volta para a fila e continua no próximo envio
+            logger.warning(f"Envio da campanha {campanha.pk} interrompido, nova tentativa no próximo ciclo: {str(e)}")
+            _liberar(campanha, executor, status='agendada', ultimo_erro=str(e))
+        else:
+            # Autenticação, template etc.: repetir a cada minuto não resolve;
+            # a campanha fica pausada até alguém corrigir e retomar no admin
+            logger.exception(f"Erro no envio da campanha {campanha.pk}; campanha pausada")
+            _liberar(campanha, executor, status='pausada', ultimo_erro=str(e))
+    finally:
+        conexao.close()
+    return metricas
+
+
+def enviar_pendentes(tempo_maximo=None, executor=EXECUTOR):
+    """Envia as campanhas agendadas e vencidas, dentro do tempo disponível"""
+    inicio = time.monotonic()
+    metricas = {'campanhas': 0, 'enviados': 0, 'falhas': 0}
+    agora = timezone.now()
+    pendentes = Campanha.objects.filter(
+        _vencidas(agora), status__in=['agendada', 'enviando']
+    ).order_by('data_agendada', 'pk')
+    for campanha in pendentes:
+        restante = None
+        if tempo_maximo:
+            restante = tempo_maximo - (time.monotonic() - inicio)
+            if restante <= 0:
+                break
+        if not reivindicar(campanha, executor):
+            continue
+        resultado = enviar_campanha(campanha, executor, tempo_maximo=restante)
+        metricas['campanhas'] += 1
+        metricas['enviados'] += resultado['enviados']
+        metricas['falhas'] += resultado['falhas']
+    return metricas
+
+
+def enviar_teste(campanha, email):
+    """Envia a campanha para um único endereço, sem tocar no progresso"""
+    mensagem = Renderizador(campanha).mensagem(Destinatario(0, email, 'Teste'))
+    mensagem.subject = f'[TESTE] {mensagem.subject}'
+    return mensagem.send()
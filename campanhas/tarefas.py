@@ -0,0 +1,13 @@
+from django.conf import settings
+
+from agendador.registro import tarefa
+from .services import enviar_pendentes
+
+
+@tarefa('* * * * *', tempo_maximo=600)
+def enviar_campanhas():
+    # Cada execução envia por um tempo limitado para não prender o agendador;
+    # o restante continua na execução seguinte
+    metricas = enviar_pendentes(tempo_maximo=getattr(settings, 'CAMPANHA_TEMPO_POR_EXECUCAO', 45))
+    if metricas['campanhas']:
+        return f"{metricas['enviados']} e-mails enviados, {metricas['falhas']} falhas"
@@ -0,0 +1,32 @@
+import smtplib
+from unittest import mock
+
+from django.test import TestCase
+
+from .models import Campanha
+from .services import enviar_campanha, reivindicar
+
+
+class ErroEnvioTest(TestCase):
+    def enviar_com_erro(self, erro):
+        campanha = Campanha.objects.create(
+            nome='Novidades', assunto='Novidades', corpo_html='<p>Olá {{ nome }}</p>', status='agendada',
+        )
+        self.assertTrue(reivindicar(campanha))
+        conexao = mock.Mock()
+        conexao.open.side_effect = erro
+        with mock.patch('campanhas.services.get_connection', return_value=conexao):
+            metricas = enviar_campanha(campanha)
+        campanha.refresh_from_db()
+        self.assertEqual(metricas['erro'], str(erro))
+        self.assertEqual(campanha.ultimo_erro, str(erro))
+        self.assertEqual(campanha.bloqueado_por, '')
+        return campanha
+
+    def test_erro_de_conexao_devolve_para_a_fila(self):
+        campanha = self.enviar_com_erro(smtplib.SMTPServerDisconnected('Conexão encerrada'))
+        self.assertEqual(campanha.status, 'agendada')
+
+    def test_erro_permanente_pausa_a_campanha(self):
+        campanha = self.enviar_com_erro(smtplib.SMTPAuthenticationError(535, b'Authentication failed'))
+        self.assertEqual(campanha.status, 'pausada')
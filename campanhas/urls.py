@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'campanhas'
+
+urlpatterns = [
+    path('descadastrar/<str:token>/', views.descadastrar_view, name='descadastrar'),
+]
@@ -0,0 +1,30 @@
+from django.core import signing
+from django.http import Http404
+from django.shortcuts import render
+from django.views.decorators.csrf import csrf_exempt
+
+from .services import descadastrar, ler_token_descadastro
+
+
+@csrf_exempt  # o token assinado autoriza; provedores de e-mail fazem o POST de um clique sem CSRF
+def descadastrar_view(request, token):
+    """
+    Descadastro pelo link do e-mail.
+
+    GET mostra a confirmação; POST (do formulário ou do List-Unsubscribe de
+    um clique) remove o consentimento.
+    """
+    try:
+        email, publico = ler_token_descadastro(token)
+    except signing.BadSignature:
+        raise Http404('Link de descadastro inválido')
+
+    concluido = request.method == 'POST'
+    if concluido:
+        descadastrar(email, publico)
+
+    return render(request, 'campanhas/descadastro.html', {
+        'email': email,
+        'publico': 'da newsletter' if publico == 'newsletter' else 'das promoções',
+        'concluido': concluido,
+    })
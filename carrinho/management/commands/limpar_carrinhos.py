@@ -0,0 +1,97 @@
+"""
+Remove carrinhos abandonados em lotes.
+
+A inatividade é medida por Carrinho.data_atualizacao, que toda gravação de
+itens atualiza (Carrinho.tocar).
+
+Uso:
+    python manage.py limpar_carrinhos
+    python manage.py limpar_carrinhos --dias 15 --lote 500 --incluir-usuarios
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from carrinho.models import Carrinho
+
+
+class Command(BaseCommand):
+    help = 'Exclui carrinhos abandonados (e seus itens) em lotes curtos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=getattr(settings, 'CARRINHO_EXPIRACAO_DIAS', 30),
+            help='Dias sem atividade para considerar o carrinho abandonado',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Quantidade de carrinhos excluídos por transação',
+        )
+        parser.add_argument(
+            '--pausa',
+            type=float,
+            default=0.0,
+            help='Segundos de espera entre lotes (alivia réplicas e locks)',
+        )
+        parser.add_argument(
+            '--incluir-usuarios',
+            action='store_true',
+            help='Também remove carrinhos abandonados de usuários autenticados',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas conta os carrinhos que seriam removidos',
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(days=options['dias'])
+
+        abandonados = Carrinho.objects.filter(
+            data_atualizacao__lt=limite
+        ).exclude(
+            itens__data_adicao__gte=limite
+        )
+        if not options['incluir_usuarios']:
+            abandonados = abandonados.filter(usuario__isnull=True)
+
+        if options['dry_run']:
+            total = abandonados.count()
+            self.stdout.write(f'{total} carrinhos seriam removidos (sem atividade desde {limite:%d/%m/%Y}).')
+            return
+
+        total_carrinhos = 0
+        total_itens = 0
+        ultimo_id = 0
+        while True:
+            # Paginação por chave primária: cada lote é uma consulta indexada
+            # e uma transação curta, sem manter locks sobre a tabela inteira
+            ids = list(
+                abandonados.filter(pk__gt=ultimo_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:options['lote']]
+            )
+            if not ids:
+                break
+            ultimo_id = ids[-1]
+
+            with transaction.atomic():
+                _, removidos = Carrinho.objects.filter(pk__in=ids).delete()
+
+            total_carrinhos += removidos.get('carrinho.Carrinho', 0)
+            total_itens += removidos.get('carrinho.ItemCarrinho', 0)
+
+            if options['pausa']:
+                time.sleep(options['pausa'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total_carrinhos} carrinhos e {total_itens} itens removidos.'
+        ))
@@ -1,10 +1,72 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Q
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+from django.utils import timezone
 from produtos.models import Produto
 from decimal import Decimal
 
 
-class Carrinho(models.Model):
+# Chave de sessão com o id do carrinho anônimo (sobrevive à troca de
+# session_key que o login faz, permitindo a mesclagem)
+CARRINHO_ID_SESSION_KEY = 'carrinho_id'
+
+
+class CarrinhoCalculosMixin:
+    """
+    Totais e frete comuns aos carrinhos persistidos (Carrinho) e aos
+    carrinhos de sessão (carrinho.sessao.CarrinhoSessao).
+    """
+
+    @property
+    def total_itens(self):
+        return sum(item.quantidade for item in self.itens.all())
+
+    @property
+    def subtotal(self):
+        return sum(item.total for item in self.itens.all())
+
+    @property
+    def total(self):
+        return self.subtotal + self.valor_frete
+
+    def medidas_frete(self):
+        """
+        Peso total e subtotal usados na cotação de frete.
+
+        Saem de uma única passada pelos itens, com os produtos carregados junto.
+        """
+        peso_total = Decimal('0')
+        subtotal = Decimal('0')
+        for item in self.itens.select_related('produto'):
+            peso_total += (item.produto.peso or Decimal('0.5')) * item.quantidade
+            subtotal += item.total
+        return peso_total, subtotal
+
+    def cotar_frete(self, cep):
+        """Cotações de frete (frete.services) para o conteúdo atual do carrinho"""
+        from frete.services import cotar_frete
+
+        return cotar_frete(cep, *self.medidas_frete())
+
+    def calcular_frete(self, cep, provedor=None, cotacoes=None):
+        """Calcula o frete pelo CEP, usando a opção mais barata (ou a do provedor informado)"""
+        if cotacoes is None:
+            cotacoes = self.cotar_frete(cep)
+        if provedor:
+            cotacoes = [cotacao for cotacao in cotacoes if cotacao.provedor == provedor] or cotacoes
+        if not cotacoes:
+            raise ValueError(f'Nenhuma cotação de frete disponível para o CEP {cep}')
+
+        self.cep_frete = cep
+        self.valor_frete = cotacoes[0].valor
+        self.save()
+        return self.valor_frete
+
+
+class Carrinho(CarrinhoCalculosMixin, models.Model):
     usuario = models.OneToOneField(User, on_delete=models.CASCADE, related_name='carrinho', null=True, blank=True)
     session_key = models.CharField(max_length=40, null=True, blank=True)
     data_criacao = models.DateTimeField(auto_now_add=True)
@@ -21,39 +83,107 @@ class Carrinho(models.Model):
             return f'Carrinho de {self.usuario.username}'
         return f'Carrinho anônimo {self.session_key}'
 
-    @property
-    def total_itens(self):
-        return sum(item.quantidade for item in self.itens.all())
-
-    @property
-    def subtotal(self):
-        return sum(item.total for item in self.itens.all())
-
-    @property
-    def total(self):
-        return self.subtotal + self.valor_frete
-
     def limpar(self):
         self.itens.all().delete()
         self.valor_frete = 0
         self.cep_frete = ''
         self.save()
 
-    def calcular_frete(self, cep):
-        """Calcula o frete baseado no CEP - versão simulada"""
-        self.cep_frete = cep
-        # Simulação de cálculo de frete
-        peso_total = sum(item.produto.peso or 0.5 for item in self.itens.all())
-        if self.subtotal >= 199:
-            self.valor_frete = 0  # Frete grátis acima de R$ 199
-        elif peso_total <= 1:
-            self.valor_frete = Decimal('15.90')
-        elif peso_total <= 3:
-            self.valor_frete = Decimal('25.90')
-        else:
-            self.valor_frete = Decimal('35.90')
-        self.save()
-        return self.valor_frete
+    def tocar(self):
+        """
+        Registra atividade no carrinho (data_atualizacao).
+
+        Itens gravados em lote (upsert, DELETE) não passam pelo save do
+        carrinho; sem isso, um carrinho em uso pareceria abandonado para o
+        limpar_carrinhos.
+        """
+        Carrinho.objects.filter(pk=self.pk).update(data_atualizacao=timezone.now())
+
+    def obter_item(self, item_id):
+        """Retorna o item do carrinho ou None se não pertencer a ele"""
+        return self.itens.select_related('produto').filter(pk=item_id).first()
+
+    def obter_ou_criar_item(self, produto, tamanho='', cor='', quantidade=1):
+        return ItemCarrinho.objects.get_or_create(
+            carrinho=self,
+            produto=produto,
+            tamanho=tamanho,
+            cor=cor,
+            defaults={'quantidade': quantidade}
+        )
+
+    def mesclar(self, outro):
+        """
+        Move os itens de outro carrinho para este e exclui o carrinho de origem.
+
+        As quantidades de itens iguais (produto/tamanho/cor) são somadas e
+        limitadas ao estoque disponível; a gravação é feita com um único
+        upsert em lote.
+        """
+        itens_origem = list(outro.itens.select_related('produto'))
+        if not itens_origem:
+            outro.delete()
+            return 0
+
+        existentes = {
+            (item.produto_id, item.tamanho, item.cor): item.quantidade
+            for item in self.itens.all()
+        }
+
+        novos_itens = []
+        for item in itens_origem:
+            chave = (item.produto_id, item.tamanho, item.cor)
+            quantidade = existentes.get(chave, 0) + item.quantidade
+            quantidade = min(quantidade, item.produto.estoque_disponivel())
+            if quantidade <= 0:
+                continue
+            novos_itens.append(ItemCarrinho(
+                carrinho=self,
+                produto_id=item.produto_id,
+                tamanho=item.tamanho,
+                cor=item.cor,
+                quantidade=quantidade,
+            ))
+
+        with transaction.atomic():
+            ItemCarrinho.objects.bulk_create(novos_itens, **_opcoes_upsert_itens())
+            outro.delete()
+            self.tocar()
+        return len(novos_itens)
+
+    def sincronizar_itens(self, quantidades):
+        """
+        Grava as quantidades finais de várias linhas de uma só vez.
+
+        ``quantidades`` mapeia (produto_id, tamanho, cor) -> quantidade; zero
+        remove a linha. São no máximo dois comandos: um upsert em lote e um
+        DELETE.
+        """
+        gravar = [
+            ItemCarrinho(carrinho=self, produto_id=produto_id, tamanho=tamanho, cor=cor, quantidade=quantidade)
+            for (produto_id, tamanho, cor), quantidade in quantidades.items()
+            if quantidade > 0
+        ]
+        remover = Q(pk__in=[])
+        for (produto_id, tamanho, cor), quantidade in quantidades.items():
+            if quantidade <= 0:
+                remover |= Q(produto_id=produto_id, tamanho=tamanho, cor=cor)
+
+        with transaction.atomic():
+            if gravar:
+                ItemCarrinho.objects.bulk_create(gravar, **_opcoes_upsert_itens())
+            if len(gravar) < len(quantidades):
+                self.itens.filter(remover).delete()
+            self.tocar()
+
+
+def _opcoes_upsert_itens():
+    """Parâmetros de bulk_create para upsert de ItemCarrinho no banco atual"""
+    opcoes = {'update_conflicts': True, 'update_fields': ['quantidade']}
+    if connection.features.supports_update_conflicts_with_target:
+        # MySQL resolve o conflito pela própria unique_together
+        opcoes['unique_fields'] = ['carrinho', 'produto', 'tamanho', 'cor']
+    return opcoes
 
 
 class ItemCarrinho(models.Model):
@@ -72,6 +202,15 @@ class ItemCarrinho(models.Model):
     def __str__(self):
         return f'{self.produto.nome} x{self.quantidade}'
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        Carrinho(pk=self.carrinho_id).tocar()
+
+    def delete(self, *args, **kwargs):
+        resultado = super().delete(*args, **kwargs)
+        Carrinho(pk=self.carrinho_id).tocar()
+        return resultado
+
     @property
     def preco_unitario(self):
         return self.produto.preco_final
@@ -83,3 +222,33 @@ class ItemCarrinho(models.Model):
     def verificar_estoque(self):
         """Verifica se há estoque suficiente"""
         return self.produto.estoque_disponivel() >= self.quantidade
+
+
+@receiver(user_logged_in)
+def mesclar_carrinho_ao_logar(sender, request, user, **kwargs):
+    """Incorpora o carrinho anônimo da sessão ao carrinho do usuário no login"""
+    if request is None or not hasattr(request, 'session'):
+        return
+
+    from .sessao import CarrinhoSessao
+
+    if settings.CART_SESSION_ID in request.session:
+        CarrinhoSessao(request.session).persistir(user)
+
+    carrinho_id = request.session.pop(CARRINHO_ID_SESSION_KEY, None)
+    if not carrinho_id:
+        return
+
+    carrinho_anonimo = Carrinho.objects.filter(pk=carrinho_id, usuario__isnull=True).first()
+    if carrinho_anonimo is None:
+        return
+
+    carrinho_usuario = Carrinho.objects.filter(usuario=user).first()
+    if carrinho_usuario is None:
+        # Sem carrinho prévio: basta transferir a posse do carrinho anônimo
+        carrinho_anonimo.usuario = user
+        carrinho_anonimo.session_key = None
+        carrinho_anonimo.save(update_fields=['usuario', 'session_key', 'data_atualizacao'])
+        return
+
+    carrinho_usuario.mesclar(carrinho_anonimo)
@@ -0,0 +1,293 @@
+"""
+Carrinho de visitantes anônimos guardado na própria sessão.
+
+Em vez de um registro Carrinho (e seus ItemCarrinho) por visitante, as linhas
+ficam serializadas de forma compacta em ``request.session[CART_SESSION_ID]``.
+Com ``SESSION_ENGINE`` em signed_cookies ou cache o carrinho anônimo não toca
+o banco; ele só é persistido quando o visitante faz login ou finaliza a compra.
+
+As classes abaixo expõem a mesma interface usada por views, templates e pelo
+context processor (itens, total_itens, subtotal, total, limpar, calcular_frete,
+obter_item, obter_ou_criar_item), então o restante do app não precisa saber
+qual backend está em uso.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+
+from produtos.models import Produto
+from .models import CARRINHO_ID_SESSION_KEY, Carrinho, CarrinhoCalculosMixin
+
+
+def carrinho_sessao_ativo():
+    """Indica se carrinhos anônimos devem ficar na sessão"""
+    return getattr(settings, 'CARRINHO_ANONIMO_EM_SESSAO', False)
+
+
+def obter_carrinho(request, criar=False):
+    """
+    Retorna o carrinho do request (usuário, sessão ou registro anônimo).
+
+    Sem ``criar=True`` nada é gravado e o retorno pode ser None.
+    """
+    if request.user.is_authenticated:
+        if criar:
+            carrinho, created = Carrinho.objects.get_or_create(usuario=request.user)
+            return carrinho
+        return Carrinho.objects.filter(usuario=request.user).first()
+
+    if carrinho_sessao_ativo():
+        if not criar and settings.CART_SESSION_ID not in request.session:
+            return None
+        return CarrinhoSessao(request.session)
+
+    session_key = request.session.session_key
+    if not criar:
+        if not session_key:
+            return None
+        return Carrinho.objects.filter(session_key=session_key).first()
+
+    if not session_key:
+        request.session.create()
+        session_key = request.session.session_key
+    carrinho, created = Carrinho.objects.get_or_create(session_key=session_key)
+    request.session[CARRINHO_ID_SESSION_KEY] = carrinho.pk
+    return carrinho
+
+
+class ItemCarrinhoSessao:
+    """Linha do carrinho de sessão com a interface de ItemCarrinho"""
+
+    def __init__(self, carrinho, id, produto_id, quantidade, tamanho='', cor='', produto=None):
+        self.carrinho = carrinho
+        self.id = id
+        self.produto_id = produto_id
+        self.quantidade = quantidade
+        self.tamanho = tamanho
+        self.cor = cor
+        self._produto = produto
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def carrinho_id(self):
+        return self.carrinho.pk
+
+    @property
+    def produto(self):
+        if self._produto is None:
+            self._produto = self.carrinho._produtos().get(self.produto_id)
+        return self._produto
+
+    def __str__(self):
+        return f'{self.produto.nome} x{self.quantidade}'
+
+    @property
+    def preco_unitario(self):
+        return self.produto.preco_final
+
+    @property
+    def total(self):
+        return self.preco_unitario * self.quantidade
+
+    def verificar_estoque(self):
+        """Verifica se há estoque suficiente"""
+        return self.produto.estoque_disponivel() >= self.quantidade
+
+    def serializar(self):
+        return [self.id, self.produto_id, self.quantidade, self.tamanho, self.cor]
+
+    def save(self):
+        self.carrinho._gravar_item(self)
+
+    def delete(self):
+        self.carrinho._remover_item(self)
+
+
+class ItensCarrinhoSessao:
+    """Substituto mínimo do related manager ``carrinho.itens``"""
+
+    def __init__(self, carrinho):
+        self.carrinho = carrinho
+
+    def all(self):
+        return self
+
+    def select_related(self, *campos):
+        # Os produtos já são carregados em lote por CarrinhoSessao._produtos
+        return self
+
+    def exists(self):
+        return bool(self.carrinho._linhas)
+
+    def count(self):
+        return len(self.carrinho._linhas)
+
+    def __iter__(self):
+        return iter(self.carrinho._itens())
+
+    def __len__(self):
+        return self.count()
+
+    def __bool__(self):
+        return self.exists()
+
+
+class CarrinhoSessao(CarrinhoCalculosMixin):
+    """
+    Carrinho anônimo serializado na sessão.
+
+    Formato armazenado: ``{'itens': [[id, produto_id, quantidade, tamanho, cor], ...],
+    'seq': próximo id, 'cep': cep_frete, 'frete': valor_frete}``.
+    """
+
+    pk = None
+    usuario = None
+
+    def __init__(self, session):
+        self.session = session
+        dados = session.get(settings.CART_SESSION_ID) or {}
+        self._linhas = [list(linha) for linha in dados.get('itens', [])]
+        self._seq = dados.get('seq', 1)
+        self.cep_frete = dados.get('cep', '')
+        self.valor_frete = Decimal(dados.get('frete', '0'))
+        self._cache_produtos = None
+        self._cache_itens = None
+
+    def __str__(self):
+        return 'Carrinho anônimo (sessão)'
+
+    @property
+    def session_key(self):
+        return self.session.session_key
+
+    @property
+    def itens(self):
+        return ItensCarrinhoSessao(self)
+
+    def _produtos(self):
+        """Carrega todos os produtos do carrinho em uma única consulta"""
+        if self._cache_produtos is None:
+            ids = {linha[1] for linha in self._linhas}
+            self._cache_produtos = Produto.objects.in_bulk(ids) if ids else {}
+        return self._cache_produtos
+
+    def _itens(self):
+        if self._cache_itens is None:
+            produtos = self._produtos()
+            # Linhas de produtos excluídos do catálogo são descartadas
+            self._cache_itens = [
+                ItemCarrinhoSessao(self, *linha, produto=produtos[linha[1]])
+                for linha in self._linhas
+                if linha[1] in produtos
+            ]
+        return self._cache_itens
+
+    def _invalidar(self, produtos=False):
+        self._cache_itens = None
+        if produtos:
+            self._cache_produtos = None
+
+    def save(self, *args, **kwargs):
+        self.session[settings.CART_SESSION_ID] = {
+            'itens': self._linhas,
+            'seq': self._seq,
+            'cep': self.cep_frete,
+            'frete': str(self.valor_frete),
+        }
+        self.session.modified = True
+
+    def delete(self):
+        self.session.pop(settings.CART_SESSION_ID, None)
+        self._linhas = []
+        self._invalidar(produtos=True)
+
+    def _gravar_item(self, item):
+        for linha in self._linhas:
+            if linha[0] == item.id:
+                linha[:] = item.serializar()
+                break
+        else:
+            self._linhas.append(item.serializar())
+            self._invalidar(produtos=True)
+        self._invalidar()
+        self.save()
+
+    def _remover_item(self, item):
+        self._linhas = [linha for linha in self._linhas if linha[0] != item.id]
+        self._invalidar()
+        self.save()
+
+    def limpar(self):
+        self._linhas = []
+        self.valor_frete = Decimal('0')
+        self.cep_frete = ''
+        self._invalidar(produtos=True)
+        self.save()
+
+    def obter_item(self, item_id):
+        """Retorna o item do carrinho ou None se não pertencer a ele"""
+        for item in self._itens():
+            if item.id == item_id:
+                return item
+        return None
+
+    def obter_ou_criar_item(self, produto, tamanho='', cor='', quantidade=1):
+        for item in self._itens():
+            if item.produto_id == produto.pk and item.tamanho == tamanho and item.cor == cor:
+                return item, False
+
+        item = ItemCarrinhoSessao(self, self._seq, produto.pk, quantidade, tamanho, cor, produto=produto)
+        self._seq += 1
+        item.save()
+        return item, True
+
+    def sincronizar_itens(self, quantidades):
+        """
+        Grava as quantidades finais de várias linhas de uma só vez.
+
+        ``quantidades`` mapeia (produto_id, tamanho, cor) -> quantidade; zero
+        remove a linha.
+        """
+        linhas = {(linha[1], linha[3], linha[4]): linha for linha in self._linhas}
+        for (produto_id, tamanho, cor), quantidade in quantidades.items():
+            linha = linhas.get((produto_id, tamanho, cor))
+            if linha is not None:
+                linha[2] = quantidade
+            elif quantidade > 0:
+                self._linhas.append([self._seq, produto_id, quantidade, tamanho, cor])
+                self._seq += 1
+
+        self._linhas = [linha for linha in self._linhas if linha[2] > 0]
+        self._invalidar(produtos=True)
+        self.save()
+
+    def persistir(self, usuario=None):
+        """
+        Grava o carrinho da sessão no banco e o remove da sessão.
+
+        Os itens são mesclados ao carrinho do usuário (ou, sem usuário, ao
+        carrinho anônimo cujo id está na sessão) e o Carrinho persistido é
+        retornado. O registro anônimo nunca é buscado por ``session_key``: com
+        signed_cookies ela é o próprio cookie assinado e muda a cada alteração.
+        """
+        if usuario is not None:
+            carrinho, created = Carrinho.objects.get_or_create(usuario=usuario)
+        else:
+            carrinho_id = self.session.get(CARRINHO_ID_SESSION_KEY)
+            carrinho = None
+            if carrinho_id:
+                carrinho = Carrinho.objects.filter(pk=carrinho_id, usuario__isnull=True).first()
+            if carrinho is None:
+                carrinho = Carrinho.objects.create()
+                self.session[CARRINHO_ID_SESSION_KEY] = carrinho.pk
+
+        if self.cep_frete and not carrinho.cep_frete:
+            carrinho.cep_frete = self.cep_frete
+            carrinho.valor_frete = self.valor_frete
+            carrinho.save(update_fields=['cep_frete', 'valor_frete', 'data_atualizacao'])
+
+        carrinho.mesclar(self)
+        return carrinho
@@ -0,0 +1,8 @@
+from django.core.management import call_command
+
+from agendador.registro import tarefa
+
+
+@tarefa('15 4 * * *', jitter=300)
+def limpar_carrinhos():
+    call_command('limpar_carrinhos', pausa=0.1)
@@ -1,3 +1,157 @@
-from django.test import TestCase
+from decimal import Decimal
+import json
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from fornecedores.models import Fornecedor
+from produtos.models import Categoria, Produto
+from .models import Carrinho, ItemCarrinho
+
+
+class CarrinhoTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nome='Lingerie')
+        fornecedor = Fornecedor.objects.create(nome='Fornecedor', email='fornecedor@example.com')
+        cls.produto = Produto.objects.create(
+            nome='Conjunto Renda', descricao='Conjunto', preco=Decimal('100.00'),
+            categoria=categoria, fornecedor=fornecedor, estoque_virtual=10,
+            tamanhos_disponiveis=['P', 'M'], cores_disponiveis=['Preto'],
+        )
+
+
+@override_settings(CARRINHO_ANONIMO_EM_SESSAO=True)
+class FinalizarCompraSessaoTest(CarrinhoTestMixin, TestCase):
+    def dados_checkout(self, **campos):
+        dados = {
+            'nome': 'Cliente Teste', 'email': 'cliente@example.com', 'telefone': '11999999999',
+            'cep': '01001-000', 'endereco': 'Praça da Sé', 'numero': '1', 'bairro': 'Sé',
+            'cidade': 'São Paulo', 'estado': 'SP', 'forma_pagamento': 'pix',
+        }
+        dados.update(campos)
+        return dados
+
+    def test_validacao_recusada_mantem_carrinho_na_sessao(self):
+        self.client.post(reverse('carrinho:adicionar', args=[self.produto.pk]), {'quantidade': 2, 'tamanho': 'M'})
+
+        resposta = self.client.post(reverse('carrinho:finalizar'), self.dados_checkout(bairro=''))
+
+        self.assertRedirects(resposta, reverse('carrinho:checkout'), fetch_redirect_response=False)
+        self.assertFalse(Carrinho.objects.exists())
+        linhas = self.client.session[settings.CART_SESSION_ID]['itens']
+        self.assertEqual([(linha[1], linha[2], linha[3]) for linha in linhas], [(self.produto.pk, 2, 'M')])
+
+    def test_finalizacao_persiste_o_carrinho(self):
+        self.client.post(reverse('carrinho:adicionar', args=[self.produto.pk]), {'quantidade': 1})
+
+        self.client.post(reverse('carrinho:finalizar'), self.dados_checkout())
+
+        self.assertNotIn(settings.CART_SESSION_ID, self.client.session)
+        self.assertEqual(Carrinho.objects.count(), 1)
+
+
+class AtualizarCarrinhoLoteTest(CarrinhoTestMixin, TestCase):
+    def setUp(self):
+        self.client.post(reverse('carrinho:adicionar', args=[self.produto.pk]), {'quantidade': 1, 'tamanho': 'P'})
+        self.item = ItemCarrinho.objects.get()
+
+    def enviar(self, operacoes):
+        return self.client.post(
+            reverse('carrinho:atualizar_lote'), json.dumps({'operacoes': operacoes}), content_type='application/json'
+        )
+
+    def linhas(self):
+        return set(ItemCarrinho.objects.values_list('produto_id', 'tamanho', 'cor', 'quantidade'))
+
+    def test_aplica_todas_as_operacoes(self):
+        resposta = self.enviar([
+            {'acao': 'update', 'item_id': self.item.pk, 'quantidade': 2},
+            {'acao': 'add', 'produto_id': self.produto.pk, 'quantidade': 3, 'tamanho': 'M', 'cor': 'Preto'},
+        ])
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['total_itens'], 5)
+        self.assertEqual(self.linhas(), {(self.produto.pk, 'P', '', 2), (self.produto.pk, 'M', 'Preto', 3)})
+
+    def test_tamanho_ou_cor_invalidos_nao_aplicam_nada(self):
+        for variacao in ({'tamanho': 'XG'}, {'tamanho': 'M', 'cor': 'Azul'}, {'tamanho': ['M']}):
+            with self.subTest(**{chave: str(valor) for chave, valor in variacao.items()}):
+                resposta = self.enviar([
+                    {'acao': 'update', 'item_id': self.item.pk, 'quantidade': 4},
+                    {'acao': 'add', 'produto_id': self.produto.pk, 'quantidade': 1, **variacao},
+                ])
+
+                self.assertEqual(resposta.status_code, 400)
+                self.assertEqual([erro.get('operacao') for erro in resposta.json()['erros']], [1])
+                self.assertEqual(self.linhas(), {(self.produto.pk, 'P', '', 1)})
+
+    def test_estoque_conta_todas_as_linhas_do_produto(self):
+        resposta = self.enviar([
+            {'acao': 'update', 'item_id': self.item.pk, 'quantidade': 6},
+            {'acao': 'add', 'produto_id': self.produto.pk, 'quantidade': 5, 'tamanho': 'M'},
+        ])
+
+        self.assertEqual(resposta.status_code, 400)
+        self.assertEqual(self.linhas(), {(self.produto.pk, 'P', '', 1)})
+
+
+class MesclarAoLogarTest(CarrinhoTestMixin, TestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_user('cliente', 'cliente@example.com', 'senha')
+        carrinho = Carrinho.objects.create(usuario=self.usuario)
+        ItemCarrinho.objects.create(carrinho=carrinho, produto=self.produto, tamanho='M', quantidade=2)
+
+    def adicionar(self, quantidade, tamanho):
+        self.client.post(
+            reverse('carrinho:adicionar', args=[self.produto.pk]), {'quantidade': quantidade, 'tamanho': tamanho}
+        )
+
+    def linhas_do_usuario(self):
+        return set(
+            ItemCarrinho.objects.filter(carrinho__usuario=self.usuario).values_list('tamanho', 'quantidade')
+        )
+
+    def test_soma_linhas_repetidas_e_remove_o_anonimo(self):
+        self.adicionar(3, 'M')
+        self.adicionar(1, 'P')
+        self.assertEqual(Carrinho.objects.filter(usuario__isnull=True).count(), 1)
+
+        self.client.login(username='cliente', password='senha')
+
+        self.assertEqual(self.linhas_do_usuario(), {('M', 5), ('P', 1)})
+        self.assertFalse(Carrinho.objects.filter(usuario__isnull=True).exists())
+        self.assertNotIn('carrinho_id', self.client.session)
+
+    def test_quantidade_somada_limitada_ao_estoque(self):
+        Produto.objects.filter(pk=self.produto.pk).update(estoque_virtual=4)
+        self.adicionar(3, 'M')
+
+        self.client.login(username='cliente', password='senha')
+
+        self.assertEqual(self.linhas_do_usuario(), {('M', 4)})
+
+    def test_sem_carrinho_previo_o_anonimo_passa_ao_usuario(self):
+        Carrinho.objects.filter(usuario=self.usuario).delete()
+        self.adicionar(1, 'P')
+        anonimo = Carrinho.objects.get()
+
+        self.client.login(username='cliente', password='senha')
+
+        anonimo.refresh_from_db()
+        self.assertEqual(anonimo.usuario, self.usuario)
+        self.assertEqual(self.linhas_do_usuario(), {('P', 1)})
+
+    @override_settings(CARRINHO_ANONIMO_EM_SESSAO=True)
+    def test_carrinho_de_sessao(self):
+        self.adicionar(3, 'M')
+        self.adicionar(1, 'P')
+        self.assertFalse(Carrinho.objects.filter(usuario__isnull=True).exists())
+
+        self.client.login(username='cliente', password='senha')
+
+        self.assertEqual(self.linhas_do_usuario(), {('M', 5), ('P', 1)})
+        self.assertNotIn(settings.CART_SESSION_ID, self.client.session)
+        self.assertFalse(Carrinho.objects.filter(usuario__isnull=True).exists())
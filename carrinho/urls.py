@@ -9,6 +9,7 @@ urlpatterns = [
     path('adicionar/<int:produto_id>/', views.AdicionarItemView.as_view(), name='adicionar'),
     path('remover/<int:item_id>/', views.RemoverItemView.as_view(), name='remover'),
     path('atualizar/<int:item_id>/', views.AtualizarItemView.as_view(), name='atualizar'),
+    path('atualizar-lote/', views.AtualizarCarrinhoLoteView.as_view(), name='atualizar_lote'),
     path('limpar/', views.LimparCarrinhoView.as_view(), name='limpar'),
     path('calcular-frete/', views.CalcularFreteView.as_view(), name='calcular_frete'),
     path('checkout/', views.CheckoutView.as_view(), name='checkout'),
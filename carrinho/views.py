@@ -7,24 +7,33 @@ from django.utils.decorators import method_decorator
 from django.views.decorators.http import require_POST
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.conf import settings
 import json
-from .models import Carrinho, ItemCarrinho
+import logging
+from asgiref.sync import sync_to_async
+from .models import ItemCarrinho
+from .sessao import CarrinhoSessao, obter_carrinho
+from produtos import metricas
 from produtos.models import Produto
+from frete.services import acotar_frete, cotar_frete
+from encanto_intimo.assincrono import ViewHibridaMixin
+
+logger = logging.getLogger(__name__)
 
 
 class CarrinhoMixin:
-    """Mixin para obter ou criar carrinho"""
+    """Mixin para obter o carrinho atual (criado apenas quando necessário)"""
     
-    def get_carrinho(self):
-        if self.request.user.is_authenticated:
-            carrinho, created = Carrinho.objects.get_or_create(usuario=self.request.user)
-        else:
-            session_key = self.request.session.session_key
-            if not session_key:
-                self.request.session.create()
-                session_key = self.request.session.session_key
-            carrinho, created = Carrinho.objects.get_or_create(session_key=session_key)
-        return carrinho
+    def get_carrinho(self, criar=False):
+        """
+        Retorna o carrinho do usuário ou do visitante anônimo.
+
+        Sem ``criar=True`` nenhum registro é gravado e o retorno pode ser None,
+        evitando um Carrinho vazio para cada visitante (ou robô) que só
+        consulta a página. Com CARRINHO_ANONIMO_EM_SESSAO o carrinho anônimo
+        é um CarrinhoSessao, com a mesma interface do modelo.
+        """
+        return obter_carrinho(self.request, criar=criar)
 
 
 class CarrinhoView(CarrinhoMixin, TemplateView):
@@ -34,11 +43,17 @@ class CarrinhoView(CarrinhoMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         carrinho = self.get_carrinho()
         context['carrinho'] = carrinho
+        if carrinho is None:
+            context['itens'] = ItemCarrinho.objects.none()
+            context['tem_itens'] = False
+            context['falta_frete_gratis'] = settings.FRETE_GRATIS_ACIMA
+            return context
+
         context['itens'] = carrinho.itens.select_related('produto').all()
         context['tem_itens'] = carrinho.itens.exists()
         
         # Calcular quanto falta para frete grátis
-        frete_gratis_limite = 199
+        frete_gratis_limite = settings.FRETE_GRATIS_ACIMA
         if carrinho.subtotal < frete_gratis_limite:
             context['falta_frete_gratis'] = frete_gratis_limite - carrinho.subtotal
         else:
@@ -65,16 +80,10 @@ class AdicionarItemView(CarrinhoMixin, View):
             messages.error(request, f'Estoque insuficiente para {produto.nome}. Disponível: {produto.estoque_disponivel()}')
             return redirect('produtos:produto_detail', slug=produto.slug)
         
-        carrinho = self.get_carrinho()
+        carrinho = self.get_carrinho(criar=True)
         
         # Verificar se o item já existe no carrinho
-        item, created = ItemCarrinho.objects.get_or_create(
-            carrinho=carrinho,
-            produto=produto,
-            tamanho=tamanho,
-            cor=cor,
-            defaults={'quantidade': quantidade}
-        )
+        item, created = carrinho.obter_ou_criar_item(produto, tamanho, cor, quantidade)
         
         if not created:
             nova_quantidade = item.quantidade + quantidade
@@ -90,6 +99,8 @@ class AdicionarItemView(CarrinhoMixin, View):
             item.quantidade = nova_quantidade
             item.save()
         
+        metricas.registrar('adicoes_carrinho', [produto.pk])
+        
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
                 'success': True,
@@ -106,11 +117,10 @@ class AdicionarItemView(CarrinhoMixin, View):
 class AtualizarItemView(CarrinhoMixin, View):
     
     def post(self, request, item_id):
-        item = get_object_or_404(ItemCarrinho, id=item_id)
-        
-        # Verificar se o item pertence ao carrinho do usuário
+        # Buscar o item apenas dentro do carrinho do usuário
         carrinho = self.get_carrinho()
-        if item.carrinho != carrinho:
+        item = carrinho.obter_item(item_id) if carrinho is not None else None
+        if item is None:
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({'success': False, 'message': 'Item não encontrado'})
             messages.error(request, 'Item não encontrado no seu carrinho')
@@ -161,11 +171,10 @@ class AtualizarItemView(CarrinhoMixin, View):
 class RemoverItemView(CarrinhoMixin, View):
     
     def post(self, request, item_id):
-        item = get_object_or_404(ItemCarrinho, id=item_id)
-        
-        # Verificar se o item pertence ao carrinho do usuário
+        # Buscar o item apenas dentro do carrinho do usuário
         carrinho = self.get_carrinho()
-        if item.carrinho != carrinho:
+        item = carrinho.obter_item(item_id) if carrinho is not None else None
+        if item is None:
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({'success': False, 'message': 'Item não encontrado'})
             messages.error(request, 'Item não encontrado no seu carrinho')
@@ -191,7 +200,8 @@ class LimparCarrinhoView(CarrinhoMixin, View):
     
     def post(self, request):
         carrinho = self.get_carrinho()
-        carrinho.limpar()
+        if carrinho is not None:
+            carrinho.limpar()
         
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
@@ -206,10 +216,197 @@ class LimparCarrinhoView(CarrinhoMixin, View):
         return redirect('carrinho:visualizar')
 
 
-class CalcularFreteView(CarrinhoMixin, View):
+class AtualizarCarrinhoLoteView(CarrinhoMixin, View):
+    """
+    Aplica várias alterações no carrinho em uma única requisição JSON.
+
+    Corpo esperado::
+
+        {"operacoes": [
+            {"acao": "add", "produto_id": 1, "quantidade": 2, "tamanho": "M", "cor": ""},
+            {"acao": "update", "item_id": 10, "quantidade": 3},
+            {"acao": "remove", "item_id": 11}
+        ]}
+
+    As operações são validadas juntas (estoque conferido em uma única
+    consulta) e gravadas em uma transação: ou todas são aplicadas, ou nenhuma.
+    """
+    LIMITE_OPERACOES = 50
+
+    def post(self, request):
+        try:
+            operacoes = json.loads(request.body).get('operacoes')
+        except (ValueError, AttributeError):
+            return self._erro('JSON inválido')
+
+        if not isinstance(operacoes, list) or not operacoes:
+            return self._erro('Informe a lista de operações')
+        if len(operacoes) > self.LIMITE_OPERACOES:
+            return self._erro(f'Máximo de {self.LIMITE_OPERACOES} operações por requisição')
+
+        criar = any(isinstance(op, dict) and op.get('acao') == 'add' for op in operacoes)
+        carrinho = self.get_carrinho(criar=criar)
+        itens = list(carrinho.itens.select_related('produto')) if carrinho is not None else []
+        itens_por_id = {item.id: item for item in itens}
+
+        originais = {(item.produto_id, item.tamanho, item.cor): item.quantidade for item in itens}
+        quantidades = dict(originais)
+        novas = {}  # variações adicionadas -> índice da operação
+        erros = []
+
+        for indice, op in enumerate(operacoes):
+            if not isinstance(op, dict):
+                erros.append({'operacao': indice, 'message': 'Operação inválida'})
+                continue
+            acao = op.get('acao')
+            try:
+                quantidade = int(op.get('quantidade', 1))
+            except (TypeError, ValueError):
+                erros.append({'operacao': indice, 'message': 'Quantidade inválida'})
+                continue
+
+            if acao == 'add':
+                try:
+                    produto_id = int(op.get('produto_id'))
+                except (TypeError, ValueError):
+                    erros.append({'operacao': indice, 'message': 'Produto inválido'})
+                    continue
+                if quantidade <= 0:
+                    erros.append({'operacao': indice, 'message': 'Quantidade inválida'})
+                    continue
+                variacao = [op.get('tamanho') or '', op.get('cor') or '']
+                if not all(isinstance(valor, str) for valor in variacao):
+                    erros.append({'operacao': indice, 'message': 'Tamanho ou cor inválidos'})
+                    continue
+                chave = (produto_id, *variacao)
+                quantidades[chave] = quantidades.get(chave, 0) + quantidade
+                novas[chave] = indice
+
+            elif acao in ('update', 'remove'):
+                try:
+                    item = itens_por_id.get(int(op.get('item_id')))
+                except (TypeError, ValueError):
+                    item = None
+                if item is None:
+                    erros.append({'operacao': indice, 'message': 'Item não encontrado'})
+                    continue
+                chave = (item.produto_id, item.tamanho, item.cor)
+                quantidades[chave] = 0 if acao == 'remove' else max(quantidade, 0)
+
+            else:
+                erros.append({'operacao': indice, 'message': f'Ação desconhecida: {acao}'})
+
+        if erros:
+            return self._erro('Nenhuma alteração aplicada', erros)
+
+        alteradas = {
+            chave: quantidade for chave, quantidade in quantidades.items()
+            if originais.get(chave, 0) != quantidade
+        }
+        if not alteradas:
+            return JsonResponse(self._resumo(carrinho, itens))
+
+        with transaction.atomic():
+            # Uma única consulta de estoque para todos os produtos alterados
+            produto_ids = {produto_id for produto_id, tamanho, cor in alteradas}
+            produtos = Produto.objects.filter(ativo=True).only(
+                'id', 'nome', 'estoque_virtual', 'vendas_simuladas', 'tamanhos_disponiveis', 'cores_disponiveis'
+            ).in_bulk(produto_ids)
+
+            # Tamanho e cor informados precisam existir no produto
+            for (produto_id, tamanho, cor), indice in novas.items():
+                produto = produtos.get(produto_id)
+                if produto is None or (produto_id, tamanho, cor) in originais:
+                    continue
+                if (tamanho and tamanho not in produto.tamanhos_disponiveis) or (
+                    cor and cor not in produto.cores_disponiveis
+                ):
+                    erros.append({'operacao': indice, 'message': f'Tamanho ou cor indisponível para {produto.nome}'})
+
+            solicitado = {}
+            for (produto_id, tamanho, cor), quantidade in quantidades.items():
+                if produto_id in produto_ids:
+                    solicitado[produto_id] = solicitado.get(produto_id, 0) + quantidade
+
+            for produto_id, quantidade in solicitado.items():
+                produto = produtos.get(produto_id)
+                if produto is None:
+                    if quantidade > 0:
+                        erros.append({'produto_id': produto_id, 'message': 'Produto indisponível'})
+                elif produto.estoque_disponivel() < quantidade:
+                    erros.append({
+                        'produto_id': produto_id,
+                        'message': f'Estoque insuficiente para {produto.nome}. Disponível: {produto.estoque_disponivel()}'
+                    })
+
+            if erros:
+                return self._erro('Nenhuma alteração aplicada', erros)
+
+            carrinho.sincronizar_itens(alteradas)
+
+        itens = list(carrinho.itens.select_related('produto'))
+        return JsonResponse(self._resumo(carrinho, itens))
+
+    def _erro(self, mensagem, erros=None):
+        return JsonResponse({'success': False, 'message': mensagem, 'erros': erros or []}, status=400)
+
+    def _resumo(self, carrinho, itens):
+        """Carrinho recalculado a partir dos itens já carregados"""
+        subtotal = sum((item.total for item in itens), 0)
+        valor_frete = carrinho.valor_frete if carrinho is not None else 0
+        return {
+            'success': True,
+            'message': 'Carrinho atualizado!',
+            'itens': [
+                {
+                    'id': item.id,
+                    'produto_id': item.produto_id,
+                    'nome': item.produto.nome,
+                    'quantidade': item.quantidade,
+                    'tamanho': item.tamanho,
+                    'cor': item.cor,
+                    'preco_unitario': float(item.preco_unitario),
+                    'item_total': float(item.total),
+                }
+                for item in itens
+            ],
+            'total_itens': sum(item.quantidade for item in itens),
+            'subtotal': float(subtotal),
+            'frete': float(valor_frete),
+            'total': float(subtotal + valor_frete),
+        }
+
+
+class CalcularFreteView(ViewHibridaMixin, CarrinhoMixin, View):
+    """
+    Cotação de frete do carrinho.
+    
+    Na versão assíncrona (ASGI) sessão, carrinho e gravação do frete escolhido
+    rodam em thread, e a cotação (frete.services.acotar_frete) é aguardada no
+    event loop, então provedores remotos lentos não prendem o worker.
+    """
+    
+    def _cep(self):
+        return self.request.POST.get('cep', '').replace('-', '').replace('.', '')
+    
+    def _medidas(self):
+        carrinho = self.get_carrinho()
+        if carrinho is None or not carrinho.itens.exists():
+            return None, None, None
+        return (carrinho, *carrinho.medidas_frete())
+    
+    def _aplicar_frete(self, carrinho, cep, cotacoes):
+        valor_frete = carrinho.calcular_frete(cep, provedor=self.request.POST.get('provedor'), cotacoes=cotacoes)
+        return JsonResponse({
+            'success': True,
+            'frete': float(valor_frete),
+            'total': float(carrinho.total),
+            'opcoes': [cotacao.como_dict() for cotacao in cotacoes],
+            'message': 'Frete calculado com sucesso!' if valor_frete > 0 else 'Frete grátis!'
+        })
     
     def post(self, request):
-        cep = request.POST.get('cep', '').replace('-', '').replace('.', '')
+        cep = self._cep()
         
         if not cep or len(cep) != 8:
             return JsonResponse({
@@ -217,23 +414,45 @@ class CalcularFreteView(CarrinhoMixin, View):
                 'message': 'CEP inválido'
             })
         
-        carrinho = self.get_carrinho()
+        carrinho, peso, subtotal = self._medidas()
         
-        if not carrinho.itens.exists():
+        if carrinho is None:
             return JsonResponse({
                 'success': False,
                 'message': 'Carrinho vazio'
             })
         
         try:
-            valor_frete = carrinho.calcular_frete(cep)
+            return self._aplicar_frete(carrinho, cep, cotar_frete(cep, peso, subtotal))
+        except Exception:
+            logger.exception(f'Erro ao calcular frete para o CEP {cep}')
             return JsonResponse({
-                'success': True,
-                'frete': float(valor_frete),
-                'total': float(carrinho.total),
-                'message': 'Frete calculado com sucesso!' if valor_frete > 0 else 'Frete grátis!'
+                'success': False,
+                'message': 'Erro ao calcular frete'
             })
-        except Exception as e:
+    
+    async def apost(self, request):
+        cep = self._cep()
+        
+        if not cep or len(cep) != 8:
+            return JsonResponse({
+                'success': False,
+                'message': 'CEP inválido'
+            })
+        
+        carrinho, peso, subtotal = await sync_to_async(self._medidas)()
+        
+        if carrinho is None:
+            return JsonResponse({
+                'success': False,
+                'message': 'Carrinho vazio'
+            })
+        
+        try:
+            cotacoes = await acotar_frete(cep, peso, subtotal)
+            return await sync_to_async(self._aplicar_frete)(carrinho, cep, cotacoes)
+        except Exception:
+            logger.exception(f'Erro ao calcular frete para o CEP {cep}')
             return JsonResponse({
                 'success': False,
                 'message': 'Erro ao calcular frete'
@@ -248,7 +467,7 @@ class CheckoutView(CarrinhoMixin, TemplateView):
         carrinho = self.get_carrinho()
         
         # Verificar se há itens no carrinho
-        if not carrinho.itens.exists():
+        if carrinho is None or not carrinho.itens.exists():
             messages.error(self.request, 'Seu carrinho está vazio!')
             return redirect('carrinho:visualizar')
         
@@ -276,7 +495,7 @@ class FinalizarCompraView(CarrinhoMixin, View):
         carrinho = self.get_carrinho()
         
         # Verificações básicas
-        if not carrinho.itens.exists():
+        if carrinho is None or not carrinho.itens.exists():
             messages.error(request, 'Seu carrinho está vazio!')
             return redirect('carrinho:visualizar')
         
@@ -308,6 +527,12 @@ class FinalizarCompraView(CarrinhoMixin, View):
                 messages.error(request, f'Campo {campo} é obrigatório!')
                 return redirect('carrinho:checkout')
         
+        if isinstance(carrinho, CarrinhoSessao):
+            # Carrinho de sessão só vai para o banco depois de validado: persistir
+            # o remove da sessão, então um redirect antes disso o esvaziaria
+            usuario = request.user if request.user.is_authenticated else None
+            carrinho = carrinho.persistir(usuario)
+        
         try:
             with transaction.atomic():
                 # Criar pedido (implementar na próxima etapa)
@@ -1,9 +1,9 @@
 from django.contrib import admin
-from django.db.models import Count, Sum
+from django.utils import timezone
 from django.utils.html import format_html
 from django.urls import reverse
-from django.utils.safestring import mark_safe
 from .models import Cliente
+from .services import recalcular_estatisticas
 
 
 @admin.register(Cliente)
@@ -22,7 +22,9 @@ class ClienteAdmin(admin.ModelAdmin):
         'total_pedidos_display',
         'valor_total_display',
         'ultimo_pedido_display',
+        'segmento',
         'ativo',
+        'aceita_newsletter',
         'data_cadastro'
     ]
     
@@ -31,6 +33,7 @@ class ClienteAdmin(admin.ModelAdmin):
         'estado',
         'aceita_newsletter',
         'aceita_promocoes',
+        'segmento',
         'data_cadastro',
         ('usuario', admin.EmptyFieldListFilter),  # Filtro para clientes com/sem usuário
     ]
@@ -52,6 +55,9 @@ class ClienteAdmin(admin.ModelAdmin):
         'total_pedidos_display',
         'valor_total_display',
         'ultimo_pedido_display',
+        'segmento',
+        'rfm_display',
+        'data_segmentacao',
         'endereco_completo_display'
     ]
     
@@ -91,7 +97,9 @@ class ClienteAdmin(admin.ModelAdmin):
             'fields': (
                 'total_pedidos_display',
                 'valor_total_display', 
-                'ultimo_pedido_display'
+                'ultimo_pedido_display',
+                ('segmento', 'rfm_display'),
+                'data_segmentacao'
             ),
             'classes': ('collapse',),
         }),
@@ -110,13 +118,17 @@ class ClienteAdmin(admin.ModelAdmin):
         'ativar_clientes',
         'desativar_clientes',
         'ativar_newsletter',
-        'desativar_newsletter'
+        'desativar_newsletter',
+        'recalcular_estatisticas_selecionados'
     ]
 
     def get_queryset(self, request):
-        """Otimiza as consultas incluindo dados relacionados"""
+        """
+        As estatísticas de compra são colunas do próprio cliente, então a
+        listagem inteira sai em uma consulta (mais o join com usuário)
+        """
         qs = super().get_queryset(request)
-        return qs.select_related('usuario').prefetch_related('pedidos')
+        return qs.select_related('usuario')
 
     # Métodos para exibição customizada
     def cidade_estado(self, obj):
@@ -126,6 +138,12 @@ class ClienteAdmin(admin.ModelAdmin):
     cidade_estado.short_description = "Cidade/Estado"
     cidade_estado.admin_order_field = 'cidade'
 
+    def tem_usuario_sistema(self, obj):
+        return obj.usuario_id is not None
+    tem_usuario_sistema.short_description = "Possui Conta"
+    tem_usuario_sistema.boolean = True
+    tem_usuario_sistema.admin_order_field = 'usuario'
+
     def total_pedidos_display(self, obj):
         total = obj.total_pedidos
         if total > 0:
@@ -136,26 +154,35 @@ class ClienteAdmin(admin.ModelAdmin):
             )
         return format_html('<span style="color: #999;">0 pedidos</span>')
     total_pedidos_display.short_description = "Total de Pedidos"
+    total_pedidos_display.admin_order_field = 'total_pedidos'
 
     def valor_total_display(self, obj):
         valor = obj.valor_total_compras
         if valor > 0:
             return format_html(
-                '<span style="color: #006600; font-weight: bold;">R$ {:.2f}</span>',
-                valor
+                '<span style="color: #006600; font-weight: bold;">R$ {}</span>',
+                f'{valor:.2f}'
             )
         return format_html('<span style="color: #999;">R$ 0,00</span>')
     valor_total_display.short_description = "Total Compras"
+    valor_total_display.admin_order_field = 'valor_total_compras'
 
     def ultimo_pedido_display(self, obj):
-        ultimo = obj.ultimo_pedido
+        ultimo = obj.data_ultimo_pedido
         if ultimo:
             return format_html(
                 '<span style="color: #0066cc;">{}</span>',
-                ultimo.strftime('%d/%m/%Y')
+                timezone.localtime(ultimo).strftime('%d/%m/%Y')
             )
         return format_html('<span style="color: #999;">Nunca</span>')
     ultimo_pedido_display.short_description = "Último Pedido"
+    ultimo_pedido_display.admin_order_field = 'data_ultimo_pedido'
+
+    def rfm_display(self, obj):
+        if obj.rfm_recencia is None:
+            return "-"
+        return f"R{obj.rfm_recencia} F{obj.rfm_frequencia} V{obj.rfm_valor}"
+    rfm_display.short_description = "Notas RFM"
 
     def endereco_completo_display(self, obj):
         endereco = obj.endereco_completo
@@ -188,6 +215,11 @@ class ClienteAdmin(admin.ModelAdmin):
         self.message_user(request, f'{updated} clientes desativaram newsletter.')
     desativar_newsletter.short_description = "📧 Desativar newsletter"
 
+    def recalcular_estatisticas_selecionados(self, request, queryset):
+        atualizados = recalcular_estatisticas(queryset)
+        self.message_user(request, f'Estatísticas de {atualizados} clientes recalculadas.')
+    recalcular_estatisticas_selecionados.short_description = "📊 Recalcular estatísticas de compra"
+
     class Media:
         css = {
             'all': ('admin/css/custom_admin.css',)
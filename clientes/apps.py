@@ -5,3 +5,6 @@ class ClientesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'clientes'
     verbose_name = 'Gestão de Clientes'
+
+    def ready(self):
+        from . import services  # noqa: F401
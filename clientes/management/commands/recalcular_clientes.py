@@ -0,0 +1,26 @@
+"""
+Recalcula as estatísticas de compra dos clientes a partir dos pedidos.
+
+Uso:
+    python manage.py recalcular_clientes
+    python manage.py recalcular_clientes --lote 200
+"""
+from django.core.management.base import BaseCommand
+
+from clientes.services import recalcular_estatisticas
+
+
+class Command(BaseCommand):
+    help = 'Recalcula total de pedidos, valor total e último pedido de cada cliente'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=500,
+            help='Quantidade de clientes atualizados por UPDATE',
+        )
+
+    def handle(self, *args, **options):
+        atualizados = recalcular_estatisticas(lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'Estatísticas de {atualizados} clientes recalculadas.'))
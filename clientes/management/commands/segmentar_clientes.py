@@ -0,0 +1,86 @@
+"""
+Segmentação RFM (recência, frequência, valor) dos clientes.
+
+Uso:
+    python manage.py segmentar_clientes
+    python manage.py segmentar_clientes --benchmark 1000000
+"""
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from clientes.segmentacao import SEGMENTOS, calcular_rfm, converter_pedidos, segmentar_clientes
+
+
+def linhas_sinteticas(quantidade, clientes, dias=730, semente=42):
+    """
+    Linhas no formato lido do banco (cliente_id, datetime, Decimal).
+
+    Os ids são sorteados com viés para os menores, assim poucos clientes
+    concentram muitos pedidos, como na base real.
+    """
+    gerador = np.random.default_rng(semente)
+    agora = time.time()
+    ids = (clientes * gerador.random(quantidade) ** 2).astype(np.int64) + 1
+    datas = agora - gerador.uniform(0, dias * 86400, quantidade)
+    valores = np.round(gerador.lognormal(5, 0.6, quantidade), 2)
+    linhas = [
+        (int(cliente_id), datetime.fromtimestamp(data, timezone.utc), Decimal(f'{valor:.2f}'))
+        for cliente_id, data, valor in zip(ids, datas, valores)
+    ]
+    return linhas, agora
+
+
+class Command(BaseCommand):
+    help = 'Calcula as notas RFM e o segmento de cada cliente a partir dos pedidos confirmados'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=10000,
+            help='Linhas lidas do banco por vez',
+        )
+        parser.add_argument(
+            '--benchmark',
+            type=int,
+            metavar='PEDIDOS',
+            help='Mede conversão e cálculo com pedidos sintéticos, sem tocar no banco',
+        )
+
+    def handle(self, *args, **options):
+        if options['benchmark']:
+            self.benchmark(options['benchmark'])
+            return
+
+        metricas = segmentar_clientes(lote=options['lote'])
+        tempos = metricas['tempos']
+        self.stdout.write(self.style.SUCCESS(
+            f"{metricas['clientes']} clientes segmentados a partir de {metricas['pedidos']} pedidos "
+            f"(leitura {tempos['leitura']:.2f}s, cálculo {tempos['calculo']:.2f}s, gravação {tempos['gravacao']:.2f}s)."
+        ))
+        for segmento, total in metricas['segmentos'].items():
+            self.stdout.write(f'  {segmento:12} {total}')
+
+    def benchmark(self, quantidade):
+        linhas, agora = linhas_sinteticas(quantidade, clientes=max(quantidade // 5, 1))
+
+        inicio = time.perf_counter()
+        pedidos = converter_pedidos(iter(linhas))
+        conversao = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        clientes, r, f, m, segmentos = calcular_rfm(pedidos, agora)
+        calculo = time.perf_counter() - inicio
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{quantidade} pedidos de {len(clientes)} clientes: '
+            f'conversão {conversao:.2f}s, cálculo {calculo:.2f}s.'
+        ))
+        self.stdout.write('A leitura do banco não está incluída; no uso real ela aparece como "leitura".')
+        contagem = np.bincount(segmentos, minlength=len(SEGMENTOS))
+        for segmento, total in zip(SEGMENTOS, contagem):
+            self.stdout.write(f'  {segmento:12} {total}')
@@ -0,0 +1,56 @@
+"""
+Vincula os pedidos antigos ao cadastro de clientes (Pedido.cliente).
+
+Uso:
+    python manage.py vincular_pedidos_clientes
+    python manage.py vincular_pedidos_clientes --criar --lote 500 --pausa 0.1
+"""
+from django.core.management.base import BaseCommand
+
+from clientes.services import vincular_pedidos
+from pedidos.models import Pedido
+
+
+class Command(BaseCommand):
+    help = 'Preenche o cliente dos pedidos sem cadastro vinculado, casando por usuário ou e-mail'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Quantidade de pedidos atualizados por transação',
+        )
+        parser.add_argument(
+            '--pausa',
+            type=float,
+            default=0.0,
+            help='Segundos de espera entre lotes',
+        )
+        parser.add_argument(
+            '--criar',
+            action='store_true',
+            help='Cria clientes para os e-mails sem cadastro usando os dados de entrega do pedido',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas conta os pedidos sem cliente',
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            total = Pedido.objects.filter(cliente__isnull=True).count()
+            self.stdout.write(f'{total} pedidos sem cliente vinculado.')
+            return
+
+        metricas = vincular_pedidos(
+            lote=options['lote'],
+            criar=options['criar'],
+            pausa=options['pausa'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{metricas['pedidos']} pedidos vinculados; "
+            f"{metricas['clientes_criados']} clientes criados; "
+            f"{metricas['sem_cliente']} pedidos continuam sem cliente."
+        ))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='aceita_promocoes',
+            field=models.BooleanField(default=False, verbose_name='Aceita Promoções'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='data_ultimo_pedido',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Último Pedido'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='total_pedidos',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Total de Pedidos'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='valor_total_compras',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Total Compras'),
+        ),
+    ]
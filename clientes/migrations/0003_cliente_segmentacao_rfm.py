@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0002_cliente_estatisticas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='data_segmentacao',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Data da Segmentação'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='rfm_frequencia',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='Nota Frequência'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='rfm_recencia',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='Nota Recência'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='rfm_valor',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='Nota Valor'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='segmento',
+            field=models.CharField(blank=True, choices=[('campeoes', 'Campeões'), ('fieis', 'Fiéis'), ('novos', 'Novos'), ('promissores', 'Promissores'), ('em_risco', 'Em Risco'), ('hibernando', 'Hibernando'), ('perdidos', 'Perdidos')], db_index=True, editable=False, max_length=20, verbose_name='Segmento'),
+        ),
+    ]
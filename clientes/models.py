@@ -6,10 +6,39 @@ class Cliente(models.Model):
     """
     Modelo para gerenciar informações de clientes
     """
+    ESTADO_CHOICES = [
+        ('AC', 'Acre'), ('AL', 'Alagoas'), ('AP', 'Amapá'), ('AM', 'Amazonas'),
+        ('BA', 'Bahia'), ('CE', 'Ceará'), ('DF', 'Distrito Federal'), ('ES', 'Espírito Santo'),
+        ('GO', 'Goiás'), ('MA', 'Maranhão'), ('MT', 'Mato Grosso'), ('MS', 'Mato Grosso do Sul'),
+        ('MG', 'Minas Gerais'), ('PA', 'Pará'), ('PB', 'Paraíba'), ('PR', 'Paraná'),
+        ('PE', 'Pernambuco'), ('PI', 'Piauí'), ('RJ', 'Rio de Janeiro'), ('RN', 'Rio Grande do Norte'),
+        ('RS', 'Rio Grande do Sul'), ('RO', 'Rondônia'), ('RR', 'Roraima'), ('SC', 'Santa Catarina'),
+        ('SP', 'São Paulo'), ('SE', 'Sergipe'), ('TO', 'Tocantins'),
+    ]
+
+    SEGMENTO_CHOICES = [
+        ('campeoes', 'Campeões'),
+        ('fieis', 'Fiéis'),
+        ('novos', 'Novos'),
+        ('promissores', 'Promissores'),
+        ('em_risco', 'Em Risco'),
+        ('hibernando', 'Hibernando'),
+        ('perdidos', 'Perdidos'),
+    ]
+
+    PREFERENCIA_COMUNICACAO_CHOICES = [
+        ('email', 'E-mail'),
+        ('whatsapp', 'WhatsApp'),
+        ('ambos', 'Ambos'),
+    ]
+
     # Informações pessoais básicas
     nome_completo = models.CharField(max_length=200, verbose_name='Nome Completo')
     email = models.EmailField(unique=True, verbose_name='E-mail')
     telefone = models.CharField(max_length=20, blank=True, verbose_name='Telefone')
+    whatsapp = models.CharField(max_length=20, blank=True, verbose_name='WhatsApp')
+    cpf = models.CharField(max_length=14, blank=True, verbose_name='CPF')
+    data_nascimento = models.DateField(blank=True, null=True, verbose_name='Data de Nascimento')
     
     # Relacionamento com User (opcional)
     usuario = models.OneToOneField(
@@ -23,14 +52,44 @@ class Cliente(models.Model):
     
     # Endereço básico
     endereco = models.CharField(max_length=255, verbose_name='Endereço')
+    numero = models.CharField(max_length=10, verbose_name='Número')
+    complemento = models.CharField(max_length=100, blank=True, verbose_name='Complemento')
+    bairro = models.CharField(max_length=100, verbose_name='Bairro')
     cidade = models.CharField(max_length=100, verbose_name='Cidade')
-    estado = models.CharField(max_length=2, verbose_name='Estado')
+    estado = models.CharField(max_length=2, choices=ESTADO_CHOICES, verbose_name='Estado')
     cep = models.CharField(max_length=9, verbose_name='CEP')
+
+    # Preferências
+    aceita_newsletter = models.BooleanField(default=False, verbose_name='Aceita Newsletter')
+    aceita_promocoes = models.BooleanField(default=False, verbose_name='Aceita Promoções')
+    preferencias_comunicacao = models.CharField(
+        max_length=20,
+        choices=PREFERENCIA_COMUNICACAO_CHOICES,
+        default='email',
+        verbose_name='Preferências de Comunicação'
+    )
+
+    # Estatísticas de compra (desnormalizadas, mantidas por clientes.services)
+    total_pedidos = models.PositiveIntegerField(default=0, editable=False, verbose_name='Total de Pedidos')
+    valor_total_compras = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, editable=False, verbose_name='Total Compras'
+    )
+    data_ultimo_pedido = models.DateTimeField(blank=True, null=True, editable=False, verbose_name='Último Pedido')
+
+    # Segmentação RFM (recência, frequência, valor), notas de 1 a 5 (clientes.segmentacao)
+    rfm_recencia = models.PositiveSmallIntegerField(blank=True, null=True, editable=False, verbose_name='Nota Recência')
+    rfm_frequencia = models.PositiveSmallIntegerField(blank=True, null=True, editable=False, verbose_name='Nota Frequência')
+    rfm_valor = models.PositiveSmallIntegerField(blank=True, null=True, editable=False, verbose_name='Nota Valor')
+    segmento = models.CharField(
+        max_length=20, choices=SEGMENTO_CHOICES, blank=True, db_index=True, editable=False, verbose_name='Segmento'
+    )
+    data_segmentacao = models.DateTimeField(blank=True, null=True, editable=False, verbose_name='Data da Segmentação')
     
     # Status e datas
     ativo = models.BooleanField(default=True, verbose_name='Ativo')
     data_cadastro = models.DateTimeField(auto_now_add=True, verbose_name='Data de Cadastro')
     data_atualizacao = models.DateTimeField(auto_now=True, verbose_name='Última Atualização')
+    observacoes = models.TextField(blank=True, verbose_name='Observações')
 
     class Meta:
         verbose_name = 'Cliente'
@@ -40,3 +99,18 @@ class Cliente(models.Model):
 
     def __str__(self):
         return self.nome_completo
+
+    @property
+    def endereco_completo(self):
+        if not self.endereco:
+            return ''
+        partes = [f'{self.endereco}, {self.numero}' if self.numero else self.endereco]
+        if self.complemento:
+            partes.append(self.complemento)
+        if self.bairro:
+            partes.append(self.bairro)
+        if self.cidade:
+            partes.append(f'{self.cidade}/{self.estado}' if self.estado else self.cidade)
+        if self.cep:
+            partes.append(f'CEP {self.cep}')
+        return ' - '.join(partes)
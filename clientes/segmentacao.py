@@ -0,0 +1,168 @@
+"""
+Segmentação RFM dos clientes (recência, frequência e valor).
+
+Os pedidos confirmados são lidos uma única vez, em streaming
+(``values_list(...).iterator()``), para um array NumPy; agregação por
+cliente, notas e segmentos são calculados de forma vetorizada, sem loop
+Python por cliente. Cada nota vai de 1 a 5 conforme a posição do cliente na
+distribuição (quintis): 5 é o quinto que comprou mais recentemente, que mais
+compra ou que mais gasta.
+
+Na gravação os clientes são agrupados pela combinação de notas (no máximo
+125 combinações) e cada grupo vira um UPDATE por lote de ids.
+"""
+import logging
+import time
+
+import numpy as np
+from django.db.models import Q
+from django.utils import timezone
+
+from pedidos.models import Pedido
+from pedidos.services import STATUS_COMPRA
+from .models import Cliente
+
+logger = logging.getLogger(__name__)
+
+TIPO_PEDIDO = np.dtype([('cliente', np.int64), ('data', np.float64), ('valor', np.float64)])
+
+# Índice retornado por classificar() -> código do segmento
+SEGMENTOS = [codigo for codigo, nome in Cliente.SEGMENTO_CHOICES]
+
+
+def converter_pedidos(linhas):
+    """Linhas (cliente_id, data_pedido, total) -> array (cliente, timestamp, valor)"""
+    return np.fromiter(
+        ((cliente_id, data.timestamp(), float(total)) for cliente_id, data, total in linhas),
+        dtype=TIPO_PEDIDO,
+    )
+
+
+def carregar_pedidos(lote=10000):
+    """Pedidos confirmados lidos em streaming"""
+    return converter_pedidos(
+        Pedido.objects.filter(cliente__isnull=False, status__in=STATUS_COMPRA)
+        .order_by()
+        .values_list('cliente_id', 'data_pedido', 'total')
+        .iterator(chunk_size=lote)
+    )
+
+
+def agregar(pedidos):
+    """Ids dos clientes e, para cada um, última compra, nº de pedidos e valor total"""
+    clientes, indice = np.unique(pedidos['cliente'], return_inverse=True)
+    frequencia = np.bincount(indice, minlength=len(clientes))
+    valor = np.bincount(indice, weights=pedidos['valor'], minlength=len(clientes))
+    ultima_compra = np.full(len(clientes), -np.inf)
+    np.maximum.at(ultima_compra, indice, pedidos['data'])
+    return clientes, ultima_compra, frequencia, valor
+
+
+def notas_quintil(valores):
+    """
+    Nota de 1 a 5 pela fração de clientes com valor estritamente menor.
+
+    Valores empatados recebem a mesma nota e o menor valor sempre recebe 1
+    (ex.: todos os clientes com um único pedido ficam com frequência 1).
+    """
+    abaixo = np.searchsorted(np.sort(valores), valores, side='left')
+    return np.minimum(abaixo * 5 // max(len(valores), 1) + 1, 5).astype(np.int16)
+
+
+def classificar(r, f, m):
+    """Índice em SEGMENTOS para cada combinação de notas"""
+    condicoes = [
+        (r >= 4) & (f >= 4) & (m >= 4),  # campeoes
+        (r >= 3) & (f >= 4),             # fieis
+        (r >= 4) & (f <= 1),             # novos
+        r >= 3,                          # promissores
+        (r <= 2) & (f >= 3),             # em_risco
+        r == 2,                          # hibernando
+    ]
+    return np.select(condicoes, np.arange(len(condicoes)), default=len(condicoes))
+
+
+def calcular_rfm(pedidos, agora):
+    """
+    Notas e segmento de cada cliente presente em ``pedidos``.
+
+    ``agora`` é um timestamp (segundos). Retorna os arrays
+    (clientes, recencia, frequencia, valor, segmento).
+    """
+    clientes, ultima_compra, frequencia, valor = agregar(pedidos)
+    r = notas_quintil(ultima_compra - agora)  # compra mais recente -> maior nota
+    f = notas_quintil(frequencia)
+    m = notas_quintil(valor)
+    return clientes, r, f, m, classificar(r, f, m)
+
+
+def gravar_segmentos(clientes, r, f, m, segmentos, agora, lote=1000):
+    """Grava as notas agrupando clientes com a mesma combinação. Retorna clientes por segmento."""
+    codigos = r.astype(np.int32) * 100 + f * 10 + m
+    ordem = np.argsort(codigos, kind='stable')
+    unicos, inicios = np.unique(codigos[ordem], return_index=True)
+
+    por_segmento = dict.fromkeys(SEGMENTOS, 0)
+    for inicio, ids in zip(inicios, np.split(clientes[ordem], inicios[1:])):
+        posicao = ordem[inicio]
+        segmento = SEGMENTOS[segmentos[posicao]]
+        por_segmento[segmento] += len(ids)
+        valores = {
+            'rfm_recencia': int(r[posicao]),
+            'rfm_frequencia': int(f[posicao]),
+            'rfm_valor': int(m[posicao]),
+            'segmento': segmento,
+            'data_segmentacao': agora,
+        }
+        for parte in range(0, len(ids), lote):
+            Cliente.objects.filter(pk__in=ids[parte:parte + lote].tolist()).update(**valores)
+
+    # Clientes que deixaram de ter pedidos confirmados perdem o segmento
+    Cliente.objects.filter(
+        Q(data_segmentacao__lt=agora) | Q(data_segmentacao__isnull=True)
+    ).exclude(segmento='').update(
+        rfm_recencia=None, rfm_frequencia=None, rfm_valor=None, segmento='', data_segmentacao=agora,
+    )
+    return por_segmento
+
+
+def segmentar_clientes(lote=10000):
+    """
+    Recalcula a segmentação RFM de todos os clientes.
+
+    Retorna as métricas da execução, incluindo o tempo de cada etapa.
+    """
+    agora = timezone.now()
+    tempos = {}
+
+    inicio = time.perf_counter()
+    pedidos = carregar_pedidos(lote)
+    tempos['leitura'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resultado = calcular_rfm(pedidos, agora.timestamp())
+    tempos['calculo'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    por_segmento = gravar_segmentos(*resultado, agora)
+    tempos['gravacao'] = time.perf_counter() - inicio
+
+    metricas = {
+        'pedidos': len(pedidos),
+        'clientes': len(resultado[0]),
+        'segmentos': por_segmento,
+        'tempos': tempos,
+    }
+    logger.info(
+        f"Segmentação RFM: {metricas['pedidos']} pedidos, {metricas['clientes']} clientes em "
+        f"{sum(tempos.values()):.2f}s"
+    )
+    return metricas
+
+
+def clientes_para_promocao(*segmentos):
+    """Clientes ativos que aceitam promoções, opcionalmente filtrados por segmento"""
+    clientes = Cliente.objects.filter(ativo=True, aceita_promocoes=True)
+    if segmentos:
+        clientes = clientes.filter(segmento__in=segmentos)
+    return clientes
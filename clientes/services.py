@@ -0,0 +1,202 @@
+"""
+Estatísticas de compra dos clientes.
+
+``total_pedidos``, ``valor_total_compras`` e ``data_ultimo_pedido`` ficam
+gravados no próprio Cliente, assim a listagem do admin sai em uma consulta e
+pode ser ordenada por essas colunas. Os valores são recalculados a partir dos
+pedidos sempre que um pedido é confirmado, cancelado ou devolvido, e a tarefa
+noturna (clientes.tarefas) corrige qualquer divergência.
+
+Pedidos novos recebem o cliente no checkout (``obter_ou_criar_cliente``);
+pedidos antigos são vinculados por ``vincular_pedidos``, casando pelo usuário
+e, na falta dele, pelo e-mail informado na compra.
+"""
+import logging
+import time
+
+from django.db import transaction
+from django.db.models import F, Func, OuterRef, Subquery, Value
+from django.db.models import DateTimeField, DecimalField, IntegerField
+from django.db.models.functions import Coalesce, Lower
+
+from pedidos.models import Pedido
+from pedidos.services import STATUS_COMPRA, ao_transicionar
+from .models import Cliente
+
+logger = logging.getLogger(__name__)
+
+# Campo do Cliente -> campo do Pedido usado para preencher o cadastro
+CAMPOS_CADASTRO = {
+    'nome_completo': 'nome_cliente',
+    'telefone': 'telefone_cliente',
+    'cep': 'cep',
+    'endereco': 'endereco',
+    'numero': 'numero',
+    'complemento': 'complemento',
+    'bairro': 'bairro',
+    'cidade': 'cidade',
+    'estado': 'estado',
+}
+
+
+def normalizar_email(email):
+    return (email or '').strip().lower()
+
+
+def _dados_cadastro(dados):
+    return {campo: dados.get(origem) or '' for campo, origem in CAMPOS_CADASTRO.items()}
+
+
+def obter_ou_criar_cliente(usuario, dados):
+    """
+    Cliente de um novo pedido: o vinculado ao usuário, o de mesmo e-mail ou
+    um cadastro novo com os dados de entrega (``dados`` usa os nomes de
+    campo do Pedido).
+    """
+    cliente = None
+    if usuario is not None:
+        cliente = Cliente.objects.filter(usuario=usuario).first()
+
+    email = normalizar_email(dados.get('email_cliente'))
+    if cliente is None:
+        cliente = Cliente.objects.filter(email__iexact=email).first()
+    if cliente is None:
+        cliente, criado = Cliente.objects.get_or_create(
+            email=email,
+            defaults={'usuario': usuario, **_dados_cadastro(dados)},
+        )
+    return cliente
+
+
+def _pedidos_do_cliente():
+    return Pedido.objects.filter(cliente=OuterRef('pk'), status__in=STATUS_COMPRA).order_by()
+
+
+def _agregado(funcao, campo, output_field):
+    """Subconsulta escalar (COUNT/SUM/MAX) sobre os pedidos do cliente"""
+    return Subquery(
+        _pedidos_do_cliente()
+        .annotate(valor=Func(F(campo), function=funcao, output_field=output_field))
+        .values('valor')[:1],
+        output_field=output_field,
+    )
+
+
+def expressoes_estatisticas():
+    """Expressões que calculam as colunas de estatística direto no banco"""
+    decimal = DecimalField(max_digits=12, decimal_places=2)
+    return {
+        'total_pedidos': Coalesce(_agregado('COUNT', 'id', IntegerField()), Value(0)),
+        'valor_total_compras': Coalesce(_agregado('SUM', 'total', decimal), Value(0), output_field=decimal),
+        'data_ultimo_pedido': _agregado('MAX', 'data_pedido', DateTimeField()),
+    }
+
+
+def recalcular_estatisticas(clientes=None, lote=500):
+    """
+    Regrava as estatísticas de compra a partir dos pedidos.
+
+    Cada lote é um único UPDATE com subconsultas correlacionadas; nenhum
+    pedido é carregado em Python. Retorna a quantidade de clientes atualizados.
+    """
+    if clientes is None:
+        clientes = Cliente.objects.all()
+    ids = list(clientes.order_by('pk').values_list('pk', flat=True))
+
+    atualizados = 0
+    for inicio in range(0, len(ids), lote):
+        atualizados += Cliente.objects.filter(pk__in=ids[inicio:inicio + lote]).update(**expressoes_estatisticas())
+    return atualizados
+
+
+def _criar_clientes(pendentes, por_usuario, por_email):
+    """
+    Cadastra um cliente para cada e-mail ainda sem cadastro, com os dados
+    do primeiro pedido do lote. Retorna quantos foram criados.
+    """
+    novos = {}
+    usuarios = set()
+    for dados in pendentes:
+        email = normalizar_email(dados['email_cliente'])
+        if not email or email in novos:
+            continue
+        usuario_id = dados['usuario_id']
+        if usuario_id in por_usuario or usuario_id in usuarios:
+            usuario_id = None
+        usuarios.add(usuario_id)
+        novos[email] = Cliente(email=email, usuario_id=usuario_id, **_dados_cadastro(dados))
+
+    Cliente.objects.bulk_create(novos.values())
+    # Nem todo banco devolve as chaves do bulk_create (MySQL)
+    for email, pk, usuario_id in Cliente.objects.filter(email__in=novos).values_list('email', 'pk', 'usuario_id'):
+        por_email[email] = pk
+        if usuario_id:
+            por_usuario[usuario_id] = pk
+    return len(novos)
+
+
+def vincular_pedidos(lote=1000, criar=False, pausa=0.0):
+    """
+    Preenche ``Pedido.cliente`` dos pedidos antigos.
+
+    O cliente é o vinculado ao usuário do pedido ou, na falta dele, o de
+    mesmo e-mail. Com ``criar=True`` os e-mails sem cadastro ganham um
+    Cliente com os dados de entrega do pedido. Os pedidos são percorridos
+    em lotes por chave primária, cada lote em uma transação curta com um
+    único bulk_update. Ao final as estatísticas dos clientes afetados são
+    recalculadas. Retorna as métricas da execução.
+    """
+    por_usuario = dict(Cliente.objects.filter(usuario__isnull=False).values_list('usuario_id', 'pk'))
+    por_email = dict(Cliente.objects.values_list(Lower('email'), 'pk'))
+    campos = ['pk', 'usuario_id', 'email_cliente', *CAMPOS_CADASTRO.values()]
+
+    def localizar(dados):
+        return por_usuario.get(dados['usuario_id']) or por_email.get(normalizar_email(dados['email_cliente']))
+
+    metricas = {'pedidos': 0, 'clientes_criados': 0, 'sem_cliente': 0}
+    afetados = set()
+    ultimo_id = 0
+    while True:
+        linhas = list(
+            Pedido.objects.filter(cliente__isnull=True, pk__gt=ultimo_id)
+            .order_by('pk')
+            .values(*campos)[:lote]
+        )
+        if not linhas:
+            break
+        ultimo_id = linhas[-1]['pk']
+
+        with transaction.atomic():
+            if criar:
+                pendentes = [dados for dados in linhas if not localizar(dados)]
+                if pendentes:
+                    metricas['clientes_criados'] += _criar_clientes(pendentes, por_usuario, por_email)
+
+            vinculos = []
+            for dados in linhas:
+                cliente_id = localizar(dados)
+                if cliente_id:
+                    vinculos.append(Pedido(pk=dados['pk'], cliente_id=cliente_id))
+                    afetados.add(cliente_id)
+            Pedido.objects.bulk_update(vinculos, ['cliente'])
+
+        metricas['pedidos'] += len(vinculos)
+        metricas['sem_cliente'] += len(linhas) - len(vinculos)
+        if pausa:
+            time.sleep(pausa)
+
+    if afetados:
+        recalcular_estatisticas(Cliente.objects.filter(pk__in=afetados))
+    logger.info(
+        f"{metricas['pedidos']} pedidos vinculados a clientes; "
+        f"{metricas['clientes_criados']} clientes criados; {metricas['sem_cliente']} sem cliente"
+    )
+    return metricas
+
+
+@ao_transicionar('confirmado', 'cancelado', 'devolvido')
+def atualizar_estatisticas_cliente(pedido, anterior, novo):
+    if not pedido.cliente_id or (anterior == 'pendente' and novo == 'cancelado'):
+        # Pedido sem cadastro ou nunca confirmado não altera as estatísticas
+        return
+    recalcular_estatisticas(Cliente.objects.filter(pk=pedido.cliente_id))
@@ -0,0 +1,14 @@
+from agendador.registro import tarefa
+from .segmentacao import segmentar_clientes
+from .services import recalcular_estatisticas
+
+
+@tarefa('30 3 * * *', jitter=300)
+def recalcular_clientes():
+    return f'{recalcular_estatisticas()} clientes recalculados'
+
+
+@tarefa('0 5 * * *', jitter=300)
+def segmentacao_rfm():
+    metricas = segmentar_clientes()
+    return f"{metricas['clientes']} clientes segmentados a partir de {metricas['pedidos']} pedidos"
@@ -0,0 +1,36 @@
+from django.contrib import admin
+
+from .models import Cupom, UsoCupom
+
+
+@admin.register(Cupom)
+class CupomAdmin(admin.ModelAdmin):
+    list_display = ['codigo', 'tipo_desconto', 'valor', 'subtotal_minimo', 'data_inicio', 'data_fim', 'usos', 'limite_uso', 'ativo']
+    list_filter = ['ativo', 'tipo_desconto']
+    search_fields = ['codigo', 'descricao']
+    filter_horizontal = ['produtos', 'categorias']
+    readonly_fields = ['usos', 'data_criacao']
+
+    fieldsets = (
+        ('Desconto', {
+            'fields': ('codigo', 'descricao', 'tipo_desconto', 'valor', 'ativo')
+        }),
+        ('Vigência e Limites', {
+            'fields': ('data_inicio', 'data_fim', 'subtotal_minimo', 'limite_uso', 'limite_por_usuario', 'usos')
+        }),
+        ('Abrangência', {
+            'description': 'Sem produtos nem categorias, o desconto vale para o carrinho inteiro.',
+            'fields': ('produtos', 'categorias')
+        }),
+    )
+
+
+@admin.register(UsoCupom)
+class UsoCupomAdmin(admin.ModelAdmin):
+    list_display = ['cupom', 'usuario', 'usos']
+    search_fields = ['cupom__codigo', 'usuario__username', 'usuario__email']
+    list_select_related = ['cupom', 'usuario']
+    readonly_fields = ['cupom', 'usuario', 'usos']
+
+    def has_add_permission(self, request):
+        return False
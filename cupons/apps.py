@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class CuponsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "cupons"
+    verbose_name = "Cupons de Desconto"
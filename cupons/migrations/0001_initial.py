@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('produtos', '0006_promocoes_preco_final'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cupom',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.CharField(help_text='Guardado em maiúsculas', max_length=30, unique=True, verbose_name='Código')),
+                ('descricao', models.CharField(blank=True, max_length=200, verbose_name='Descrição')),
+                ('tipo_desconto', models.CharField(choices=[('percentual', 'Percentual'), ('valor_fixo', 'Valor Fixo')], default='percentual', max_length=20, verbose_name='Tipo de Desconto')),
+                ('valor', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Valor do Desconto')),
+                ('subtotal_minimo', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Subtotal Mínimo')),
+                ('data_inicio', models.DateTimeField(verbose_name='Início')),
+                ('data_fim', models.DateTimeField(blank=True, null=True, verbose_name='Fim')),
+                ('limite_uso', models.PositiveIntegerField(blank=True, help_text='Vazio = ilimitado', null=True, verbose_name='Limite de Usos')),
+                ('limite_por_usuario', models.PositiveIntegerField(blank=True, default=1, help_text='Vazio = ilimitado', null=True, verbose_name='Limite por Usuário')),
+                ('usos', models.PositiveIntegerField(default=0, editable=False, verbose_name='Usos')),
+                ('ativo', models.BooleanField(default=True, verbose_name='Ativo')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('categorias', models.ManyToManyField(blank=True, related_name='cupons', to='produtos.categoria', verbose_name='Categorias')),
+                ('produtos', models.ManyToManyField(blank=True, related_name='cupons', to='produtos.produto', verbose_name='Produtos')),
+            ],
+            options={
+                'verbose_name': 'Cupom',
+                'verbose_name_plural': 'Cupons',
+                'ordering': ['-data_criacao'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UsoCupom',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('usos', models.PositiveIntegerField(default=0, verbose_name='Usos')),
+                ('cupom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usos_usuarios', to='cupons.cupom', verbose_name='Cupom')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usos_cupons', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Uso de Cupom',
+                'verbose_name_plural': 'Usos de Cupons',
+                'unique_together': {('cupom', 'usuario')},
+            },
+        ),
+    ]
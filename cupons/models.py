@@ -0,0 +1,66 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+from produtos.models import Categoria, Produto
+
+
+class Cupom(models.Model):
+    """
+    Código de desconto informado no checkout.
+
+    Sem produtos nem categorias o desconto vale para o carrinho inteiro; com
+    eles, só para as linhas alcançadas. ``usos`` e os contadores por usuário
+    (UsoCupom) são incrementados com UPDATE condicional (cupons.services).
+    """
+    TIPO_DESCONTO_CHOICES = [
+        ('percentual', 'Percentual'),
+        ('valor_fixo', 'Valor Fixo'),
+    ]
+
+    codigo = models.CharField(max_length=30, unique=True, verbose_name="Código", help_text="Guardado em maiúsculas")
+    descricao = models.CharField(max_length=200, blank=True, verbose_name="Descrição")
+    tipo_desconto = models.CharField(max_length=20, choices=TIPO_DESCONTO_CHOICES, default='percentual', verbose_name="Tipo de Desconto")
+    valor = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Valor do Desconto")
+
+    # Regras
+    subtotal_minimo = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Subtotal Mínimo")
+    produtos = models.ManyToManyField(Produto, blank=True, related_name='cupons', verbose_name="Produtos")
+    categorias = models.ManyToManyField(Categoria, blank=True, related_name='cupons', verbose_name="Categorias")
+    data_inicio = models.DateTimeField(verbose_name="Início")
+    data_fim = models.DateTimeField(blank=True, null=True, verbose_name="Fim")
+    limite_uso = models.PositiveIntegerField(blank=True, null=True, verbose_name="Limite de Usos", help_text="Vazio = ilimitado")
+    limite_por_usuario = models.PositiveIntegerField(blank=True, null=True, default=1, verbose_name="Limite por Usuário", help_text="Vazio = ilimitado")
+
+    usos = models.PositiveIntegerField(default=0, editable=False, verbose_name="Usos")
+    ativo = models.BooleanField(default=True, verbose_name="Ativo")
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
+
+    class Meta:
+        verbose_name = "Cupom"
+        verbose_name_plural = "Cupons"
+        ordering = ['-data_criacao']
+
+    def __str__(self):
+        return self.codigo
+
+    def save(self, *args, **kwargs):
+        self.codigo = self.codigo.strip().upper()
+        super().save(*args, **kwargs)
+
+    def em_vigor(self, momento):
+        return self.ativo and self.data_inicio <= momento and (self.data_fim is None or momento < self.data_fim)
+
+
+class UsoCupom(models.Model):
+    """Quantas vezes cada usuário usou o cupom (pedidos não cancelados)"""
+    cupom = models.ForeignKey(Cupom, on_delete=models.CASCADE, related_name='usos_usuarios', verbose_name="Cupom")
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='usos_cupons', verbose_name="Usuário")
+    usos = models.PositiveIntegerField(default=0, verbose_name="Usos")
+
+    class Meta:
+        verbose_name = "Uso de Cupom"
+        verbose_name_plural = "Usos de Cupons"
+        unique_together = ('cupom', 'usuario')
+
+    def __str__(self):
+        return f'{self.cupom} - {self.usuario}: {self.usos}'
@@ -0,0 +1,140 @@
+"""
+Motor de cupons de desconto.
+
+A avaliação não consulta o banco por linha: ``carregar_cupom`` traz o cupom
+e os ids de produtos/categorias da abrangência (três consultas), e
+``avaliar`` percorre uma única vez as linhas do carrinho já carregadas
+(produto_id, categoria_id, total), somando subtotal e valor elegível ao
+mesmo tempo.
+
+O consumo do cupom (``registrar_uso``) roda na transação que cria o pedido.
+Os contadores, geral e por usuário, sobem com ``UPDATE ... SET usos = usos + 1
+WHERE usos < limite``: com muitos pedidos simultâneos, só passa quem ainda
+cabe no limite, sem SELECT FOR UPDATE e sem ler o contador antes. O
+cancelamento do pedido devolve o uso (``liberar_usos``) na mesma transação
+que muda o status, como a devolução de estoque.
+"""
+from collections import Counter
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Cupom, UsoCupom
+
+
+CENTAVO = Decimal('0.01')
+
+
+class CupomInvalido(Exception):
+    """O cupom não existe ou não vale para o carrinho/usuário"""
+
+
+def normalizar_codigo(codigo):
+    return (codigo or '').strip().upper()
+
+
+def carregar_cupom(codigo):
+    """Cupom pelo código, com os ids da abrangência em ``ids_produtos`` e ``ids_categorias``"""
+    cupom = Cupom.objects.filter(codigo=normalizar_codigo(codigo)).first()
+    if cupom is None:
+        raise CupomInvalido('Cupom não encontrado.')
+    cupom.ids_produtos = set(cupom.produtos.through.objects.filter(cupom=cupom).values_list('produto_id', flat=True))
+    cupom.ids_categorias = set(cupom.categorias.through.objects.filter(cupom=cupom).values_list('categoria_id', flat=True))
+    return cupom
+
+
+def linhas_carrinho(itens):
+    """(produto_id, categoria_id, total) de itens com o produto já carregado"""
+    return [(item.produto_id, item.produto.categoria_id, item.total) for item in itens]
+
+
+def usos_do_usuario(cupom, usuario):
+    if usuario is None or not usuario.is_authenticated:
+        return 0
+    return UsoCupom.objects.filter(cupom=cupom, usuario=usuario).values_list('usos', flat=True).first() or 0
+
+
+def avaliar(cupom, linhas, usos_usuario=0, momento=None):
+    """
+    Desconto do cupom para as linhas do carrinho.
+
+    Levanta CupomInvalido com a mensagem para o cliente quando alguma regra
+    não é atendida.
+    """
+    momento = momento or timezone.now()
+    if not cupom.em_vigor(momento):
+        raise CupomInvalido('Este cupom não está em vigor.')
+    if cupom.limite_uso is not None and cupom.usos >= cupom.limite_uso:
+        raise CupomInvalido('Este cupom esgotou.')
+    if cupom.limite_por_usuario is not None and usos_usuario >= cupom.limite_por_usuario:
+        raise CupomInvalido('Você já usou este cupom o máximo de vezes permitido.')
+
+    restrito = bool(cupom.ids_produtos or cupom.ids_categorias)
+    subtotal = elegivel = Decimal('0')
+    for produto_id, categoria_id, total in linhas:
+        subtotal += total
+        if not restrito or produto_id in cupom.ids_produtos or categoria_id in cupom.ids_categorias:
+            elegivel += total
+
+    if subtotal < cupom.subtotal_minimo:
+        raise CupomInvalido(f'Este cupom exige compras a partir de R$ {cupom.subtotal_minimo}.')
+    if not elegivel:
+        raise CupomInvalido('Nenhum produto do carrinho é válido para este cupom.')
+
+    if cupom.tipo_desconto == 'percentual':
+        desconto = elegivel * min(cupom.valor, Decimal('100')) / 100
+    else:
+        desconto = cupom.valor
+    return min(desconto, elegivel).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+
+
+def aplicar_cupom(codigo, itens, usuario=None):
+    """Valida o código para os itens do carrinho e devolve (cupom, desconto)"""
+    cupom = carregar_cupom(codigo)
+    return cupom, avaliar(cupom, linhas_carrinho(itens), usos_do_usuario(cupom, usuario))
+
+
+def registrar_uso(cupom, usuario):
+    """
+    Consome um uso do cupom; deve rodar na transação que cria o pedido.
+
+    Levanta CupomInvalido se o limite geral ou o do usuário foi atingido
+    entre a avaliação e a gravação; a transação é desfeita junto.
+    """
+    consumido = Cupom.objects.filter(pk=cupom.pk).filter(
+        Q(limite_uso__isnull=True) | Q(usos__lt=F('limite_uso'))
+    ).update(usos=F('usos') + 1)
+    if not consumido:
+        raise CupomInvalido('Este cupom esgotou.')
+
+    UsoCupom.objects.bulk_create([UsoCupom(cupom=cupom, usuario=usuario)], ignore_conflicts=True)
+    usos = UsoCupom.objects.filter(cupom=cupom, usuario=usuario)
+    if cupom.limite_por_usuario is not None:
+        usos = usos.filter(usos__lt=cupom.limite_por_usuario)
+    if not usos.update(usos=F('usos') + 1):
+        raise CupomInvalido('Você já usou este cupom o máximo de vezes permitido.')
+
+
+def liberar_usos(pedidos):
+    """
+    Devolve os usos de cupom de pedidos cancelados.
+
+    ``pedidos`` é uma sequência de (cupom_id, usuario_id); os sem cupom são
+    ignorados. Deve rodar na transação que cancela os pedidos
+    (pedidos.services), para o contador não divergir se o processo cair.
+    """
+    por_cupom = Counter()
+    por_usuario = Counter()
+    for cupom_id, usuario_id in pedidos:
+        if cupom_id:
+            por_cupom[cupom_id] += 1
+            por_usuario[cupom_id, usuario_id] += 1
+
+    for cupom_id, usos in por_cupom.items():
+        Cupom.objects.filter(pk=cupom_id).update(usos=Greatest(F('usos') - usos, Value(0)))
+    for (cupom_id, usuario_id), usos in por_usuario.items():
+        UsoCupom.objects.filter(cupom_id=cupom_id, usuario_id=usuario_id).update(
+            usos=Greatest(F('usos') - usos, Value(0))
+        )
@@ -0,0 +1,86 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from fornecedores.models import Fornecedor
+from pedidos.models import Pedido
+from pedidos.services import expirar_pedidos_pendentes, transicionar
+from pedidos.tests import criar_pedido
+from produtos.models import Categoria, Produto
+from .models import Cupom, UsoCupom
+from .services import CupomInvalido, registrar_uso
+
+
+class RegistrarUsoTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = User.objects.create_user('ana', 'ana@example.com', 'senha')
+        cls.bia = User.objects.create_user('bia', 'bia@example.com', 'senha')
+        categoria = Categoria.objects.create(nome='Lingerie')
+        fornecedor = Fornecedor.objects.create(nome='Fornecedor', email='fornecedor@example.com')
+        cls.produto = Produto.objects.create(
+            nome='Conjunto Renda', descricao='Conjunto', preco=Decimal('100.00'),
+            categoria=categoria, fornecedor=fornecedor,
+        )
+
+    def criar_cupom(self, **campos):
+        dados = dict(codigo='bemvinda', valor=Decimal('10'), data_inicio=timezone.now() - timedelta(days=1))
+        dados.update(campos)
+        return Cupom.objects.create(**dados)
+
+    def usos(self, cupom, usuario=None):
+        if usuario is None:
+            return Cupom.objects.values_list('usos', flat=True).get(pk=cupom.pk)
+        return UsoCupom.objects.values_list('usos', flat=True).get(cupom=cupom, usuario=usuario)
+
+    def test_recusa_uso_acima_do_limite_geral(self):
+        cupom = self.criar_cupom(limite_uso=1, limite_por_usuario=None)
+        registrar_uso(cupom, self.ana)
+
+        with self.assertRaises(CupomInvalido):
+            registrar_uso(cupom, self.bia)
+
+        self.assertEqual(self.usos(cupom), 1)
+        self.assertFalse(UsoCupom.objects.filter(cupom=cupom, usuario=self.bia).exists())
+
+    def test_recusa_uso_acima_do_limite_por_usuario(self):
+        cupom = self.criar_cupom(limite_uso=None, limite_por_usuario=2)
+        registrar_uso(cupom, self.ana)
+        registrar_uso(cupom, self.ana)
+
+        with self.assertRaises(CupomInvalido):
+            registrar_uso(cupom, self.ana)
+        self.assertEqual(self.usos(cupom, self.ana), 2)
+
+        # O limite é de cada usuário
+        registrar_uso(cupom, self.bia)
+        self.assertEqual(self.usos(cupom, self.bia), 1)
+
+    def test_cancelamento_devolve_o_uso(self):
+        cupom = self.criar_cupom(limite_uso=1, limite_por_usuario=1)
+        pedido = criar_pedido(self.ana, self.produto, 1, cupom=cupom)
+        registrar_uso(cupom, self.ana)
+
+        # Sem executar os hooks pós-commit: a devolução vai na transação do cancelamento
+        transicionar(pedido, 'cancelado')
+
+        self.assertEqual(self.usos(cupom), 0)
+        self.assertEqual(self.usos(cupom, self.ana), 0)
+        # O uso devolvido pode ser consumido de novo
+        registrar_uso(cupom, self.ana)
+        self.assertEqual(self.usos(cupom), 1)
+
+    def test_expiracao_devolve_o_uso(self):
+        cupom = self.criar_cupom(limite_uso=None, limite_por_usuario=2)
+        for _ in range(2):
+            criar_pedido(self.ana, self.produto, 1, cupom=cupom)
+            registrar_uso(cupom, self.ana)
+        Pedido.objects.update(data_pedido=timezone.now() - timedelta(days=3))
+
+        expirar_pedidos_pendentes(horas=48)
+
+        self.assertEqual(self.usos(cupom), 0)
+        self.assertEqual(self.usos(cupom, self.ana), 0)
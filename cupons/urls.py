@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'cupons'
+
+urlpatterns = [
+    path('validar/', views.ValidarCupomView.as_view(), name='validar'),
+]
@@ -0,0 +1,35 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
+from django.views import View
+
+from carrinho.sessao import obter_carrinho
+from .services import CupomInvalido, aplicar_cupom
+
+
+class ValidarCupomView(LoginRequiredMixin, View):
+    """
+    Prévia do desconto no checkout (JSON). O cupom só é consumido na
+    finalização do pedido, que repete a validação.
+    """
+
+    def post(self, request):
+        carrinho = obter_carrinho(request)
+        itens = list(carrinho.itens.select_related('produto')) if carrinho is not None else []
+        if not itens:
+            return JsonResponse({'success': False, 'message': 'Carrinho vazio'})
+
+        try:
+            cupom, desconto = aplicar_cupom(request.POST.get('codigo', ''), itens, request.user)
+        except CupomInvalido as e:
+            return JsonResponse({'success': False, 'message': str(e)})
+
+        subtotal = sum(item.total for item in itens)
+        return JsonResponse({
+            'success': True,
+            'codigo': cupom.codigo,
+            'desconto': float(desconto),
+            'subtotal': float(subtotal),
+            'frete': float(carrinho.valor_frete),
+            'total': float(subtotal + carrinho.valor_frete - desconto),
+            'message': f'Cupom {cupom.codigo} aplicado!',
+        })
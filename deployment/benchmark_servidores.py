@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""
+Compara vazão e latência entre os dois modos de deploy:
+
+- WSGI: gunicorn + workers gevent (encanto-intimo.service)
+- ASGI: gunicorn + workers Uvicorn (encanto-intimo-asgi.service)
+
+Sobe cada servidor em uma porta local, dispara requisições concorrentes com
+httpx contra os mesmos endpoints e imprime req/s e latências (p50/p95/p99).
+
+Uso:
+    python deployment/benchmark_servidores.py
+    python deployment/benchmark_servidores.py --concorrencia 200 --duracao 20 \\
+        --caminho /frete/cep/01001000/ --caminho "/produtos/autocomplete/?q=ca"
+
+Use o mesmo banco/cache de produção (ou uma cópia) e DEBUG=False, senão os
+números não representam o ambiente real.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# modo -> (argumentos do gunicorn, valor de VIEWS_ASSINCRONAS)
+MODOS = {
+    'wsgi-gevent': ([
+        'encanto_intimo.wsgi:application',
+        '--worker-class', 'gevent',
+        '--worker-connections', '1000',
+    ], 'False'),
+    'asgi-uvicorn': ([
+        'encanto_intimo.asgi:application',
+        '--worker-class', 'uvicorn.workers.UvicornWorker',
+    ], 'True'),
+}
+
+CAMINHOS_PADRAO = [
+    '/frete/cep/01001000/',
+    '/produtos/autocomplete/?q=ca',
+]
+
+
+def subir_servidor(modo, porta, workers):
+    argumentos, views_assincronas = MODOS[modo]
+    comando = [
+        sys.executable, '-m', 'gunicorn',
+        *argumentos,
+        '--bind', f'127.0.0.1:{porta}',
+        '--workers', str(workers),
+        '--log-level', 'warning',
+    ]
+    ambiente = dict(os.environ, VIEWS_ASSINCRONAS=views_assincronas)
+    return subprocess.Popen(comando, cwd=RAIZ, env=ambiente)
+
+
+async def aguardar_servidor(url, tempo_maximo=30):
+    limite = time.monotonic() + tempo_maximo
+    async with httpx.AsyncClient() as cliente:
+        while time.monotonic() < limite:
+            try:
+                await cliente.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.3)
+    raise RuntimeError(f'Servidor não respondeu em {tempo_maximo}s: {url}')
+
+
+async def disparar(base_url, caminhos, concorrencia, duracao):
+    latencias = []
+    erros = 0
+    fim = time.monotonic() + duracao
+
+    async def trabalhador(cliente, indice):
+        nonlocal erros
+        posicao = indice
+        while time.monotonic() < fim:
+            caminho = caminhos[posicao % len(caminhos)]
+            posicao += 1
+            inicio = time.perf_counter()
+            try:
+                resposta = await cliente.get(caminho)
+                if resposta.status_code >= 500:
+                    erros += 1
+                    continue
+            except httpx.HTTPError:
+                erros += 1
+                continue
+            latencias.append(time.perf_counter() - inicio)
+
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+    async with httpx.AsyncClient(base_url=base_url, limits=limites, timeout=30) as cliente:
+        await asyncio.gather(*(trabalhador(cliente, i) for i in range(concorrencia)))
+    return latencias, erros
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    indice = min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))
+    return valores[indice]
+
+
+def resumo(modo, latencias, erros, duracao):
+    latencias.sort()
+    ms = [valor * 1000 for valor in latencias]
+    return (
+        f'{modo:14} {len(latencias) / duracao:9.1f} req/s   '
+        f'p50 {statistics.median(ms) if ms else 0:7.1f} ms   '
+        f'p95 {percentil(ms, 95):7.1f} ms   '
+        f'p99 {percentil(ms, 99):7.1f} ms   '
+        f'erros {erros}'
+    )
+
+
+async def executar(args):
+    caminhos = args.caminho or CAMINHOS_PADRAO
+    linhas = []
+    for numero, modo in enumerate(args.modo or MODOS):
+        porta = args.porta + numero
+        base_url = f'http://127.0.0.1:{porta}'
+        processo = subir_servidor(modo, porta, args.workers)
+        try:
+            await aguardar_servidor(base_url + caminhos[0])
+            # Aquecimento: conexões, caches e bytecode
+            await disparar(base_url, caminhos, args.concorrencia, 2)
+            latencias, erros = await disparar(base_url, caminhos, args.concorrencia, args.duracao)
+            linhas.append(resumo(modo, latencias, erros, args.duracao))
+        finally:
+            processo.terminate()
+            processo.wait(timeout=10)
+
+    print(f'\n{len(caminhos)} endpoints, {args.concorrencia} conexões, {args.duracao}s, {args.workers} workers')
+    for linha in linhas:
+        print(linha)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark WSGI (gevent) x ASGI (Uvicorn)')
+    parser.add_argument('--caminho', action='append', help='Endpoint a testar (pode repetir)')
+    parser.add_argument('--modo', action='append', choices=list(MODOS), help='Modo a testar (padrão: todos)')
+    parser.add_argument('--concorrencia', type=int, default=100, help='Requisições simultâneas')
+    parser.add_argument('--duracao', type=float, default=10, help='Segundos de medição por modo')
+    parser.add_argument('--workers', type=int, default=3, help='Workers do gunicorn')
+    parser.add_argument('--porta', type=int, default=8100, help='Porta inicial')
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
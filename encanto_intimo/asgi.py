@@ -3,6 +3,14 @@ ASGI config for encanto_intimo project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Neste modo as views híbridas (webhook e retorno do Mercado Pago, CEP, frete,
+sugestões de busca) e o stream SSE de pedidos rodam no event loop; as demais
+são executadas em threads pelo próprio Django. Em produção:
+
+    gunicorn encanto_intimo.asgi:application -k uvicorn.workers.UvicornWorker
+
+(ver deployment/encanto-intimo-asgi.service)
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -11,6 +19,9 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "encanto_intimo.settings")
+# Mesmo padrão do wsgi.py: produção por padrão
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "encanto_intimo.settings.prod")
+# Views híbridas (encanto_intimo.assincrono) usam os handlers async
+os.environ.setdefault("VIEWS_ASSINCRONAS", "True")
 
 application = get_asgi_application()
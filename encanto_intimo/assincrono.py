@@ -0,0 +1,39 @@
+"""
+Views com versão síncrona (WSGI) e assíncrona (ASGI).
+
+Em WSGI com workers gevent uma view ``async def`` passa por async_to_sync, e
+vários greenlets na mesma thread disputando um event loop quebram com
+"You cannot use AsyncToSync in the same thread as an async event loop". Por
+isso as views I/O-bound implementam os dois caminhos:
+
+- ``get``/``post``: usados em WSGI (gevent torna a E/S cooperativa);
+- ``aget``/``apost``: usados quando VIEWS_ASSINCRONAS está ligado, o que o
+  ``encanto_intimo/asgi.py`` faz automaticamente.
+"""
+from django.conf import settings
+from django.utils.functional import classproperty
+
+
+class ViewHibridaMixin:
+    """Despacha para ``a<metodo>`` em ASGI e para ``<metodo>`` em WSGI"""
+
+    @classproperty
+    def view_is_async(cls):
+        return getattr(settings, 'VIEWS_ASSINCRONAS', False)
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.view_is_async:
+            return super().dispatch(request, *args, **kwargs)
+
+        metodo = request.method.lower()
+        if metodo == 'options':
+            # View.options já devolve uma corrotina em view assíncrona
+            return self.options(request, *args, **kwargs)
+        # View.setup aponta ``head`` para o ``get`` síncrono; em ASGI, HEAD usa ``aget``
+        if metodo == 'head' and not hasattr(self, 'ahead'):
+            metodo = 'get'
+        handler = getattr(self, f'a{metodo}', None) if metodo in self.http_method_names else None
+        if handler is None:
+            # Sem versão assíncrona o método não é atendido (o síncrono não roda no event loop)
+            return self.http_method_not_allowed(request, *args, **kwargs)
+        return handler(request, *args, **kwargs)
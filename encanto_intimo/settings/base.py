@@ -6,6 +6,7 @@ entre os ambientes de desenvolvimento e produção.
 """
 
 from pathlib import Path
+from decimal import Decimal
 import os
 from decouple import config
 from django.contrib.messages import constants as messages
@@ -44,10 +45,15 @@ INSTALLED_APPS = [
     # Local Apps
     'produtos',
     'pedidos',
+    'clientes',
     'usuarios',
     'fornecedores',
     'carrinho',
+    'frete',
     'pagamentos',
+    'agendador',
+    'campanhas',
+    'cupons',
     'adminpanel',
 ]
 
@@ -174,6 +180,65 @@ MESSAGE_TAGS = {
 # Session Configuration
 SESSION_COOKIE_AGE = 1209600  # 2 semanas
 CART_SESSION_ID = 'cart'
+# Carrinho de visitantes anônimos guardado na sessão (carrinho.sessao) em vez
+# de registros Carrinho/ItemCarrinho. Desligado por padrão: só compensa junto
+# com SESSION_ENGINE em 'django.contrib.sessions.backends.signed_cookies' ou
+# 'cache'; com o backend db cada visitante continua gravando uma linha
+CARRINHO_ANONIMO_EM_SESSAO = config('CARRINHO_ANONIMO_EM_SESSAO', default=False, cast=bool)
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.db')
+CARRINHO_EXPIRACAO_DIAS = config('CARRINHO_EXPIRACAO_DIAS', default=30, cast=int)  # limpar_carrinhos
+PEDIDO_PENDENTE_EXPIRACAO_HORAS = config('PEDIDO_PENDENTE_EXPIRACAO_HORAS', default=48, cast=int)  # expirar_pedidos
+RASTREIO_LIMITE_POR_MINUTO = config('RASTREIO_LIMITE_POR_MINUTO', default=30, cast=int)  # por número de pedido
+
+# Handlers async das views híbridas (encanto_intimo.assincrono); ligado
+# automaticamente pelo asgi.py, deve ficar desligado com gunicorn + gevent
+VIEWS_ASSINCRONAS = config('VIEWS_ASSINCRONAS', default=False, cast=bool)
+
+# Server-Sent Events de status do pedido (pedidos.eventos)
+SSE_INTERVALO_CONSULTA = config('SSE_INTERVALO_CONSULTA', default=5, cast=int)  # fallback no banco, em segundos
+SSE_HEARTBEAT = 15  # abaixo do proxy_read_timeout do nginx
+SSE_DURACAO_MAXIMA = config('SSE_DURACAO_MAXIMA', default=300, cast=int)  # o navegador reconecta sozinho
+
+
+# Agendador de tarefas (python manage.py run_scheduler)
+AGENDADOR_INTERVALO = config('AGENDADOR_INTERVALO', default=15, cast=float)
+AGENDADOR_HISTORICO_DIAS = config('AGENDADOR_HISTORICO_DIAS', default=30, cast=int)
+
+# Campanhas de e-mail (campanhas.services)
+CAMPANHA_EMAILS_POR_SEGUNDO = config('CAMPANHA_EMAILS_POR_SEGUNDO', default=5, cast=float)  # limite do provedor SMTP
+CAMPANHA_LOTE = config('CAMPANHA_LOTE', default=20, cast=int)  # mensagens por send_messages
+CAMPANHA_TEMPO_POR_EXECUCAO = 45  # segundos de envio por execução da tarefa agendada
+
+# Produtos relacionados (produtos.recomendacoes)
+RECOMENDACOES_TOP_K = config('RECOMENDACOES_TOP_K', default=12, cast=int)  # vizinhos gravados por produto e tipo
+RECOMENDACOES_SUPORTE_MINIMO = config('RECOMENDACOES_SUPORTE_MINIMO', default=2, cast=int)  # pedidos em comum
+
+# Snapshot da página inicial (produtos.vitrine); na falta do cache, uma consulta ao banco
+HOME_CACHE_TIMEOUT = config('HOME_CACHE_TIMEOUT', default=300, cast=int)
+
+# Métricas de navegação por produto (produtos.metricas), acumuladas em memória por worker
+METRICAS_INTERVALO_ENVIO = config('METRICAS_INTERVALO_ENVIO', default=5, cast=float)  # segundos
+METRICAS_RETENCAO_DIAS = config('METRICAS_RETENCAO_DIAS', default=400, cast=int)
+
+# Feeds de produtos para marketplaces (produtos.feeds), servidos pelo nginx em /feeds/
+FEEDS_ROOT = config('FEEDS_ROOT', default=str(MEDIA_ROOT / 'feeds'))
+FEED_MARCA = config('FEED_MARCA', default='Encanto Íntimo')
+
+# Sitemaps do catálogo (produtos.sitemaps), servidos pelo nginx em /sitemap.xml e /sitemaps/
+SITEMAPS_ROOT = config('SITEMAPS_ROOT', default=str(MEDIA_ROOT / 'sitemaps'))
+SITEMAPS_URL = '/sitemaps/'
+
+
+# Frete
+FRETE_GRATIS_ACIMA = Decimal(config('FRETE_GRATIS_ACIMA', default='199'))
+FRETE_PROVEDORES = [
+    'frete.provedores.CorreiosPacLocal',
+    'frete.provedores.CorreiosSedexLocal',
+]
+FRETE_TIMEOUT = config('FRETE_TIMEOUT', default=5, cast=int)  # segundos por provedor remoto
+FRETE_CACHE_TIMEOUT = config('FRETE_CACHE_TIMEOUT', default=60 * 60 * 6, cast=int)
+CEP_BASE_PATH = config('CEP_BASE_PATH', default=str(BASE_DIR / 'data' / 'ceps.bin'))  # gerado por importar_ceps
+CEP_VIACEP_LIMITE_POR_MINUTO = config('CEP_VIACEP_LIMITE_POR_MINUTO', default=10, cast=int)  # por IP, sem a base local
 
 
 # Email Configuration (Base - será sobrescrito nos ambientes específicos)
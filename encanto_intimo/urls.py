@@ -19,15 +19,15 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.generic import TemplateView
 from .test_views import teste_mensagens
 # Importar o admin site personalizado
 from adminpanel.admin_site import admin_site
+from produtos.views import HomeView
 
 urlpatterns = [
     # Admin personalizado da Encanto Íntimo
     path('admin/', admin_site.urls),
-    path('', TemplateView.as_view(template_name='home.html'), name='home'),
+    path('', HomeView.as_view(), name='home'),
     
     # Apps do projeto
     path('produtos/', include('produtos.urls')),
@@ -35,6 +35,9 @@ urlpatterns = [
     path('carrinho/', include('carrinho.urls')),
     path('pedidos/', include('pedidos.urls')),
     path('pagamentos/', include('pagamentos.urls')),
+    path('frete/', include('frete.urls')),
+    path('campanhas/', include('campanhas.urls')),
+    path('cupons/', include('cupons.urls')),
     path('painel/', include('adminpanel.urls')),
     
     # Django Allauth URLs
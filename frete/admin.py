@@ -0,0 +1,23 @@
+from django.contrib import admin
+from .models import ZonaFrete, FaixaCep
+
+
+class FaixaCepInline(admin.TabularInline):
+    model = FaixaCep
+    extra = 1
+
+
+@admin.register(ZonaFrete)
+class ZonaFreteAdmin(admin.ModelAdmin):
+    list_display = ['nome', 'valor_ate_1kg', 'valor_kg_adicional', 'prazo_dias', 'ativo']
+    list_filter = ['ativo']
+    search_fields = ['nome']
+    list_editable = ['valor_ate_1kg', 'valor_kg_adicional', 'prazo_dias', 'ativo']
+    inlines = [FaixaCepInline]
+
+
+@admin.register(FaixaCep)
+class FaixaCepAdmin(admin.ModelAdmin):
+    list_display = ['cep_inicial', 'cep_final', 'zona']
+    list_filter = ['zona']
+    search_fields = ['zona__nome']
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class FreteConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "frete"
+    verbose_name = "Frete"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,256 @@
+"""
+Consulta local de endereços por CEP.
+
+A base é um arquivo binário compacto gerado por ``manage.py importar_ceps``:
+
+    cabeçalho   <4sHII   assinatura b'CEP1', versão, total de registros, início das strings
+    registros   <IIII2s  cep, logradouro, bairro, cidade (offsets no bloco de strings), UF
+    strings     <H + utf-8, sem repetição (bairros e cidades são compartilhados)
+
+Os registros têm tamanho fixo e estão ordenados por CEP, então a busca é
+binária direto sobre o arquivo mapeado em memória (mmap), sem carregá-lo
+inteiro nem deserializar nada além do registro encontrado. Um LRU na frente
+evita até isso para os CEPs mais consultados.
+
+Enquanto a base não foi importada (o arquivo não vai no repositório), a
+consulta é feita no ViaCEP, como antes da base local, limitada por cliente
+(``CEP_VIACEP_LIMITE_POR_MINUTO``) para a view pública não servir de proxy
+aberto.
+"""
+from functools import lru_cache
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+import httpx
+
+logger = logging.getLogger(__name__)
+
+ASSINATURA = b'CEP1'
+VERSAO = 1
+CABECALHO = struct.Struct('<4sHII')
+REGISTRO = struct.Struct('<IIII2s')
+TAMANHO_TEXTO = struct.Struct('<H')
+
+VIACEP_URL = 'https://viacep.com.br/ws/{cep}/json/'
+
+_lock = threading.Lock()
+_base = None
+
+
+class ViaCepIndisponivel(Exception):
+    """O ViaCEP não respondeu ou respondeu com erro do servidor"""
+
+
+class BaseCep:
+    """Leitor da base binária de CEPs mapeada em memória"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with open(caminho, 'rb') as arquivo:
+            self._mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+        assinatura, versao, self.total, self._inicio_textos = CABECALHO.unpack_from(self._mapa, 0)
+        if assinatura != ASSINATURA or versao != VERSAO:
+            self._mapa.close()
+            raise ValueError(f'Arquivo de CEPs inválido: {caminho}')
+
+    def _registro(self, posicao):
+        return REGISTRO.unpack_from(self._mapa, CABECALHO.size + posicao * REGISTRO.size)
+
+    def _texto(self, offset):
+        inicio = self._inicio_textos + offset
+        (tamanho,) = TAMANHO_TEXTO.unpack_from(self._mapa, inicio)
+        inicio += TAMANHO_TEXTO.size
+        return self._mapa[inicio:inicio + tamanho].decode('utf-8')
+
+    def buscar(self, cep):
+        """Retorna o endereço do CEP (inteiro) ou None"""
+        baixo, alto = 0, self.total
+        while baixo < alto:
+            meio = (baixo + alto) // 2
+            registro = self._registro(meio)
+            if registro[0] < cep:
+                baixo = meio + 1
+            elif registro[0] > cep:
+                alto = meio
+            else:
+                _, logradouro, bairro, cidade, uf = registro
+                return {
+                    'cep': f'{cep:08d}',
+                    'logradouro': self._texto(logradouro),
+                    'bairro': self._texto(bairro),
+                    'cidade': self._texto(cidade),
+                    'estado': uf.decode('ascii'),
+                }
+        return None
+
+    def fechar(self):
+        self._mapa.close()
+
+
+def gravar_base_cep(registros, caminho):
+    """
+    Gera o arquivo binário a partir de tuplas (cep, logradouro, bairro, cidade, uf).
+
+    A escrita é feita em um arquivo temporário e trocada atomicamente, então
+    leitores abertos continuam válidos até reiniciarem. Retorna o total gravado.
+    """
+    textos = {}
+    bloco_textos = bytearray()
+
+    def offset_texto(texto):
+        if texto not in textos:
+            dados = (texto or '').encode('utf-8')[:65535]
+            textos[texto] = len(bloco_textos)
+            bloco_textos.extend(TAMANHO_TEXTO.pack(len(dados)))
+            bloco_textos.extend(dados)
+        return textos[texto]
+
+    por_cep = {}
+    for cep, logradouro, bairro, cidade, uf in registros:
+        por_cep[int(cep)] = (logradouro, bairro, cidade, (uf or '').upper()[:2])
+
+    bloco_registros = bytearray()
+    for cep in sorted(por_cep):
+        logradouro, bairro, cidade, uf = por_cep[cep]
+        bloco_registros.extend(REGISTRO.pack(
+            cep,
+            offset_texto(logradouro),
+            offset_texto(bairro),
+            offset_texto(cidade),
+            uf.encode('ascii', 'ignore').ljust(2),
+        ))
+
+    inicio_textos = CABECALHO.size + len(bloco_registros)
+    diretorio = os.path.dirname(os.fspath(caminho)) or '.'
+    os.makedirs(diretorio, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+    try:
+        with os.fdopen(descritor, 'wb') as arquivo:
+            arquivo.write(CABECALHO.pack(ASSINATURA, VERSAO, len(por_cep), inicio_textos))
+            arquivo.write(bloco_registros)
+            arquivo.write(bloco_textos)
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+    return len(por_cep)
+
+
+def _obter_base():
+    global _base
+    if _base is None:
+        with _lock:
+            if _base is None:
+                caminho = settings.CEP_BASE_PATH
+                if not os.path.exists(caminho):
+                    return None
+                _base = BaseCep(caminho)
+    return _base
+
+
+def recarregar_base():
+    """Reabre o arquivo (após uma nova importação) e limpa o LRU"""
+    global _base
+    with _lock:
+        if _base is not None:
+            _base.fechar()
+        _base = None
+    _buscar.cache_clear()
+
+
+@lru_cache(maxsize=8192)
+def _buscar(cep):
+    base = _obter_base()
+    if base is None:
+        return None
+    return base.buscar(cep)
+
+
+def base_disponivel():
+    return _obter_base() is not None
+
+
+def normalizar_cep(cep):
+    """Os 8 dígitos do CEP, ou None se inválido"""
+    digitos = ''.join(c for c in str(cep or '') if c.isdigit())
+    return digitos if len(digitos) == 8 else None
+
+
+def buscar_endereco(cep):
+    """Endereço (logradouro, bairro, cidade, estado) do CEP, ou None se desconhecido"""
+    digitos = normalizar_cep(cep)
+    if digitos is None:
+        return None
+    endereco = _buscar(int(digitos))
+    return dict(endereco) if endereco else None
+
+
+def _endereco_viacep(resposta):
+    if resposta.status_code >= 500:
+        raise ViaCepIndisponivel(f'HTTP {resposta.status_code}')
+    if resposta.status_code != 200:
+        return None
+    dados = resposta.json()
+    if dados.get('erro'):
+        return None
+    return {
+        'logradouro': dados.get('logradouro', ''),
+        'bairro': dados.get('bairro', ''),
+        'cidade': dados.get('localidade', ''),
+        'estado': dados.get('uf', ''),
+    }
+
+
+def consultar_viacep(cep):
+    """
+    Endereço do CEP pelo ViaCEP (sem a base local), ou None se desconhecido.
+
+    Levanta ViaCepIndisponivel em falhas de rede ou do serviço.
+    """
+    digitos = normalizar_cep(cep)
+    if digitos is None:
+        return None
+    try:
+        return _endereco_viacep(httpx.get(VIACEP_URL.format(cep=digitos), timeout=settings.FRETE_TIMEOUT))
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning(f'Falha ao consultar o CEP {digitos} no ViaCEP: {e}')
+        raise ViaCepIndisponivel(str(e)) from e
+
+
+async def aconsultar_viacep(cep):
+    digitos = normalizar_cep(cep)
+    if digitos is None:
+        return None
+    try:
+        async with httpx.AsyncClient(timeout=settings.FRETE_TIMEOUT) as cliente:
+            return _endereco_viacep(await cliente.get(VIACEP_URL.format(cep=digitos)))
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning(f'Falha ao consultar o CEP {digitos} no ViaCEP: {e}')
+        raise ViaCepIndisponivel(str(e)) from e
+
+
+def limite_viacep_excedido(cliente):
+    """
+    Contador de consultas ao ViaCEP por cliente (IP) em janelas de um minuto.
+
+    Retorna True quando o cliente já fez mais de CEP_VIACEP_LIMITE_POR_MINUTO
+    consultas na janela atual.
+    """
+    limite = getattr(settings, 'CEP_VIACEP_LIMITE_POR_MINUTO', 10)
+    chave = f'frete:viacep:limite:{cliente}'
+    if cache.add(chave, 1, 60):
+        return False
+    try:
+        return cache.incr(chave) > limite
+    except ValueError:
+        # A chave expirou entre o add e o incr
+        cache.add(chave, 1, 60)
+        return False
+
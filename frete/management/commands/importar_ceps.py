@@ -0,0 +1,56 @@
+"""
+Gera a base local de CEPs usada na busca de endereços.
+
+Uso:
+    python manage.py importar_ceps ceps.csv
+    python manage.py importar_ceps ceps.csv --delimitador "," --saida /srv/dados/ceps.bin
+
+O CSV deve ter cabeçalho com as colunas cep, logradouro, bairro, cidade e uf.
+"""
+import csv
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from frete.cep import gravar_base_cep
+
+
+class Command(BaseCommand):
+    help = 'Converte um CSV de CEPs para o arquivo binário consultado por frete.cep'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='CSV de origem')
+        parser.add_argument('--delimitador', default=';', help='Delimitador do CSV (padrão: ;)')
+        parser.add_argument('--encoding', default='utf-8', help='Codificação do CSV')
+        parser.add_argument('--saida', default=None, help='Arquivo gerado (padrão: CEP_BASE_PATH)')
+
+    def handle(self, *args, **options):
+        saida = options['saida'] or settings.CEP_BASE_PATH
+        ignorados = 0
+
+        def registros(leitor):
+            nonlocal ignorados
+            for linha in leitor:
+                cep = ''.join(c for c in linha.get('cep', '') if c.isdigit())
+                if len(cep) != 8:
+                    ignorados += 1
+                    continue
+                yield (
+                    cep,
+                    linha.get('logradouro', '').strip(),
+                    linha.get('bairro', '').strip(),
+                    linha.get('cidade', '').strip(),
+                    linha.get('uf', '').strip(),
+                )
+
+        try:
+            with open(options['arquivo'], newline='', encoding=options['encoding']) as arquivo:
+                leitor = csv.DictReader(arquivo, delimiter=options['delimitador'])
+                total = gravar_base_cep(registros(leitor), saida)
+        except OSError as e:
+            raise CommandError(f'Não foi possível ler {options["arquivo"]}: {e}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} CEPs gravados em {saida} ({ignorados} linhas ignoradas). '
+            'Reinicie os workers para carregar a nova base.'
+        ))
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZonaFrete',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, verbose_name='Nome')),
+                ('valor_ate_1kg', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Valor até 1 kg')),
+                ('valor_kg_adicional', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Valor por kg adicional')),
+                ('prazo_dias', models.PositiveIntegerField(default=7, verbose_name='Prazo (dias úteis)')),
+                ('ativo', models.BooleanField(default=True, verbose_name='Ativo')),
+            ],
+            options={
+                'verbose_name': 'Zona de Frete',
+                'verbose_name_plural': 'Zonas de Frete',
+                'ordering': ['nome'],
+            },
+        ),
+        migrations.CreateModel(
+            name='FaixaCep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cep_inicial', models.PositiveIntegerField(help_text='Somente números, ex.: 1000000', verbose_name='CEP Inicial')),
+                ('cep_final', models.PositiveIntegerField(help_text='Somente números, ex.: 5999999', verbose_name='CEP Final')),
+                ('zona', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='faixas', to='frete.zonafrete', verbose_name='Zona')),
+            ],
+            options={
+                'verbose_name': 'Faixa de CEP',
+                'verbose_name_plural': 'Faixas de CEP',
+                'ordering': ['cep_inicial'],
+                'indexes': [models.Index(fields=['cep_inicial'], name='frete_faixa_cep_ini_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.core.exceptions import ValidationError
+from django.db import models
+
+
+class ZonaFrete(models.Model):
+    """Zona de entrega com a tabela de preços usada pelos provedores locais"""
+    nome = models.CharField(max_length=100, verbose_name="Nome")
+    valor_ate_1kg = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Valor até 1 kg")
+    valor_kg_adicional = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Valor por kg adicional")
+    prazo_dias = models.PositiveIntegerField(default=7, verbose_name="Prazo (dias úteis)")
+    ativo = models.BooleanField(default=True, verbose_name="Ativo")
+
+    class Meta:
+        verbose_name = "Zona de Frete"
+        verbose_name_plural = "Zonas de Frete"
+        ordering = ['nome']
+
+    def __str__(self):
+        return self.nome
+
+
+class FaixaCep(models.Model):
+    """Intervalo de CEPs (inclusivo) atendido por uma zona"""
+    zona = models.ForeignKey(ZonaFrete, on_delete=models.CASCADE, related_name='faixas', verbose_name="Zona")
+    cep_inicial = models.PositiveIntegerField(verbose_name="CEP Inicial", help_text="Somente números, ex.: 1000000")
+    cep_final = models.PositiveIntegerField(verbose_name="CEP Final", help_text="Somente números, ex.: 5999999")
+
+    class Meta:
+        verbose_name = "Faixa de CEP"
+        verbose_name_plural = "Faixas de CEP"
+        ordering = ['cep_inicial']
+        indexes = [
+            models.Index(fields=['cep_inicial'], name='frete_faixa_cep_ini_idx'),
+        ]
+
+    def clean(self):
+        if self.cep_inicial is None or self.cep_final is None:
+            return
+        if self.cep_inicial > self.cep_final:
+            raise ValidationError({'cep_final': 'O CEP final deve ser maior ou igual ao inicial.'})
+        # A busca (frete.services.buscar_zona) só confere a faixa que começa
+        # mais perto do CEP, então as faixas não podem se sobrepor
+        sobreposta = (
+            FaixaCep.objects.filter(cep_inicial__lte=self.cep_final, cep_final__gte=self.cep_inicial)
+            .exclude(pk=self.pk)
+            .select_related('zona')
+            .first()
+        )
+        if sobreposta is not None:
+            raise ValidationError(f'A faixa se sobrepõe a {sobreposta}.')
+
+    def __str__(self):
+        return f'{self.cep_inicial:08d} - {self.cep_final:08d} ({self.zona})'
@@ -0,0 +1,96 @@
+"""
+Provedores de cotação de frete.
+
+Cada provedor implementa ``cotar(cep, peso)`` e devolve uma Cotacao (ou None
+quando não atende o CEP). A lista ativa vem de ``settings.FRETE_PROVEDORES``;
+integrações remotas (API dos Correios, transportadoras) devem marcar
+``remoto = True`` para serem consultadas em paralelo e, de preferência,
+implementar ``acotar`` com um cliente HTTP assíncrono.
+"""
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_HALF_UP
+import math
+
+from asgiref.sync import sync_to_async
+
+
+@dataclass(frozen=True)
+class Cotacao:
+    provedor: str
+    servico: str
+    valor: Decimal
+    prazo_dias: int
+
+    def como_dict(self):
+        return {
+            'provedor': self.provedor,
+            'servico': self.servico,
+            'valor': float(self.valor),
+            'prazo_dias': self.prazo_dias,
+        }
+
+
+class ProvedorFrete:
+    codigo = ''
+    nome = ''
+    remoto = False
+
+    def cotar(self, cep, peso):
+        raise NotImplementedError
+
+    async def acotar(self, cep, peso):
+        """
+        Cotação para ``frete.services.acotar_frete``.
+
+        Integrações remotas devem sobrescrever com um cliente HTTP assíncrono
+        (httpx.AsyncClient); o padrão executa ``cotar`` em uma thread.
+        """
+        return await sync_to_async(self.cotar, thread_sensitive=False)(cep, peso)
+
+
+# Tabela usada quando o CEP não pertence a nenhuma faixa cadastrada
+# (mesmos valores da simulação original do carrinho)
+PRAZO_PADRAO = 8
+
+
+def valor_tabela_padrao(peso):
+    if peso <= 1:
+        return Decimal('15.90')
+    elif peso <= 3:
+        return Decimal('25.90')
+    return Decimal('35.90')
+
+
+class CorreiosPacLocal(ProvedorFrete):
+    """Substituto local dos Correios (PAC) baseado nas zonas cadastradas"""
+    codigo = 'correios_pac'
+    nome = 'Correios PAC'
+    multiplicador = Decimal('1')
+
+    def cotar(self, cep, peso):
+        from .services import buscar_zona
+
+        zona = buscar_zona(cep)
+        if zona is None:
+            valor = valor_tabela_padrao(peso)
+            prazo = PRAZO_PADRAO
+        else:
+            kg_adicionais = max(0, math.ceil(peso - 1))
+            valor = zona.valor_ate_1kg + zona.valor_kg_adicional * kg_adicionais
+            prazo = zona.prazo_dias
+
+        valor = (valor * self.multiplicador).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        return Cotacao(self.codigo, self.nome, valor, self.prazo(prazo))
+
+    def prazo(self, prazo_zona):
+        return prazo_zona
+
+
+class CorreiosSedexLocal(CorreiosPacLocal):
+    """Substituto local do SEDEX: mais caro e com metade do prazo"""
+    codigo = 'correios_sedex'
+    nome = 'Correios SEDEX'
+    multiplicador = Decimal('1.6')
+
+    def prazo(self, prazo_zona):
+        return max(1, prazo_zona // 2)
@@ -0,0 +1,257 @@
+"""
+Motor de cotação de frete.
+
+- As faixas de CEP ficam em arrays ordenados na memória do processo e a zona
+  é encontrada com ``bisect`` (O(log n), sem consulta ao banco).
+- As cotações são memorizadas no cache por (provedor, destino, faixa de
+  peso). O destino é a zona que atende o CEP para os provedores locais (que
+  só dependem dela) e o CEP completo para os remotos; um prefixo de 5
+  dígitos não serve, porque as faixas podem começar e terminar no meio
+  dele. A versão da tabela entra na chave, então alterar zonas/faixas no
+  admin invalida tudo de uma vez em todos os workers.
+- Provedores remotos são consultados em paralelo (threads em ``cotar_frete``,
+  tarefas asyncio em ``acotar_frete``).
+"""
+import asyncio
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor, wait
+from decimal import Decimal
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from .provedores import Cotacao
+
+logger = logging.getLogger(__name__)
+
+CHAVE_VERSAO = 'frete:versao_tabela'
+
+# Limites superiores (kg) das faixas de peso usadas na memorização
+FAIXAS_PESO = (
+    Decimal('0.3'), Decimal('0.5'), Decimal('1'), Decimal('2'), Decimal('3'),
+    Decimal('5'), Decimal('10'), Decimal('15'), Decimal('20'), Decimal('30'),
+)
+
+_lock = threading.Lock()
+# (versao, inicios, finais, zonas): substituída inteira a cada recarga e lida
+# uma única vez por consulta, então nunca mistura arrays de versões diferentes
+_tabela = (None, (), (), ())
+_provedores = None
+
+
+def normalizar_cep(cep):
+    return ''.join(c for c in str(cep or '') if c.isdigit())
+
+
+def faixa_peso(peso):
+    """Arredonda o peso para o limite superior da faixa correspondente"""
+    peso = Decimal(str(peso or 0))
+    for limite in FAIXAS_PESO:
+        if peso <= limite:
+            return limite
+    return Decimal(int(peso) + (0 if peso == int(peso) else 1))
+
+
+def _versao():
+    return cache.get_or_set(CHAVE_VERSAO, 1, None)
+
+
+def invalidar_tabela():
+    """Descarta a tabela carregada e as cotações memorizadas"""
+    global _tabela
+    try:
+        cache.incr(CHAVE_VERSAO)
+    except ValueError:
+        cache.set(CHAVE_VERSAO, 2, None)
+    with _lock:
+        _tabela = (None, (), (), ())
+
+
+def _carregar_tabela(versao):
+    global _tabela
+    from .models import FaixaCep
+
+    faixas = (
+        FaixaCep.objects.filter(zona__ativo=True)
+        .select_related('zona')
+        .order_by('cep_inicial')
+    )
+    inicios, finais, zonas = [], [], []
+    for faixa in faixas:
+        if faixa.cep_inicial > faixa.cep_final or (finais and faixa.cep_inicial <= finais[-1]):
+            # FaixaCep.clean recusa faixas invertidas ou sobrepostas; gravadas
+            # por fora dele, a busca erraria a zona em silêncio
+            logger.error(f"Faixa de CEP {faixa} invertida ou sobreposta à anterior; ignorada na tabela de frete")
+            continue
+        inicios.append(faixa.cep_inicial)
+        finais.append(faixa.cep_final)
+        zonas.append(faixa.zona)
+
+    tabela = (versao, tuple(inicios), tuple(finais), tuple(zonas))
+    with _lock:
+        _tabela = tabela
+    return tabela
+
+
+def buscar_zona(cep, versao=None):
+    """
+    Retorna a ZonaFrete que atende o CEP ou None.
+
+    ``versao`` evita reler a versão da tabela no cache quando quem chama já a tem.
+    """
+    cep = normalizar_cep(cep)
+    if len(cep) != 8:
+        return None
+
+    if versao is None:
+        versao = _versao()
+    tabela = _tabela
+    if tabela[0] != versao:
+        tabela = _carregar_tabela(versao)
+
+    _, inicios, finais, zonas = tabela
+    numero = int(cep)
+    posicao = bisect_right(inicios, numero) - 1
+    if posicao >= 0 and numero <= finais[posicao]:
+        return zonas[posicao]
+    return None
+
+
+def provedores():
+    global _provedores
+    if _provedores is None:
+        caminhos = getattr(settings, 'FRETE_PROVEDORES', [
+            'frete.provedores.CorreiosPacLocal',
+            'frete.provedores.CorreiosSedexLocal',
+        ])
+        _provedores = [import_string(caminho)() for caminho in caminhos]
+    return _provedores
+
+
+def _cotar_provedor(provedor, cep, peso):
+    try:
+        return provedor.cotar(cep, peso)
+    except Exception as e:
+        logger.error(f"Erro ao cotar frete com {provedor.codigo}: {str(e)}")
+        return None
+
+
+async def _acotar_provedor(provedor, cep, peso):
+    try:
+        return await provedor.acotar(cep, peso)
+    except Exception as e:
+        logger.error(f"Erro ao cotar frete com {provedor.codigo}: {str(e)}")
+        return None
+
+
+def _chaves(cep, peso):
+    versao = _versao()
+    zona = buscar_zona(cep, versao)
+    destino_local = f'zona{zona.pk}' if zona is not None else 'sem_zona'
+    return {
+        provedor.codigo: f'frete:{versao}:{provedor.codigo}:{cep if provedor.remoto else destino_local}:{peso}'
+        for provedor in provedores()
+    }
+
+
+def _separar(chaves, memorizadas):
+    """Divide os provedores entre cotações já memorizadas, locais e remotos"""
+    cotacoes, locais, remotos = [], [], []
+    for provedor in provedores():
+        cotacao = memorizadas.get(chaves[provedor.codigo])
+        if cotacao is not None:
+            cotacoes.append(cotacao)
+        elif provedor.remoto:
+            remotos.append(provedor)
+        else:
+            locais.append(provedor)
+    return cotacoes, locais, remotos
+
+
+def _cotar_locais(locais, cep, peso):
+    return [_cotar_provedor(provedor, cep, peso) for provedor in locais]
+
+
+def _ordenar(cotacoes, subtotal):
+    cotacoes.sort(key=lambda cotacao: (cotacao.valor, cotacao.prazo_dias))
+
+    if cotacoes and subtotal is not None and subtotal >= settings.FRETE_GRATIS_ACIMA:
+        mais_barata = cotacoes[0]
+        cotacoes[0] = Cotacao(mais_barata.provedor, mais_barata.servico, Decimal('0.00'), mais_barata.prazo_dias)
+
+    return cotacoes
+
+
+def cotar_frete(cep, peso, subtotal=None):
+    """
+    Cota o frete em todos os provedores e retorna as opções ordenadas por valor.
+
+    Com ``subtotal`` acima de FRETE_GRATIS_ACIMA a opção mais barata sai grátis.
+    """
+    cep = normalizar_cep(cep)
+    if len(cep) != 8:
+        return []
+
+    peso = faixa_peso(peso)
+    chaves = _chaves(cep, peso)
+    cotacoes, locais, remotos = _separar(chaves, cache.get_many(list(chaves.values())))
+
+    novas = _cotar_locais(locais, cep, peso)
+    if remotos:
+        timeout = getattr(settings, 'FRETE_TIMEOUT', 5)
+        executor = ThreadPoolExecutor(max_workers=len(remotos))
+        futuros = [executor.submit(_cotar_provedor, provedor, cep, peso) for provedor in remotos]
+        concluidos, atrasados = wait(futuros, timeout=timeout)
+        # Não espera os atrasados: a resposta segue com as cotações que chegaram
+        executor.shutdown(wait=False, cancel_futures=True)
+        novas.extend(futuro.result() for futuro in concluidos)
+        if atrasados:
+            logger.warning(f"{len(atrasados)} provedores de frete excederam {timeout}s")
+
+    novas = [cotacao for cotacao in novas if cotacao is not None]
+    if novas:
+        cache.set_many(
+            {chaves[cotacao.provedor]: cotacao for cotacao in novas},
+            getattr(settings, 'FRETE_CACHE_TIMEOUT', 60 * 60 * 6),
+        )
+    return _ordenar(cotacoes + novas, subtotal)
+
+
+async def acotar_frete(cep, peso, subtotal=None):
+    """
+    Versão assíncrona de ``cotar_frete`` para views async.
+
+    Provedores remotos são aguardados no event loop (``ProvedorFrete.acotar``)
+    em vez de ocupar uma thread cada; os locais rodam em uma única thread,
+    já que podem recarregar a tabela de faixas do banco.
+    """
+    cep = normalizar_cep(cep)
+    if len(cep) != 8:
+        return []
+
+    peso = faixa_peso(peso)
+    chaves = await sync_to_async(_chaves)(cep, peso)
+    cotacoes, locais, remotos = _separar(chaves, await cache.aget_many(list(chaves.values())))
+
+    novas = await sync_to_async(_cotar_locais)(locais, cep, peso) if locais else []
+    if remotos:
+        timeout = getattr(settings, 'FRETE_TIMEOUT', 5)
+        tarefas = [asyncio.ensure_future(_acotar_provedor(provedor, cep, peso)) for provedor in remotos]
+        concluidas, atrasadas = await asyncio.wait(tarefas, timeout=timeout)
+        for tarefa in atrasadas:
+            tarefa.cancel()
+        novas.extend(tarefa.result() for tarefa in concluidas)
+        if atrasadas:
+            logger.warning(f"{len(atrasadas)} provedores de frete excederam {timeout}s")
+
+    novas = [cotacao for cotacao in novas if cotacao is not None]
+    if novas:
+        await cache.aset_many(
+            {chaves[cotacao.provedor]: cotacao for cotacao in novas},
+            getattr(settings, 'FRETE_CACHE_TIMEOUT', 60 * 60 * 6),
+        )
+    return _ordenar(cotacoes + novas, subtotal)
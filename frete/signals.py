@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import FaixaCep, ZonaFrete
+from .services import invalidar_tabela
+
+
+@receiver([post_save, post_delete], sender=ZonaFrete)
+@receiver([post_save, post_delete], sender=FaixaCep)
+def tabela_frete_alterada(sender, **kwargs):
+    invalidar_tabela()
@@ -0,0 +1,127 @@
+from decimal import Decimal
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+import httpx
+
+from .cep import BaseCep, gravar_base_cep, recarregar_base
+from .models import FaixaCep, ZonaFrete
+from .services import buscar_zona, invalidar_tabela
+
+
+class FaixaCepTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.capital = ZonaFrete.objects.create(nome='Capital', valor_ate_1kg=Decimal('15.00'))
+        cls.interior = ZonaFrete.objects.create(nome='Interior', valor_ate_1kg=Decimal('25.00'))
+        FaixaCep.objects.create(zona=cls.capital, cep_inicial=1000000, cep_final=5999999)
+
+    def setUp(self):
+        invalidar_tabela()
+
+    def test_recusa_faixa_invertida(self):
+        faixa = FaixaCep(zona=self.interior, cep_inicial=13000000, cep_final=12000000)
+        with self.assertRaises(ValidationError):
+            faixa.full_clean()
+
+    def test_recusa_faixa_sobreposta(self):
+        for inicial, final in [(2000000, 3000000), (500000, 1000000), (5999999, 9999999), (0, 99999999)]:
+            with self.subTest(inicial=inicial, final=final), self.assertRaises(ValidationError):
+                FaixaCep(zona=self.interior, cep_inicial=inicial, cep_final=final).full_clean()
+
+        # Editar a própria faixa não conta como sobreposição
+        FaixaCep.objects.get(zona=self.capital).full_clean()
+
+    def test_tabela_ignora_faixa_sobreposta_gravada_por_fora(self):
+        FaixaCep.objects.create(zona=self.interior, cep_inicial=2000000, cep_final=2999999)
+        FaixaCep.objects.create(zona=self.interior, cep_inicial=6000000, cep_final=19999999)
+
+        with self.assertLogs('frete.services', 'ERROR'):
+            self.assertEqual(buscar_zona('02500-000'), self.capital)
+        self.assertEqual(buscar_zona('05000-000'), self.capital)
+        self.assertEqual(buscar_zona('13000-000'), self.interior)
+        self.assertIsNone(buscar_zona('20000-000'))
+
+
+@override_settings(CEP_BASE_PATH='/caminho/inexistente/ceps.bin', CEP_VIACEP_LIMITE_POR_MINUTO=2)
+class BuscarCepViaCepTest(TestCase):
+    def setUp(self):
+        recarregar_base()
+        cache.clear()
+        self.addCleanup(recarregar_base)
+        self.url = reverse('frete:buscar_cep', args=['01001000'])
+
+    def test_cep_encontrado_no_viacep(self):
+        resposta = httpx.Response(200, json={'logradouro': 'Praça da Sé', 'bairro': 'Sé', 'localidade': 'São Paulo', 'uf': 'SP'})
+        with mock.patch('frete.cep.httpx.get', return_value=resposta):
+            dados = self.client.get(self.url).json()
+        self.assertEqual(dados['cidade'], 'São Paulo')
+
+    def test_cep_desconhecido_responde_404(self):
+        with mock.patch('frete.cep.httpx.get', return_value=httpx.Response(200, json={'erro': True})):
+            self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_falha_do_viacep_responde_503(self):
+        with mock.patch('frete.cep.httpx.get', side_effect=httpx.ConnectTimeout('timeout')):
+            self.assertEqual(self.client.get(self.url).status_code, 503)
+        with mock.patch('frete.cep.httpx.get', return_value=httpx.Response(502, text='Bad Gateway')):
+            self.assertEqual(self.client.get(self.url).status_code, 503)
+
+    def test_limite_por_cliente(self):
+        with mock.patch('frete.cep.httpx.get', return_value=httpx.Response(200, json={'erro': True})) as consulta:
+            respostas = [self.client.get(self.url, REMOTE_ADDR='10.0.0.1').status_code for _ in range(3)]
+            outro_cliente = self.client.get(self.url, REMOTE_ADDR='10.0.0.2').status_code
+        self.assertEqual(respostas, [404, 404, 429])
+        self.assertEqual(outro_cliente, 404)
+        self.assertEqual(consulta.call_count, 3)
+
+
+class BaseCepTest(TestCase):
+    def setUp(self):
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        self.caminho = os.path.join(diretorio.name, 'ceps.bin')
+
+    def abrir(self):
+        base = BaseCep(self.caminho)
+        self.addCleanup(base.fechar)
+        return base
+
+    def test_ida_e_volta(self):
+        registros = [
+            ('99990000', 'Rua Última', 'Centro', 'Oiapoque', 'ap'),
+            ('01001000', 'Praça da Sé', 'Sé', 'São Paulo', 'SP'),
+            ('00000000', '', '', 'Sem Nome', 'XX'),
+            ('01001001', 'Praça da Sé', 'Sé', 'São Paulo', 'SP'),
+            # CEP repetido: vale o último
+            ('01001000', 'Praça da Sé - lado ímpar', 'Sé', 'São Paulo', 'SP'),
+        ]
+        self.assertEqual(gravar_base_cep(registros, self.caminho), 4)
+
+        base = self.abrir()
+        self.assertEqual(base.total, 4)
+        self.assertEqual(base.buscar(0), {
+            'cep': '00000000', 'logradouro': '', 'bairro': '', 'cidade': 'Sem Nome', 'estado': 'XX',
+        })
+        self.assertEqual(base.buscar(99990000), {
+            'cep': '99990000', 'logradouro': 'Rua Última', 'bairro': 'Centro', 'cidade': 'Oiapoque', 'estado': 'AP',
+        })
+        self.assertEqual(base.buscar(1001000)['logradouro'], 'Praça da Sé - lado ímpar')
+        self.assertEqual(base.buscar(1001001)['cidade'], 'São Paulo')
+        for ausente in (1, 1000999, 1001002, 99989999, 99990001):
+            self.assertIsNone(base.buscar(ausente))
+
+    def test_base_vazia(self):
+        self.assertEqual(gravar_base_cep([], self.caminho), 0)
+        self.assertIsNone(self.abrir().buscar(1001000))
+
+    def test_recusa_arquivo_de_outro_formato(self):
+        with open(self.caminho, 'wb') as arquivo:
+            arquivo.write(b'XXXX' + bytes(20))
+        with self.assertRaises(ValueError):
+            BaseCep(self.caminho)
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'frete'
+
+urlpatterns = [
+    path('cep/<str:cep>/', views.BuscarCepView.as_view(), name='buscar_cep'),
+]
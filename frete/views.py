@@ -0,0 +1,66 @@
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.cache import add_never_cache_headers, patch_cache_control
+from django.views.generic import View
+
+from encanto_intimo.assincrono import ViewHibridaMixin
+from .cep import (
+    ViaCepIndisponivel, aconsultar_viacep, base_disponivel, buscar_endereco, consultar_viacep,
+    limite_viacep_excedido,
+)
+
+
+class BuscarCepView(ViewHibridaMixin, View):
+    """
+    Endereço do CEP.
+
+    Com a base local importada a busca é em memória (mmap), sem chamadas
+    externas; em ASGI a requisição é atendida direto no event loop, sem
+    passar por uma thread. Sem a base, consulta o ViaCEP (assíncrono em
+    ASGI), limitado por IP: 429 acima do limite e 503 se o ViaCEP falhar.
+    """
+
+    def get(self, request, cep):
+        if base_disponivel():
+            return self._resposta(buscar_endereco(cep))
+        if limite_viacep_excedido(self._cliente()):
+            return self._limite_excedido()
+        try:
+            return self._resposta(consultar_viacep(cep))
+        except ViaCepIndisponivel:
+            return self._indisponivel()
+
+    async def aget(self, request, cep):
+        if base_disponivel():
+            return self._resposta(buscar_endereco(cep))
+        if await sync_to_async(limite_viacep_excedido)(self._cliente()):
+            return self._limite_excedido()
+        try:
+            return self._resposta(await aconsultar_viacep(cep))
+        except ViaCepIndisponivel:
+            return self._indisponivel()
+
+    def _cliente(self):
+        # Atrás do nginx REMOTE_ADDR é o próprio proxy; ele repassa o IP em X-Real-IP
+        return self.request.META.get('HTTP_X_REAL_IP') or self.request.META.get('REMOTE_ADDR', '')
+
+    def _limite_excedido(self):
+        resposta = JsonResponse({'success': False, 'message': 'Muitas consultas. Tente novamente em instantes.'}, status=429)
+        resposta['Retry-After'] = '60'
+        add_never_cache_headers(resposta)
+        return resposta
+
+    def _indisponivel(self):
+        resposta = JsonResponse({'success': False, 'message': 'Consulta de CEP indisponível no momento'}, status=503)
+        add_never_cache_headers(resposta)
+        return resposta
+
+    def _resposta(self, endereco):
+        if endereco is None:
+            # CEP ausente pode passar a existir (nova importação): não fica em cache
+            resposta = JsonResponse({'success': False, 'message': 'CEP não encontrado'}, status=404)
+            add_never_cache_headers(resposta)
+            return resposta
+        resposta = JsonResponse({'success': True, **endereco})
+        patch_cache_control(resposta, public=True, max_age=60 * 60 * 24)
+        return resposta
@@ -1,6 +1,7 @@
 """
 Serviços de integração com o Mercado Pago
 """
+import httpx
 import mercadopago
 from django.conf import settings
 from django.urls import reverse
@@ -9,6 +10,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+MP_API_URL = "https://api.mercadopago.com"
+MP_TIMEOUT = 10  # segundos
+
 
 class MercadoPagoService:
     """Classe para gerenciar integração com Mercado Pago"""
@@ -163,6 +167,44 @@ class MercadoPagoService:
                 "message": f"Erro ao verificar pagamento: {str(e)}"
             }
     
+    async def averificar_pagamento(self, payment_id):
+        """
+        Versão assíncrona de ``verificar_pagamento`` para as views async.
+        
+        O SDK oficial é síncrono (requests), então a consulta vai direto à API
+        REST com httpx, sem ocupar uma thread durante a espera.
+        """
+        try:
+            async with httpx.AsyncClient(base_url=MP_API_URL, timeout=MP_TIMEOUT) as cliente:
+                response = await cliente.get(
+                    f"/v1/payments/{payment_id}",
+                    headers={"Authorization": f"Bearer {settings.MERCADO_PAGO['ACCESS_TOKEN']}"},
+                )
+            
+            if response.status_code == 200:
+                payment_data = response.json()
+                return {
+                    "status": "success",
+                    "payment_status": payment_data.get("status"),
+                    "status_detail": payment_data.get("status_detail"),
+                    "external_reference": payment_data.get("external_reference"),
+                    "transaction_amount": payment_data.get("transaction_amount"),
+                    "payment_method": payment_data.get("payment_method_id"),
+                    "payment_data": payment_data
+                }
+            else:
+                return {
+                    "status": "error",
+                    "message": "Pagamento não encontrado"
+                }
+                
+        except Exception as e:
+            logger.error(f"Erro ao verificar pagamento {payment_id}: {str(e)}")
+            return {
+                "status": "error",
+                "message": f"Erro ao verificar pagamento: {str(e)}"
+            }
+    
     def processar_webhook_notification(self, notification_data):
         """
         Processa notificação webhook do Mercado Pago
@@ -192,3 +234,16 @@ class MercadoPagoService:
                 "status": "error",
                 "message": f"Erro ao processar webhook: {str(e)}"
             }
+    
+    async def aprocessar_webhook_notification(self, notification_data):
+        """Versão assíncrona de ``processar_webhook_notification``"""
+        if notification_data.get("type") == "payment":
+            payment_id = notification_data.get("data", {}).get("id")
+            
+            if payment_id:
+                return await self.averificar_pagamento(payment_id)
+                
+        return {
+            "status": "ignored",
+            "message": "Tipo de notificação não processado"
+        }
@@ -1,6 +1,7 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import TemplateView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.views import redirect_to_login
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
@@ -8,13 +9,18 @@ from django.contrib import messages
 from django.urls import reverse
 from django.db import transaction
 from django.conf import settings
+from django.utils import timezone
 import json
 import logging
 
+from asgiref.sync import sync_to_async
+
+from encanto_intimo.assincrono import ViewHibridaMixin
 from .models import Pagamento
 from .services import MercadoPagoService
 from carrinho.models import Carrinho
 from pedidos.models import Pedido, ItemPedido
+from pedidos.services import ConflitoTransicao, TransicaoInvalida, transicionar
 from produtos.models import Produto
 
 logger = logging.getLogger(__name__)
@@ -131,18 +137,27 @@ class ProcessarPagamentoView(LoginRequiredMixin, View):
 
 
 @method_decorator(csrf_exempt, name='dispatch')
-class MercadoPagoWebhookView(View):
-    """Webhook para receber notificações do Mercado Pago"""
+class MercadoPagoWebhookView(ViewHibridaMixin, View):
+    """
+    Webhook para receber notificações do Mercado Pago.
+    
+    Em ASGI a consulta do pagamento na API do MP é assíncrona (httpx) e só a
+    atualização do pedido, que é transacional, roda em thread.
+    """
+    
+    def _dados(self, request):
+        # Parse do JSON
+        if request.content_type == 'application/json':
+            data = json.loads(request.body)
+        else:
+            data = request.POST.dict()
+        
+        logger.info(f"Webhook MP recebido: {data}")
+        return data
     
     def post(self, request):
         try:
-            # Parse do JSON
-            if request.content_type == 'application/json':
-                data = json.loads(request.body)
-            else:
-                data = request.POST.dict()
-            
-            logger.info(f"Webhook MP recebido: {data}")
+            data = self._dados(request)
             
             # Processar notificação
             mp_service = MercadoPagoService()
@@ -154,59 +169,113 @@ class MercadoPagoWebhookView(View):
                 
             return HttpResponse(status=200)
             
+        except ConflitoTransicao as e:
+            # Resposta de erro: o Mercado Pago reenvia a notificação
+            logger.warning(f"Webhook MP em conflito, aguardando reenvio: {str(e)}")
+            return HttpResponse(status=409)
+
         except Exception as e:
             logger.error(f"Erro no webhook MP: {str(e)}")
             return HttpResponse(status=500)
     
-    def _atualizar_pedido_por_pagamento(self, payment_info):
-        """Atualiza status do pedido baseado no pagamento"""
+    async def apost(self, request):
         try:
-            external_reference = payment_info.get("external_reference")
-            payment_status = payment_info.get("payment_status")
+            data = self._dados(request)
             
-            if external_reference:
-                pedido = Pedido.objects.get(numero_pedido=external_reference)
-                pagamento = Pagamento.objects.get(pedido=pedido)
-                
-                # Mapear status do MP para status do sistema
-                if payment_status == "approved":
-                    pedido.status = 'confirmado'
-                    pedido.pagamento_confirmado = True
-                    pagamento.status = 'aprovado'
-                    
-                elif payment_status == "rejected":
-                    pedido.status = 'cancelado'
-                    pagamento.status = 'rejeitado'
-                    
-                elif payment_status in ["pending", "in_process"]:
-                    pagamento.status = 'pendente'
-                
-                # Salvar payment_id e dados adicionais
-                pagamento.payment_id = payment_info.get("payment_data", {}).get("id")
-                pagamento.transaction_amount = payment_info.get("transaction_amount")
-                pagamento.payment_method = payment_info.get("payment_method")
-                
-                pedido.save()
-                pagamento.save()
-                
-                logger.info(f"Pedido {external_reference} atualizado para status {payment_status}")
+            mp_service = MercadoPagoService()
+            resultado = await mp_service.aprocessar_webhook_notification(data)
+            
+            if resultado["status"] == "success":
+                await sync_to_async(self._atualizar_pedido_por_pagamento)(resultado)
                 
+            return HttpResponse(status=200)
+            
+        except ConflitoTransicao as e:
+            # Resposta de erro: o Mercado Pago reenvia a notificação
+            logger.warning(f"Webhook MP em conflito, aguardando reenvio: {str(e)}")
+            return HttpResponse(status=409)
+
+        except Exception as e:
+            logger.error(f"Erro no webhook MP: {str(e)}")
+            return HttpResponse(status=500)
+    
+    def _atualizar_pedido_por_pagamento(self, payment_info):
+        """
+        Atualiza o pagamento e o status do pedido.
+
+        Os dados do pagamento são gravados antes da transição; se o pedido
+        foi alterado por outro processo ao mesmo tempo, ConflitoTransicao
+        sobe para a view responder com erro e o Mercado Pago reenviar.
+        """
+        external_reference = payment_info.get("external_reference")
+        payment_status = payment_info.get("payment_status")
+        if not external_reference:
+            return
+
+        try:
+            pedido = Pedido.objects.get(numero_pedido=external_reference)
+            pagamento = Pagamento.objects.get(pedido=pedido)
         except (Pedido.DoesNotExist, Pagamento.DoesNotExist) as e:
             logger.error(f"Pedido/Pagamento não encontrado: {str(e)}")
-        except Exception as e:
-            logger.error(f"Erro ao atualizar pedido: {str(e)}")
+            return
+
+        # Mapear status do MP para status do sistema
+        agora = timezone.now()
+        campos = ['status', 'payment_id', 'transaction_amount', 'payment_method', 'data_processamento']
+        if payment_status == "approved":
+            pagamento.status = 'aprovado'
+            pagamento.data_confirmacao = pagamento.data_confirmacao or agora
+            campos.append('data_confirmacao')
+        elif payment_status == "rejected":
+            pagamento.status = 'rejeitado'
+        elif payment_status in ["pending", "in_process"]:
+            pagamento.status = 'pendente'
 
+        # Salvar payment_id e dados adicionais
+        pagamento.payment_id = payment_info.get("payment_data", {}).get("id") or ''
+        pagamento.transaction_amount = payment_info.get("transaction_amount")
+        pagamento.payment_method = payment_info.get("payment_method") or ''
+        pagamento.data_processamento = agora
+        pagamento.save(update_fields=campos)
+
+        try:
+            if payment_status == "approved" and pedido.status == 'pendente':
+                transicionar(
+                    pedido,
+                    'confirmado',
+                    observacao='Pagamento aprovado pelo Mercado Pago',
+                    pagamento_confirmado=True,
+                )
+            elif payment_status == "rejected" and pedido.status == 'pendente':
+                transicionar(pedido, 'cancelado', observacao='Pagamento rejeitado pelo Mercado Pago')
+        except ConflitoTransicao:
+            raise
+        except TransicaoInvalida as e:
+            logger.warning(f"Webhook MP ignorado para {external_reference}: {str(e)}")
+            return
 
-class PagamentoSucessoView(LoginRequiredMixin, TemplateView):
-    """View para página de sucesso do pagamento"""
+        logger.info(f"Pedido {external_reference} atualizado para status {payment_status}")
+
+
+class PagamentoSucessoView(ViewHibridaMixin, TemplateView):
+    """
+    View para página de sucesso do pagamento.
+    
+    Em ASGI a verificação na API do Mercado Pago é assíncrona; o login é
+    conferido com ``request.auser()`` porque o LoginRequiredMixin só funciona
+    em views síncronas.
+    """
     template_name = 'pagamentos/sucesso.html'
     
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+    def get(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        
+        context = self.get_context_data(**kwargs)
         
         # Obter informações do pagamento da URL
-        payment_id = self.request.GET.get('payment_id')
-        external_reference = self.request.GET.get('external_reference')
+        payment_id = request.GET.get('payment_id')
+        external_reference = request.GET.get('external_reference')
         
         if external_reference:
             try:
@@ -220,9 +289,34 @@ class PagamentoSucessoView(LoginRequiredMixin, TemplateView):
                     context['payment_info'] = payment_info
                     
             except Pedido.DoesNotExist:
-                messages.error(self.request, "Pedido não encontrado.")
+                messages.error(request, "Pedido não encontrado.")
         
-        return context
+        return self.render_to_response(context)
+    
+    async def aget(self, request, *args, **kwargs):
+        usuario = await request.auser()
+        if not usuario.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        
+        context = self.get_context_data(**kwargs)
+        
+        payment_id = request.GET.get('payment_id')
+        external_reference = request.GET.get('external_reference')
+        
+        if external_reference:
+            pedido = await Pedido.objects.filter(numero_pedido=external_reference).afirst()
+            if pedido is not None:
+                context['pedido'] = pedido
+                
+                if payment_id:
+                    mp_service = MercadoPagoService()
+                    context['payment_info'] = await mp_service.averificar_pagamento(payment_id)
+            else:
+                messages.error(request, "Pedido não encontrado.")
+        
+        # O TemplateResponse é renderizado pelo handler em thread
+        # (context processors usam o ORM)
+        return self.render_to_response(context)
 
 
 class PagamentoFalhaView(LoginRequiredMixin, TemplateView):
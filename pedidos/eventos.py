@@ -0,0 +1,170 @@
+"""
+Notificações de status de pedido via Server-Sent Events.
+
+Cada conexão SSE assina o número do pedido em um pub/sub em memória do
+próprio processo. ``transicionar`` (pedidos.services) publica a mudança
+após o commit, e quem estiver conectado no mesmo processo recebe o evento
+na hora. Transições feitas por outro worker ou nó não passam por esse
+pub/sub, por isso cada conexão também consulta o banco a cada
+``SSE_INTERVALO_CONSULTA`` segundos (poucas colunas de uma única linha).
+
+O mesmo fluxo é servido de dois jeitos:
+
+- WSGI (gunicorn com workers gevent): gerador síncrono. As esperas em
+  ``queue.Queue`` e ``time`` ficam cooperativas com o monkey patch do gevent.
+- ASGI: gerador assíncrono, com a espera feita no event loop.
+"""
+import asyncio
+import json
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Pedido
+from .services import ao_transicionar
+
+STATUS_FINAIS = {'entregue', 'cancelado', 'devolvido'}
+CAMPOS_ESTADO = ('status', 'versao', 'pagamento_confirmado', 'codigo_rastreamento')
+
+_assinantes = {}
+_trava = threading.Lock()
+
+
+class Assinatura:
+    """Fila de eventos de uma conexão SSE"""
+
+    def __init__(self, numero_pedido, loop=None):
+        self.numero_pedido = str(numero_pedido)
+        self.loop = loop
+        self.fila = asyncio.Queue() if loop else queue.Queue()
+
+    def entregar(self, evento):
+        if self.loop:
+            # A publicação acontece na thread da requisição que mudou o pedido
+            self.loop.call_soon_threadsafe(self.fila.put_nowait, evento)
+        else:
+            self.fila.put_nowait(evento)
+
+
+def assinar(numero_pedido, loop=None):
+    assinatura = Assinatura(numero_pedido, loop)
+    with _trava:
+        _assinantes.setdefault(assinatura.numero_pedido, set()).add(assinatura)
+    return assinatura
+
+
+def cancelar_assinatura(assinatura):
+    with _trava:
+        assinaturas = _assinantes.get(assinatura.numero_pedido)
+        if assinaturas is not None:
+            assinaturas.discard(assinatura)
+            if not assinaturas:
+                del _assinantes[assinatura.numero_pedido]
+
+
+def publicar(numero_pedido, estado):
+    with _trava:
+        assinaturas = list(_assinantes.get(str(numero_pedido), ()))
+    for assinatura in assinaturas:
+        try:
+            assinatura.entregar(estado)
+        except RuntimeError:
+            # Event loop já encerrado; a conexão será removida no finally do fluxo
+            pass
+
+
+def _estado(pedido):
+    estado = {campo: getattr(pedido, campo) for campo in CAMPOS_ESTADO}
+    estado['status_display'] = dict(Pedido.STATUS_CHOICES).get(estado['status'], estado['status'])
+    return estado
+
+
+@ao_transicionar()
+def publicar_transicao(pedido, anterior, novo):
+    publicar(pedido.numero_pedido, _estado(pedido))
+
+
+def consultar_estado(numero_pedido):
+    """Estado atual do pedido direto do banco (fallback entre processos)"""
+    pedido = Pedido.objects.filter(numero_pedido=numero_pedido).only(*CAMPOS_ESTADO).first()
+    return _estado(pedido) if pedido else None
+
+
+async def aconsultar_estado(numero_pedido):
+    pedido = await Pedido.objects.filter(numero_pedido=numero_pedido).only(*CAMPOS_ESTADO).afirst()
+    return _estado(pedido) if pedido else None
+
+
+def formatar_evento(estado):
+    return f"id: {estado['versao']}\nevent: status\ndata: {json.dumps(estado)}\n\n"
+
+
+def _parametros():
+    return (
+        getattr(settings, 'SSE_INTERVALO_CONSULTA', 5),
+        getattr(settings, 'SSE_HEARTBEAT', 15),
+        getattr(settings, 'SSE_DURACAO_MAXIMA', 300),
+    )
+
+
+def fluxo_sincrono(numero_pedido, estado):
+    """Gerador de eventos para servidores WSGI (gevent)"""
+    intervalo, heartbeat, duracao = _parametros()
+    assinatura = assinar(numero_pedido)
+    try:
+        yield f"retry: {intervalo * 1000}\n" + formatar_evento(estado)
+        if estado['status'] in STATUS_FINAIS:
+            return
+
+        inicio = ultimo_envio = time.monotonic()
+        while time.monotonic() - inicio < duracao:
+            try:
+                novo = assinatura.fila.get(timeout=intervalo)
+            except queue.Empty:
+                novo = consultar_estado(numero_pedido)
+                # Não prende uma conexão do banco durante todo o streaming
+                connection.close()
+
+            if novo and novo['versao'] != estado['versao']:
+                estado = novo
+                ultimo_envio = time.monotonic()
+                yield formatar_evento(estado)
+                if estado['status'] in STATUS_FINAIS:
+                    return
+            elif time.monotonic() - ultimo_envio >= heartbeat:
+                ultimo_envio = time.monotonic()
+                yield ': ping\n\n'
+    finally:
+        cancelar_assinatura(assinatura)
+
+
+async def fluxo_assincrono(numero_pedido, estado):
+    """Gerador de eventos para servidores ASGI"""
+    intervalo, heartbeat, duracao = _parametros()
+    assinatura = assinar(numero_pedido, loop=asyncio.get_running_loop())
+    try:
+        yield f"retry: {intervalo * 1000}\n" + formatar_evento(estado)
+        if estado['status'] in STATUS_FINAIS:
+            return
+
+        inicio = ultimo_envio = time.monotonic()
+        while time.monotonic() - inicio < duracao:
+            try:
+                novo = await asyncio.wait_for(assinatura.fila.get(), timeout=intervalo)
+            except asyncio.TimeoutError:
+                novo = await aconsultar_estado(numero_pedido)
+
+            if novo and novo['versao'] != estado['versao']:
+                estado = novo
+                ultimo_envio = time.monotonic()
+                yield formatar_evento(estado)
+                if estado['status'] in STATUS_FINAIS:
+                    return
+            elif time.monotonic() - ultimo_envio >= heartbeat:
+                ultimo_envio = time.monotonic()
+                yield ': ping\n\n'
+    finally:
+        cancelar_assinatura(assinatura)
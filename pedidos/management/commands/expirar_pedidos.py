@@ -0,0 +1,61 @@
+"""
+Cancela pedidos pendentes cujo pagamento não foi confirmado a tempo.
+
+Uso:
+    python manage.py expirar_pedidos
+    python manage.py expirar_pedidos --horas 24 --lote 200
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from pedidos.models import Pedido
+from pedidos.services import expirar_pedidos_pendentes
+
+
+class Command(BaseCommand):
+    help = 'Cancela pedidos pendentes expirados e devolve o estoque reservado'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horas',
+            type=int,
+            default=getattr(settings, 'PEDIDO_PENDENTE_EXPIRACAO_HORAS', 48),
+            help='Horas sem confirmação de pagamento para expirar o pedido',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=500,
+            help='Quantidade de pedidos cancelados por transação',
+        )
+        parser.add_argument(
+            '--pausa',
+            type=float,
+            default=0.0,
+            help='Segundos de espera entre lotes',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas conta os pedidos que seriam cancelados',
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            limite = timezone.now() - timedelta(hours=options['horas'])
+            total = Pedido.objects.filter(status='pendente', data_pedido__lt=limite).count()
+            self.stdout.write(f'{total} pedidos pendentes seriam cancelados (criados antes de {limite:%d/%m/%Y %H:%M}).')
+            return
+
+        metricas = expirar_pedidos_pendentes(
+            horas=options['horas'],
+            lote=options['lote'],
+            pausa=options['pausa'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{metricas['pedidos']} pedidos cancelados; "
+            f"{metricas['unidades_liberadas']} unidades de {len(metricas['produtos'])} produtos devolvidas ao estoque."
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pedido',
+            name='estoque_reservado',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Estoque Reservado'),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='versao',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Versão'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0002_pedido_estoque_reservado_pedido_versao'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['status', 'data_pedido'], name='pedidos_status_data_idx'),
+        ),
+    ]
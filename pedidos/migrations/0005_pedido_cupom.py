@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cupons', '0001_initial'),
+        ('pedidos', '0004_pedido_cliente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pedido',
+            name='cupom',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pedidos', to='cupons.cupom', verbose_name='Cupom'),
+        ),
+    ]
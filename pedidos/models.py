@@ -27,18 +27,20 @@ class Pedido(models.Model):
     numero_pedido = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='pedidos', verbose_name="Usuário")
     
-    # Relacionamento com Cliente (será adicionado após migração)
-    # cliente = models.ForeignKey(
-    #     'clientes.Cliente', 
-    #     on_delete=models.CASCADE, 
-    #     related_name='pedidos', 
-    #     verbose_name="Cliente",
-    #     null=True,
-    #     blank=True
-    # )
+    # Cadastro do cliente; nome/e-mail/telefone abaixo continuam sendo a cópia do momento da compra
+    cliente = models.ForeignKey(
+        'clientes.Cliente', 
+        on_delete=models.SET_NULL, 
+        related_name='pedidos', 
+        verbose_name="Cliente",
+        null=True,
+        blank=True
+    )
     
     # Status e datas
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pendente', verbose_name="Status")
+    versao = models.PositiveIntegerField(default=0, editable=False, verbose_name="Versão")  # bloqueio otimista (pedidos.services)
+    estoque_reservado = models.BooleanField(default=False, editable=False, verbose_name="Estoque Reservado")
     data_pedido = models.DateTimeField(auto_now_add=True, verbose_name="Data do Pedido")
     data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Última Atualização")
     data_envio = models.DateTimeField(blank=True, null=True, verbose_name="Data de Envio")
@@ -62,6 +64,14 @@ class Pedido(models.Model):
     subtotal = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Subtotal")
     valor_frete = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Valor do Frete")
     desconto = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Desconto")
+    cupom = models.ForeignKey(
+        'cupons.Cupom',
+        on_delete=models.SET_NULL,
+        related_name='pedidos',
+        verbose_name="Cupom",
+        null=True,
+        blank=True
+    )
     total = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Total")
     
     # Pagamento
@@ -77,6 +87,12 @@ class Pedido(models.Model):
         verbose_name = "Pedido"
         verbose_name_plural = "Pedidos"
         ordering = ['-data_pedido']
+        indexes = [
+            # Varredura de pedidos pendentes expirados (expirar_pedidos)
+            models.Index(fields=['status', 'data_pedido'], name='pedidos_status_data_idx'),
+            # Estatísticas e segmentação por cliente (clientes.services)
+            models.Index(fields=['cliente', 'status', 'data_pedido'], name='pedidos_cliente_status_idx'),
+        ]
 
     def __str__(self):
         return f'Pedido #{str(self.numero_pedido)[:8]}'
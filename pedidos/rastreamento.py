@@ -0,0 +1,133 @@
+"""
+Dados da página pública de rastreamento.
+
+A página é aberta sem login e recarregada com frequência por quem aguarda a
+entrega, então o conteúdo é montado uma vez por mudança do pedido e guardado
+no cache. A chave de cache é por pedido; ela é invalidada a cada transição de
+status (hook de pedidos.services) e a cada ``save`` do Pedido (ex.: código de
+rastreamento informado no admin). O ETag da variante JSON deriva de
+``versao`` e ``data_atualizacao``, o que permite responder 304 sem
+serializar nada.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Pedido
+from .services import ao_transicionar
+
+# Marcador para números de pedido inexistentes (evita consultas repetidas)
+_INEXISTENTE = 'inexistente'
+
+
+def _chave(numero_pedido):
+    return f'pedidos:rastreio:v2:{numero_pedido}'
+
+
+def _montar(pedido):
+    itens = [
+        {
+            'nome_produto': item.nome_produto,
+            'quantidade': item.quantidade,
+            'tamanho': item.tamanho,
+            'cor': item.cor,
+            'total_item': item.total_item,
+        }
+        for item in pedido.itens.all()
+    ]
+    historico = [
+        {
+            'status': status.status,
+            'status_display': status.get_status_display(),
+            'data': status.data_alteracao,
+        }
+        for status in pedido.historico_status.all()
+    ]
+    etag = hashlib.md5(
+        f'{pedido.numero_pedido}:{pedido.versao}:{pedido.data_atualizacao.isoformat()}'.encode()
+    ).hexdigest()
+    return {
+        'etag': etag,
+        'ultima_modificacao': pedido.data_atualizacao,
+        'pedido': {
+            'numero_pedido': str(pedido.numero_pedido),
+            'status': pedido.status,
+            'get_status_display': pedido.get_status_display(),
+            'data_pedido': pedido.data_pedido,
+            'data_envio': pedido.data_envio,
+            'data_entrega': pedido.data_entrega,
+            'pagamento_confirmado': pedido.pagamento_confirmado,
+            # O cache é invalidado a cada mudança de status
+            'pode_cancelar': pedido.pode_cancelar(),
+            'get_forma_pagamento_display': pedido.get_forma_pagamento_display(),
+            'codigo_rastreamento': pedido.codigo_rastreamento,
+            'total': pedido.total,
+            'total_itens': sum(item['quantidade'] for item in itens),
+        },
+        'entrega': {
+            'nome_cliente': pedido.nome_cliente,
+            'endereco': pedido.endereco,
+            'numero': pedido.numero,
+            'complemento': pedido.complemento,
+            'bairro': pedido.bairro,
+            'cidade': pedido.cidade,
+            'estado': pedido.estado,
+            'cep': pedido.cep,
+            'telefone_cliente': pedido.telefone_cliente,
+            'email_cliente': pedido.email_cliente,
+        },
+        'itens': itens,
+        'historico': historico,
+    }
+
+
+def dados_rastreamento(numero_pedido):
+    """Retorna os dados de rastreamento do pedido (do cache quando possível) ou None"""
+    chave = _chave(numero_pedido)
+    dados = cache.get(chave)
+    if dados == _INEXISTENTE:
+        return None
+    if dados is not None:
+        return dados
+
+    pedido = (
+        Pedido.objects.filter(numero_pedido=numero_pedido)
+        .prefetch_related('itens', 'historico_status')
+        .first()
+    )
+    if pedido is None:
+        cache.set(chave, _INEXISTENTE, 60)
+        return None
+
+    dados = _montar(pedido)
+    cache.set(chave, dados, getattr(settings, 'RASTREIO_CACHE_TIMEOUT', 60 * 60))
+    return dados
+
+
+def invalidar_rastreamento(numero_pedido):
+    cache.delete(_chave(numero_pedido))
+
+
+def limite_excedido(numero_pedido):
+    """
+    Contador por número de pedido em janelas de um minuto.
+
+    Retorna True quando o pedido já recebeu mais de RASTREIO_LIMITE_POR_MINUTO
+    requisições na janela atual.
+    """
+    limite = getattr(settings, 'RASTREIO_LIMITE_POR_MINUTO', 30)
+    chave = f'pedidos:rastreio:limite:{numero_pedido}'
+    if cache.add(chave, 1, 60):
+        return False
+    try:
+        return cache.incr(chave) > limite
+    except ValueError:
+        # A chave expirou entre o add e o incr
+        cache.add(chave, 1, 60)
+        return False
+
+
+@ao_transicionar()
+def invalidar_cache_rastreamento(pedido, anterior, novo):
+    invalidar_rastreamento(pedido.numero_pedido)
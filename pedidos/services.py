@@ -0,0 +1,314 @@
+"""
+Máquina de estados dos pedidos.
+
+Toda mudança de status passa por ``transicionar``:
+
+- a gravação é um ``UPDATE ... WHERE status = <esperado> AND versao = <lida>``
+  que escreve só os campos alterados; se outro processo mudou o pedido antes,
+  nenhuma linha é afetada e ConflitoTransicao é levantada;
+- o StatusPedido do histórico, a liberação de estoque e a devolução do uso
+  do cupom (no cancelamento) vão na mesma transação;
+- e-mails e demais efeitos externos rodam em hooks após o commit.
+"""
+from collections import defaultdict
+from datetime import timedelta
+import logging
+import time
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from cupons.services import liberar_usos
+from produtos.models import Produto
+from .models import ItemPedido, Pedido, StatusPedido
+
+logger = logging.getLogger(__name__)
+
+
+TRANSICOES = {
+    'pendente': {'confirmado', 'cancelado'},
+    'confirmado': {'processando', 'enviado', 'cancelado'},
+    'processando': {'enviado', 'cancelado'},
+    'enviado': {'entregue', 'devolvido'},
+    'entregue': {'devolvido'},
+    'cancelado': set(),
+    'devolvido': set(),
+}
+
+# Status de pedidos que contam como compra realizada (estatísticas, recomendações)
+STATUS_COMPRA = ('confirmado', 'processando', 'enviado', 'entregue')
+
+
+class TransicaoInvalida(Exception):
+    """O status atual do pedido não permite a transição pedida"""
+
+
+class ConflitoTransicao(TransicaoInvalida):
+    """O pedido foi alterado por outro processo entre a leitura e a gravação"""
+
+
+_hooks = defaultdict(list)
+
+
+def ao_transicionar(*status):
+    """
+    Registra uma função chamada após o commit de cada transição.
+
+    A função recebe (pedido, status_anterior, status_novo). Sem argumentos o
+    hook vale para qualquer status de destino.
+    """
+    def registrar(funcao):
+        for destino in status or (None,):
+            _hooks[destino].append(funcao)
+        return funcao
+    return registrar
+
+
+def _executar_hooks(pedido, anterior, novo):
+    for funcao in _hooks[novo] + _hooks[None]:
+        try:
+            funcao(pedido, anterior, novo)
+        except Exception as e:
+            logger.error(f"Erro no hook {funcao.__name__} do pedido {pedido.numero_pedido}: {str(e)}")
+
+
+def _somar_por_produto(itens):
+    quantidades = defaultdict(int)
+    for produto_id, quantidade in itens:
+        quantidades[produto_id] += quantidade
+    return quantidades
+
+
+def _ajustar_estoque(quantidades, sinal):
+    """Soma (sinal=1) ou subtrai (sinal=-1) estoque de vários produtos em um único UPDATE"""
+    if not quantidades:
+        return 0
+    ajuste = Case(
+        *[When(pk=produto_id, then=Value(sinal * quantidade)) for produto_id, quantidade in quantidades.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    return Produto.objects.filter(pk__in=quantidades).update(
+        estoque_virtual=F('estoque_virtual') + ajuste,
+        data_atualizacao=timezone.now(),  # ETags da API do catálogo (produtos.api)
+    )
+
+
+def reservar_estoque(pedido, itens):
+    """
+    Retira do estoque as quantidades do pedido recém-criado.
+
+    ``itens`` é uma sequência de (produto_id, quantidade).
+    """
+    _ajustar_estoque(_somar_por_produto(itens), -1)
+    Pedido.objects.filter(pk=pedido.pk).update(estoque_reservado=True)
+    pedido.estoque_reservado = True
+
+
+def liberar_estoque(pedido_ids):
+    """
+    Devolve ao estoque os itens dos pedidos informados que ainda têm reserva.
+
+    Deve rodar dentro de uma transação que já travou/atualizou esses pedidos.
+    Retorna {produto_id: quantidade devolvida}.
+    """
+    quantidades = dict(
+        ItemPedido.objects.filter(pedido_id__in=pedido_ids)
+        .values('produto_id')
+        .annotate(total=Sum('quantidade'))
+        .values_list('produto_id', 'total')
+    )
+    _ajustar_estoque(quantidades, 1)
+    return quantidades
+
+
+def transicionar(pedido, novo_status, observacao='', usuario=None, **campos):
+    """
+    Muda o status do pedido com bloqueio otimista.
+
+    ``campos`` são atributos extras gravados no mesmo UPDATE (ex.:
+    pagamento_confirmado=True, transaction_id=...). O objeto ``pedido`` é
+    atualizado em memória e devolvido.
+    """
+    anterior = pedido.status
+    if novo_status not in TRANSICOES.get(anterior, set()):
+        raise TransicaoInvalida(
+            f'Pedido {pedido} não pode passar de "{anterior}" para "{novo_status}"'
+        )
+
+    agora = timezone.now()
+    valores = dict(campos, status=novo_status, data_atualizacao=agora)
+    if novo_status == 'enviado' and not pedido.data_envio:
+        valores['data_envio'] = agora
+    elif novo_status == 'entregue' and not pedido.data_entrega:
+        valores['data_entrega'] = agora
+
+    liberar = novo_status == 'cancelado' and pedido.estoque_reservado
+    if liberar:
+        valores['estoque_reservado'] = False
+
+    with transaction.atomic():
+        atualizados = Pedido.objects.filter(
+            pk=pedido.pk, status=anterior, versao=pedido.versao
+        ).update(versao=F('versao') + 1, **valores)
+        if not atualizados:
+            raise ConflitoTransicao(f'Pedido {pedido} foi alterado por outro processo')
+
+        StatusPedido.objects.create(
+            pedido=pedido,
+            status=novo_status,
+            observacao=observacao,
+            usuario_alteracao=usuario,
+        )
+        if liberar:
+            liberar_estoque([pedido.pk])
+        if novo_status == 'cancelado':
+            liberar_usos([(pedido.cupom_id, pedido.usuario_id)])
+
+        for campo, valor in valores.items():
+            setattr(pedido, campo, valor)
+        pedido.versao += 1
+        transaction.on_commit(lambda: _executar_hooks(pedido, anterior, novo_status))
+
+    return pedido
+
+
+def _notificar_expirados(ids):
+    for pedido in Pedido.objects.filter(pk__in=ids).iterator():
+        _executar_hooks(pedido, 'pendente', 'cancelado')
+
+
+def expirar_pedidos_pendentes(horas=None, lote=500, pausa=0.0):
+    """
+    Cancela pedidos pendentes há mais de ``horas`` e devolve o estoque reservado.
+
+    Cada lote é uma transação curta: um UPDATE para os pedidos, um UPDATE
+    (Case/When) para os produtos, a devolução dos usos de cupom e um
+    bulk_create para o histórico. Os hooks
+    de transição (e-mail de cancelamento etc.) rodam após o commit de cada
+    lote. Retorna as métricas da execução.
+    """
+    if horas is None:
+        horas = getattr(settings, 'PEDIDO_PENDENTE_EXPIRACAO_HORAS', 48)
+    limite = timezone.now() - timedelta(hours=horas)
+    observacao = f'Cancelado automaticamente: pagamento não confirmado em {horas}h'
+
+    metricas = {'pedidos': 0, 'unidades_liberadas': 0, 'produtos': defaultdict(int)}
+    ultimo_id = 0
+    while True:
+        with transaction.atomic():
+            pendentes = Pedido.objects.filter(
+                status='pendente', data_pedido__lt=limite, pk__gt=ultimo_id
+            ).order_by('pk')
+            if connection.features.has_select_for_update:
+                # Com skip_locked, pedidos sendo pagos neste instante ficam
+                # para a próxima execução em vez de bloquear a varredura
+                pendentes = pendentes.select_for_update(
+                    skip_locked=connection.features.has_select_for_update_skip_locked
+                )
+            linhas = list(pendentes.values_list('pk', 'estoque_reservado', 'cupom_id', 'usuario_id')[:lote])
+            if not linhas:
+                break
+            ids = [linha[0] for linha in linhas]
+
+            cancelados = Pedido.objects.filter(pk__in=ids, status='pendente').update(
+                status='cancelado',
+                estoque_reservado=False,
+                versao=F('versao') + 1,
+                data_atualizacao=timezone.now(),
+            )
+            if cancelados != len(ids):
+                # Sem SELECT FOR UPDATE, algum pedido mudou de status entre a
+                # leitura e o UPDATE (ex.: pagamento confirmado): desfaz o lote
+                # e o relê, já sem esse pedido
+                transaction.set_rollback(True)
+                continue
+            ultimo_id = linhas[-1][0]
+            liberados = liberar_estoque([pk for pk, reservado, cupom_id, usuario_id in linhas if reservado])
+            liberar_usos([(cupom_id, usuario_id) for pk, reservado, cupom_id, usuario_id in linhas])
+            StatusPedido.objects.bulk_create([
+                StatusPedido(pedido_id=pk, status='cancelado', observacao=observacao)
+                for pk in ids
+            ])
+            transaction.on_commit(lambda ids=ids: _notificar_expirados(ids))
+
+        metricas['pedidos'] += len(ids)
+        for produto_id, quantidade in liberados.items():
+            metricas['produtos'][produto_id] += quantidade
+            metricas['unidades_liberadas'] += quantidade
+
+        if pausa:
+            time.sleep(pausa)
+
+    metricas['produtos'] = dict(metricas['produtos'])
+    if metricas['pedidos']:
+        logger.info(
+            f"{metricas['pedidos']} pedidos pendentes expirados; "
+            f"{metricas['unidades_liberadas']} unidades de {len(metricas['produtos'])} produtos devolvidas ao estoque"
+        )
+    return metricas
+
+
+# E-mail enviado ao cliente para cada status de destino
+ACOES_EMAIL = {
+    'confirmado': 'pago',
+    'enviado': 'enviado',
+    'entregue': 'entregue',
+    'cancelado': 'cancelado',
+}
+
+
+@ao_transicionar(*ACOES_EMAIL)
+def notificar_cliente(pedido, anterior, novo):
+    enviar_email_status_pedido(pedido, ACOES_EMAIL[novo])
+
+
+def enviar_email_status_pedido(pedido, acao):
+    """
+    Envia email para o cliente informando sobre mudanças no status do pedido.
+    """
+    try:
+        assuntos = {
+            'criado': f'Pedido #{str(pedido.numero_pedido)[:8]} - Criado com Sucesso!',
+            'pago': f'Pedido #{str(pedido.numero_pedido)[:8]} - Pagamento Confirmado!',
+            'enviado': f'Pedido #{str(pedido.numero_pedido)[:8]} - Enviado!',
+            'entregue': f'Pedido #{str(pedido.numero_pedido)[:8]} - Entregue!',
+            'cancelado': f'Pedido #{str(pedido.numero_pedido)[:8]} - Cancelado',
+        }
+        
+        mensagens = {
+            'criado': f'Seu pedido foi criado com sucesso e está aguardando pagamento.\n\n'
+                     f'Total: R$ {pedido.total}\n'
+                     f'Forma de pagamento: {pedido.get_forma_pagamento_display()}\n\n'
+                     f'Você pode acompanhar o status do seu pedido em nosso site.',
+            
+            'pago': 'Seu pagamento foi confirmado com sucesso!\n\n'
+                   'Agora seu pedido entrará em processamento e será enviado em breve.\n'
+                   'Você receberá um email com o código de rastreamento assim que o produto for despachado.',
+            
+            'enviado': f'Seu pedido foi enviado!\n\n'
+                      f'Código de rastreamento: {pedido.codigo_rastreamento}\n'
+                      f'Você pode acompanhar a entrega através do nosso site ou diretamente nos Correios.',
+            
+            'entregue': 'Seu pedido foi entregue com sucesso!\n\n'
+                       'Esperamos que você tenha gostado dos produtos.\n'
+                       'Sua opinião é muito importante para nós!',
+            
+            'cancelado': 'Seu pedido foi cancelado.\n\n'
+                        'Se o pagamento já foi realizado, o estorno será processado em até 5 dias úteis.\n'
+                        'Em caso de dúvidas, entre em contato conosco.'
+        }
+        
+        send_mail(
+            subject=assuntos.get(acao, 'Atualização do Pedido'),
+            message=mensagens.get(acao, 'Seu pedido foi atualizado.'),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[pedido.email_cliente],
+            fail_silently=True,
+        )
+        
+    except Exception:
+        logger.exception(f'Erro ao enviar e-mail "{acao}" do pedido {pedido.numero_pedido}')
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Pedido
+from .rastreamento import invalidar_rastreamento
+
+
+@receiver([post_save, post_delete], sender=Pedido)
+def pedido_alterado(sender, instance, **kwargs):
+    # Transições via pedidos.services usam UPDATE e invalidam pelo hook;
+    # aqui ficam as edições feitas pelo admin (status, código de rastreamento)
+    invalidar_rastreamento(instance.numero_pedido)
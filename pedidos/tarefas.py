@@ -0,0 +1,11 @@
+from agendador.registro import tarefa
+from .services import expirar_pedidos_pendentes
+
+
+@tarefa('*/15 * * * *', jitter=60)
+def expirar_pedidos():
+    metricas = expirar_pedidos_pendentes(pausa=0.1)
+    return (
+        f"{metricas['pedidos']} pedidos cancelados; "
+        f"{metricas['unidades_liberadas']} unidades devolvidas ao estoque"
+    )
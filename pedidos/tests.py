@@ -1,3 +1,154 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
 from django.test import TestCase
+from django.utils import timezone
+
+from fornecedores.models import Fornecedor
+from produtos.models import Categoria, Produto
+from .models import ItemPedido, Pedido, StatusPedido
+from .services import (
+    ConflitoTransicao, TransicaoInvalida, expirar_pedidos_pendentes, reservar_estoque, transicionar,
+)
+
+
+def criar_pedido(usuario, produto, quantidade, **campos):
+    """Pedido pendente com um item de ``produto`` e o estoque já reservado"""
+    dados = dict(
+        usuario=usuario,
+        nome_cliente='Cliente Teste',
+        email_cliente='cliente@example.com',
+        telefone_cliente='11999999999',
+        cep='01001-000',
+        endereco='Praça da Sé',
+        numero='1',
+        bairro='Sé',
+        cidade='São Paulo',
+        estado='SP',
+        subtotal=produto.preco * quantidade,
+        total=produto.preco * quantidade,
+        forma_pagamento='pix',
+    )
+    dados.update(campos)
+    pedido = Pedido.objects.create(**dados)
+    ItemPedido.objects.create(
+        pedido=pedido,
+        produto=produto,
+        nome_produto=produto.nome,
+        preco_unitario=produto.preco,
+        quantidade=quantidade,
+        fornecedor_nome=produto.fornecedor.nome,
+        fornecedor_email=produto.fornecedor.email,
+    )
+    reservar_estoque(pedido, [(produto.pk, quantidade)])
+    return pedido
+
+
+class TransicionarTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('cliente', 'cliente@example.com', 'senha')
+        categoria = Categoria.objects.create(nome='Lingerie')
+        fornecedor = Fornecedor.objects.create(nome='Fornecedor', email='fornecedor@example.com')
+        cls.produto = Produto.objects.create(
+            nome='Conjunto Renda', descricao='Conjunto', preco=Decimal('100.00'),
+            categoria=categoria, fornecedor=fornecedor, estoque_virtual=10,
+        )
+
+    def estoque(self):
+        return Produto.objects.values_list('estoque_virtual', flat=True).get(pk=self.produto.pk)
+
+    def test_grava_status_versao_e_historico(self):
+        pedido = criar_pedido(self.usuario, self.produto, 1)
+
+        transicionar(pedido, 'confirmado', observacao='Pago')
+
+        pedido.refresh_from_db()
+        self.assertEqual(pedido.status, 'confirmado')
+        self.assertEqual(pedido.versao, 1)
+        self.assertEqual(
+            list(StatusPedido.objects.filter(pedido=pedido).values_list('status', flat=True)),
+            ['confirmado'],
+        )
+
+    def test_transicao_fora_da_tabela_e_recusada(self):
+        pedido = criar_pedido(self.usuario, self.produto, 1)
+
+        with self.assertRaises(TransicaoInvalida):
+            transicionar(pedido, 'entregue')
+
+        pedido.refresh_from_db()
+        self.assertEqual(pedido.status, 'pendente')
+        self.assertEqual(pedido.versao, 0)
+
+    def test_versao_desatualizada_levanta_conflito(self):
+        pedido = criar_pedido(self.usuario, self.produto, 1)
+        copia = Pedido.objects.get(pk=pedido.pk)
+        transicionar(pedido, 'confirmado')
+
+        # A cópia ainda tem versao 0; o status também não bate mais
+        with self.assertRaises(ConflitoTransicao):
+            transicionar(copia, 'cancelado')
+
+        copia = Pedido.objects.get(pk=pedido.pk)
+        Pedido.objects.filter(pk=pedido.pk).update(versao=5)
+        # Mesmo status, versão diferente
+        with self.assertRaises(ConflitoTransicao):
+            transicionar(copia, 'enviado')
+
+        pedido.refresh_from_db()
+        self.assertEqual(pedido.status, 'confirmado')
+        self.assertEqual(StatusPedido.objects.filter(pedido=pedido).count(), 1)
+
+    def test_cancelamento_devolve_estoque_uma_vez(self):
+        pedido = criar_pedido(self.usuario, self.produto, 3)
+        copia = Pedido.objects.get(pk=pedido.pk)
+        self.assertEqual(self.estoque(), 7)
+
+        transicionar(pedido, 'cancelado')
+        self.assertEqual(self.estoque(), 10)
+        self.assertFalse(Pedido.objects.get(pk=pedido.pk).estoque_reservado)
+
+        # Cancelar de novo, pelo mesmo objeto ou por uma cópia antiga, não devolve outra vez
+        with self.assertRaises(TransicaoInvalida):
+            transicionar(pedido, 'cancelado')
+        with self.assertRaises(ConflitoTransicao):
+            transicionar(copia, 'cancelado')
+        self.assertEqual(self.estoque(), 10)
+
+    def test_expiracao_ignora_pedido_confirmado_durante_o_lote(self):
+        antigo = timezone.now() - timedelta(days=3)
+        esquecido = criar_pedido(self.usuario, self.produto, 2)
+        pago = criar_pedido(self.usuario, self.produto, 3)
+        Pedido.objects.update(data_pedido=antigo)
+        lido_pendente = Pedido.objects.filter(pk=pago.pk).values_list(
+            'pk', 'estoque_reservado', 'cupom_id', 'usuario_id'
+        ).get()
+        transicionar(pago, 'confirmado')
+        self.assertEqual(self.estoque(), 5)
+
+        values_list = QuerySet.values_list
+        leituras = []
+
+        def leitura_desatualizada(queryset, *campos, **kwargs):
+            # Simula o pagamento confirmado entre a leitura do lote e o UPDATE
+            resultado = values_list(queryset, *campos, **kwargs)
+            if queryset.model is Pedido and 'cupom_id' in campos and not leituras:
+                leituras.append(campos)
+                return sorted([*resultado, lido_pendente])
+            return resultado
+
+        with mock.patch.object(QuerySet, 'values_list', leitura_desatualizada):
+            metricas = expirar_pedidos_pendentes(horas=48)
 
-# Create your tests here.
+        self.assertEqual(metricas['pedidos'], 1)
+        self.assertEqual(metricas['unidades_liberadas'], 2)
+        self.assertEqual(self.estoque(), 7)
+        self.assertEqual(Pedido.objects.get(pk=esquecido.pk).status, 'cancelado')
+        pago.refresh_from_db()
+        self.assertEqual(pago.status, 'confirmado')
+        self.assertTrue(pago.estoque_reservado)
+        self.assertFalse(StatusPedido.objects.filter(pedido=pago, status='cancelado').exists())
@@ -18,6 +18,8 @@ urlpatterns = [
     path('confirmacao/<uuid:numero_pedido>/', views.ConfirmacaoView.as_view(), name='confirmacao'),
     path('pedido/<uuid:numero_pedido>/', views.PedidoDetailView.as_view(), name='detalhe'),
     path('rastrear/<uuid:numero_pedido>/', views.RastrearPedidoView.as_view(), name='rastrear'),
+    path('rastrear/<uuid:numero_pedido>/json/', views.RastrearPedidoView.as_view(formato='json'), name='rastrear_json'),
+    path('eventos/<uuid:numero_pedido>/', views.eventos_pedido, name='eventos'),
     
     # Ações do pedido
     path('cancelar/<uuid:numero_pedido>/', views.cancelar_pedido, name='cancelar'),
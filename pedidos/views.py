@@ -1,16 +1,22 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.generic import TemplateView, DetailView, FormView, ListView
+from django.views.generic import TemplateView, DetailView, FormView, ListView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from django.urls import reverse_lazy
 from django.db import transaction
-from django.core.mail import send_mail
-from django.conf import settings
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from decimal import Decimal
 from .models import Pedido, ItemPedido, StatusPedido
+from .eventos import consultar_estado, fluxo_assincrono, fluxo_sincrono
+from .rastreamento import dados_rastreamento, limite_excedido
+from .services import TransicaoInvalida, enviar_email_status_pedido, reservar_estoque, transicionar
 from carrinho.models import Carrinho
+from clientes.services import obter_ou_criar_cliente
+from cupons.services import CupomInvalido, aplicar_cupom, registrar_uso
 from produtos.models import Produto
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
@@ -106,7 +112,7 @@ def finalizar_pedido(request):
             
             # Validar estoque antes de criar o pedido
             itens_validados = []
-            for item_carrinho in carrinho.itens.all():
+            for item_carrinho in carrinho.itens.select_related('produto'):
                 produto = item_carrinho.produto
                 
                 # Verificar se o produto ainda está ativo
@@ -115,26 +121,43 @@ def finalizar_pedido(request):
                     return redirect('carrinho:carrinho')
                 
                 # Verificar estoque
-                if produto.estoque < item_carrinho.quantidade:
+                if produto.estoque_disponivel() < item_carrinho.quantidade:
                     messages.error(
                         request, 
                         f'Estoque insuficiente para "{produto.nome}". '
-                        f'Disponível: {produto.estoque}, Solicitado: {item_carrinho.quantidade}'
+                        f'Disponível: {produto.estoque_disponivel()}, Solicitado: {item_carrinho.quantidade}'
                     )
                     return redirect('carrinho:carrinho')
                 
                 itens_validados.append(item_carrinho)
             
+            # Cupom de desconto (avaliado sobre os itens já carregados)
+            cupom, desconto = None, Decimal('0')
+            codigo_cupom = request.POST.get('codigo_cupom', '').strip()
+            if codigo_cupom:
+                try:
+                    cupom, desconto = aplicar_cupom(codigo_cupom, itens_validados, request.user)
+                    registrar_uso(cupom, request.user)
+                except CupomInvalido as e:
+                    transaction.set_rollback(True)
+                    messages.error(request, str(e))
+                    return redirect('pedidos:checkout')
+            
+            subtotal = sum(item.total for item in itens_validados)
+            
             # Criar o pedido
             pedido = Pedido.objects.create(
                 usuario=request.user,
-                subtotal=carrinho.subtotal,
+                cliente=obter_ou_criar_cliente(request.user, dados_entrega),
+                subtotal=subtotal,
                 valor_frete=carrinho.valor_frete,
-                total=carrinho.total,
+                desconto=desconto,
+                cupom=cupom,
+                total=subtotal + carrinho.valor_frete - desconto,
                 **dados_entrega
             )
             
-            # Criar itens do pedido e reduzir estoque temporariamente
+            # Criar itens do pedido
             for item_carrinho in itens_validados:
                 produto = item_carrinho.produto
                 
@@ -149,10 +172,9 @@ def finalizar_pedido(request):
                     fornecedor_nome=produto.fornecedor.nome if produto.fornecedor else '',
                     fornecedor_email=produto.fornecedor.email if produto.fornecedor else '',
                 )
-                
-                # Reservar estoque (será confirmado após pagamento)
-                produto.estoque -= item_carrinho.quantidade
-                produto.save()
+            
+            # Reservar estoque (devolvido se o pedido for cancelado)
+            reservar_estoque(pedido, [(item.produto_id, item.quantidade) for item in itens_validados])
             
             # Criar histórico de status inicial
             StatusPedido.objects.create(
@@ -211,44 +233,24 @@ def confirmar_pagamento(request):
             pedido = get_object_or_404(Pedido, numero_pedido=numero_pedido)
             
             if status_pagamento == 'approved':
-                with transaction.atomic():
-                    # Confirmar pagamento
-                    pedido.pagamento_confirmado = True
-                    pedido.transaction_id = transaction_id
-                    pedido.status = 'confirmado'
-                    pedido.save()
-                    
-                    # Atualizar histórico
-                    StatusPedido.objects.create(
-                        pedido=pedido,
-                        status='confirmado',
-                        observacao=f'Pagamento confirmado. ID: {transaction_id}'
+                if pedido.status != 'confirmado':
+                    transicionar(
+                        pedido,
+                        'confirmado',
+                        observacao=f'Pagamento confirmado. ID: {transaction_id}',
+                        pagamento_confirmado=True,
+                        transaction_id=transaction_id,
                     )
-                    
-                    # Enviar email
-                    enviar_email_status_pedido(pedido, 'pago')
-                    
                 return JsonResponse({'status': 'success'})
             
             elif status_pagamento == 'rejected':
-                # Restaurar estoque em caso de rejeição
-                with transaction.atomic():
-                    for item in pedido.itens.all():
-                        produto = item.produto
-                        produto.estoque += item.quantidade
-                        produto.save()
-                    
-                    pedido.status = 'cancelado'
-                    pedido.save()
-                    
-                    StatusPedido.objects.create(
-                        pedido=pedido,
-                        status='cancelado',
-                        observacao='Pagamento rejeitado - estoque restaurado'
-                    )
-                    
+                # Cancelamento devolve o estoque reservado
+                if pedido.status != 'cancelado':
+                    transicionar(pedido, 'cancelado', observacao='Pagamento rejeitado - estoque restaurado')
                 return JsonResponse({'status': 'payment_rejected'})
                 
+        except TransicaoInvalida as e:
+            return JsonResponse({'status': 'conflict', 'message': str(e)}, status=409)
         except Exception as e:
             return JsonResponse({'status': 'error', 'message': str(e)})
     
@@ -267,20 +269,18 @@ def confirmar_pagamento_manual(request, numero_pedido):
         status='pendente'
     )
     
-    with transaction.atomic():
-        pedido.pagamento_confirmado = True
-        pedido.transaction_id = f'MANUAL_{timezone.now().strftime("%Y%m%d%H%M%S")}'
-        pedido.status = 'confirmado'
-        pedido.save()
-        
-        StatusPedido.objects.create(
-            pedido=pedido,
-            status='confirmado',
+    try:
+        transicionar(
+            pedido,
+            'confirmado',
             observacao='Pagamento confirmado manualmente (teste)',
-            usuario_alteracao=request.user
+            usuario=request.user,
+            pagamento_confirmado=True,
+            transaction_id=f'MANUAL_{timezone.now().strftime("%Y%m%d%H%M%S")}',
         )
-        
-        enviar_email_status_pedido(pedido, 'pago')
+    except TransicaoInvalida:
+        messages.error(request, 'O status do pedido foi alterado. Atualize a página.')
+        return redirect('pedidos:detalhe', numero_pedido=numero_pedido)
         
     messages.success(request, 'Pagamento confirmado com sucesso!')
     return redirect('pedidos:confirmacao', numero_pedido=numero_pedido)
@@ -319,20 +319,73 @@ class PedidoDetailView(LoginRequiredMixin, DetailView):
         return context
 
 
-class RastrearPedidoView(DetailView):
+class RastrearPedidoView(View):
     """
     View pública para rastreamento de pedido (não requer login).
+    
+    Os dados vêm de pedidos.rastreamento (cache por pedido). Com
+    formato='json' serve a variante usada por clientes que fazem polling,
+    sem os dados de contato e endereço; essa leva ETag/Last-Modified, então
+    consultas sem mudança recebem 304. O HTML não: o cabeçalho do site
+    (carrinho, mensagens) muda sem que o pedido mude.
     """
-    model = Pedido
     template_name = 'pedidos/rastrear.html'
-    context_object_name = 'pedido'
-    slug_field = 'numero_pedido'
-    slug_url_kwarg = 'numero_pedido'
+    formato = 'html'
     
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['historico'] = self.object.historico_status.all()
-        return context
+    def get(self, request, numero_pedido):
+        if limite_excedido(numero_pedido):
+            resposta = HttpResponse('Muitas consultas para este pedido. Tente novamente em instantes.', status=429)
+            resposta['Retry-After'] = '60'
+            return resposta
+        
+        dados = dados_rastreamento(numero_pedido)
+        if dados is None:
+            raise Http404('Pedido não encontrado')
+        
+        if self.formato == 'html':
+            resposta = render(request, self.template_name, {
+                'pedido': dict(dados['pedido'], **dados['entrega']),
+                'itens': dados['itens'],
+                'historico': dados['historico'],
+            })
+            patch_cache_control(resposta, private=True, no_cache=True)
+            return resposta
+        
+        etag = quote_etag(dados['etag'])
+        ultima_modificacao = int(dados['ultima_modificacao'].timestamp())
+        resposta = get_conditional_response(request, etag=etag, last_modified=ultima_modificacao)
+        if resposta is None:
+            resposta = JsonResponse({
+                'pedido': dados['pedido'],
+                'itens': dados['itens'],
+                'historico': dados['historico'],
+            })
+        
+        resposta['ETag'] = etag
+        resposta['Last-Modified'] = http_date(ultima_modificacao)
+        patch_cache_control(resposta, private=True, no_cache=True)
+        return resposta
+
+
+def eventos_pedido(request, numero_pedido):
+    """
+    Stream SSE com as mudanças de status do pedido (público, como o rastreamento).
+    
+    Em WSGI/gevent o stream é um gerador síncrono; em ASGI, assíncrono.
+    """
+    estado = consultar_estado(numero_pedido)
+    if estado is None:
+        raise Http404('Pedido não encontrado')
+    
+    if isinstance(request, ASGIRequest):
+        fluxo = fluxo_assincrono(numero_pedido, estado)
+    else:
+        fluxo = fluxo_sincrono(numero_pedido, estado)
+    
+    resposta = StreamingHttpResponse(fluxo, content_type='text/event-stream')
+    resposta['Cache-Control'] = 'no-cache'
+    resposta['X-Accel-Buffering'] = 'no'  # nginx: entrega cada evento imediatamente
+    return resposta
 
 
 @login_required
@@ -353,77 +406,20 @@ def cancelar_pedido(request, numero_pedido):
     if request.method == 'POST':
         motivo = request.POST.get('motivo', 'Cancelado pelo cliente')
         
-        with transaction.atomic():
-            # Restaurar estoque
-            for item in pedido.itens.all():
-                produto = item.produto
-                produto.estoque += item.quantidade
-                produto.save()
-            
-            # Atualizar status do pedido
-            pedido.status = 'cancelado'
-            pedido.save()
-            
-            # Registrar no histórico
-            StatusPedido.objects.create(
-                pedido=pedido,
-                status='cancelado',
+        try:
+            # Estoque devolvido, histórico e e-mail ficam a cargo da transição
+            transicionar(
+                pedido,
+                'cancelado',
                 observacao=f'Cancelado pelo cliente. Motivo: {motivo}',
-                usuario_alteracao=request.user
+                usuario=request.user,
             )
-            
-            # Enviar email
-            enviar_email_status_pedido(pedido, 'cancelado')
+        except TransicaoInvalida:
+            messages.error(request, 'Este pedido não pode mais ser cancelado.')
+            return redirect('pedidos:detalhe', numero_pedido=numero_pedido)
             
         messages.success(request, 'Pedido cancelado com sucesso!')
         return redirect('pedidos:meus_pedidos')
     
     return render(request, 'pedidos/cancelar.html', {'pedido': pedido})
 
-
-def enviar_email_status_pedido(pedido, acao):
-    """
-    Envia email para o cliente informando sobre mudanças no status do pedido.
-    """
-    try:
-        assuntos = {
-            'criado': f'Pedido #{str(pedido.numero_pedido)[:8]} - Criado com Sucesso!',
-            'pago': f'Pedido #{str(pedido.numero_pedido)[:8]} - Pagamento Confirmado!',
-            'enviado': f'Pedido #{str(pedido.numero_pedido)[:8]} - Enviado!',
-            'entregue': f'Pedido #{str(pedido.numero_pedido)[:8]} - Entregue!',
-            'cancelado': f'Pedido #{str(pedido.numero_pedido)[:8]} - Cancelado',
-        }
-        
-        mensagens = {
-            'criado': f'Seu pedido foi criado com sucesso e está aguardando pagamento.\n\n'
-                     f'Total: R$ {pedido.total}\n'
-                     f'Forma de pagamento: {pedido.get_forma_pagamento_display()}\n\n'
-                     f'Você pode acompanhar o status do seu pedido em nosso site.',
-            
-            'pago': f'Seu pagamento foi confirmado com sucesso!\n\n'
-                   f'Agora seu pedido entrará em processamento e será enviado em breve.\n'
-                   f'Você receberá um email com o código de rastreamento assim que o produto for despachado.',
-            
-            'enviado': f'Seu pedido foi enviado!\n\n'
-                      f'Código de rastreamento: {pedido.codigo_rastreamento}\n'
-                      f'Você pode acompanhar a entrega através do nosso site ou diretamente nos Correios.',
-            
-            'entregue': f'Seu pedido foi entregue com sucesso!\n\n'
-                       f'Esperamos que você tenha gostado dos produtos.\n'
-                       f'Sua opinião é muito importante para nós!',
-            
-            'cancelado': f'Seu pedido foi cancelado.\n\n'
-                        f'Se o pagamento já foi realizado, o estorno será processado em até 5 dias úteis.\n'
-                        f'Em caso de dúvidas, entre em contato conosco.'
-        }
-        
-        send_mail(
-            subject=assuntos.get(acao, 'Atualização do Pedido'),
-            message=mensagens.get(acao, 'Seu pedido foi atualizado.'),
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[pedido.email_cliente],
-            fail_silently=True,
-        )
-        
-    except Exception as e:
-        print(f'Erro ao enviar email: {e}')  # Log do erro
@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import Categoria, Tag, Produto, ImagemProduto
+from .metricas import anotar_funil
+from .models import (
+    Categoria, Tag, Produto, ImagemProduto, ProdutoRelacionado, MetricaProduto, FunilProduto,
+    Promocao, HistoricoPreco,
+)
 
 
 @admin.register(Categoria)
@@ -23,16 +27,26 @@ class ImagemProdutoInline(admin.TabularInline):
     extra = 3
 
 
+class HistoricoPrecoInline(admin.TabularInline):
+    model = HistoricoPreco
+    fields = ['data', 'preco', 'preco_final', 'promocao']
+    readonly_fields = fields
+    extra = 0
+    max_num = 0
+    can_delete = False
+    ordering = ['-data']
+
+
 @admin.register(Produto)
 class ProdutoAdmin(admin.ModelAdmin):
-    list_display = ['nome', 'categoria', 'fornecedor', 'preco', 'preco_promocional', 'ativo', 'destaque', 'data_cadastro']
+    list_display = ['nome', 'categoria', 'fornecedor', 'preco', 'preco_promocional', 'preco_final', 'vendas_7_dias', 'vendas_30_dias', 'ativo', 'destaque', 'data_cadastro']
     list_filter = ['ativo', 'destaque', 'categoria', 'fornecedor', 'data_cadastro']
     search_fields = ['nome', 'descricao']
     prepopulated_fields = {'slug': ('nome',)}
     list_editable = ['ativo', 'destaque', 'preco', 'preco_promocional']
-    readonly_fields = ['data_cadastro', 'data_atualizacao']
+    readonly_fields = ['preco_final', 'promocao_vigente', 'percentual_desconto', 'vendas_7_dias', 'vendas_30_dias', 'data_cadastro', 'data_atualizacao']
     filter_horizontal = ['tags']
-    inlines = [ImagemProdutoInline]
+    inlines = [ImagemProdutoInline, HistoricoPrecoInline]
     
     fieldsets = (
         ('Informações Básicas', {
@@ -42,13 +56,13 @@ class ProdutoAdmin(admin.ModelAdmin):
             'fields': ('categoria', 'fornecedor', 'tags')
         }),
         ('Preços', {
-            'fields': ('preco', 'preco_promocional')
+            'fields': ('preco', 'preco_promocional', 'preco_final', 'percentual_desconto', 'promocao_vigente')
         }),
         ('Características', {
             'fields': ('tamanhos_disponiveis', 'cores_disponiveis', 'material', 'peso')
         }),
         ('Estoque', {
-            'fields': ('estoque_virtual', 'vendas_simuladas')
+            'fields': ('estoque_virtual', 'vendas_simuladas', 'vendas_7_dias', 'vendas_30_dias')
         }),
         ('SEO', {
             'fields': ('meta_title', 'meta_description'),
@@ -70,3 +84,143 @@ class ImagemProdutoAdmin(admin.ModelAdmin):
     list_filter = ['produto']
     search_fields = ['produto__nome', 'alt_text']
     list_editable = ['ordem']
+
+
+@admin.register(Promocao)
+class PromocaoAdmin(admin.ModelAdmin):
+    list_display = ['nome', 'tipo_desconto', 'valor', 'data_inicio', 'data_fim', 'toda_loja', 'ativo', 'vigente']
+    list_filter = ['ativo', 'vigente', 'tipo_desconto', 'toda_loja']
+    search_fields = ['nome']
+    filter_horizontal = ['produtos', 'categorias', 'tags']
+    readonly_fields = ['vigente', 'data_criacao']
+    date_hierarchy = 'data_inicio'
+
+    fieldsets = (
+        ('Desconto', {
+            'fields': ('nome', 'tipo_desconto', 'valor', 'ativo', 'vigente')
+        }),
+        ('Vigência', {
+            'fields': ('data_inicio', 'data_fim')
+        }),
+        ('Abrangência', {
+            'description': 'Vale para a loja toda ou para os produtos, categorias e tags escolhidos.',
+            'fields': ('toda_loja', 'produtos', 'categorias', 'tags')
+        }),
+    )
+
+
+@admin.register(HistoricoPreco)
+class HistoricoPrecoAdmin(admin.ModelAdmin):
+    list_display = ['produto', 'data', 'preco', 'preco_final', 'promocao']
+    list_filter = ['data']
+    search_fields = ['produto__nome']
+    list_select_related = ['produto', 'promocao']
+    date_hierarchy = 'data'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ProdutoRelacionado)
+class ProdutoRelacionadoAdmin(admin.ModelAdmin):
+    list_display = ['produto', 'tipo', 'posicao', 'relacionado', 'pontuacao', 'data_calculo']
+    list_filter = ['tipo']
+    search_fields = ['produto__nome', 'relacionado__nome']
+    list_select_related = ['produto', 'relacionado']
+    raw_id_fields = ['produto', 'relacionado']
+
+
+@admin.register(MetricaProduto)
+class MetricaProdutoAdmin(admin.ModelAdmin):
+    list_display = ['produto', 'data', 'impressoes', 'visualizacoes', 'adicoes_carrinho']
+    list_filter = ['data']
+    search_fields = ['produto__nome']
+    list_select_related = ['produto']
+    date_hierarchy = 'data'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class PeriodoFunilFilter(admin.SimpleListFilter):
+    """Janela do funil; muda as somas anotadas, não as linhas listadas"""
+    title = 'período'
+    parameter_name = 'periodo'
+
+    def lookups(self, request, model_admin):
+        return [('7', 'Últimos 7 dias'), ('30', 'Últimos 30 dias'), ('90', 'Últimos 90 dias')]
+
+    def queryset(self, request, queryset):
+        return queryset
+
+
+@admin.register(FunilProduto)
+class FunilProdutoAdmin(admin.ModelAdmin):
+    list_display = [
+        'nome', 'categoria', 'impressoes', 'visualizacoes', 'adicoes_carrinho', 'pedidos',
+        'taxa_clique_display', 'taxa_carrinho_display', 'taxa_conversao_display',
+    ]
+    list_filter = [PeriodoFunilFilter, 'ativo', 'categoria']
+    search_fields = ['nome']
+    list_select_related = ['categoria']
+    periodo_padrao = 30
+
+    def get_queryset(self, request):
+        try:
+            dias = int(request.GET.get(PeriodoFunilFilter.parameter_name, self.periodo_padrao))
+        except ValueError:
+            dias = self.periodo_padrao
+        # A ordenação padrão usa campo anotado, por isso a anotação vem antes
+        queryset = anotar_funil(self.model._default_manager.get_queryset(), dias)
+        return queryset.order_by(*self.get_ordering(request))
+
+    def get_ordering(self, request):
+        # Campo anotado: não pode ir no atributo ``ordering`` (checagem do admin)
+        return ['-funil_visualizacoes']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='Impressões', ordering='funil_impressoes')
+    def impressoes(self, obj):
+        return obj.funil_impressoes
+
+    @admin.display(description='Visualizações', ordering='funil_visualizacoes')
+    def visualizacoes(self, obj):
+        return obj.funil_visualizacoes
+
+    @admin.display(description='Carrinho', ordering='funil_adicoes')
+    def adicoes_carrinho(self, obj):
+        return obj.funil_adicoes
+
+    @admin.display(description='Pedidos', ordering='funil_pedidos')
+    def pedidos(self, obj):
+        return obj.funil_pedidos
+
+    @staticmethod
+    def _percentual(valor):
+        return '-' if valor is None else f'{valor:.1f}%'
+
+    @admin.display(description='Clique', ordering='taxa_clique')
+    def taxa_clique_display(self, obj):
+        return self._percentual(obj.taxa_clique)
+
+    @admin.display(description='Carrinho / Visita', ordering='taxa_carrinho')
+    def taxa_carrinho_display(self, obj):
+        return self._percentual(obj.taxa_carrinho)
+
+    @admin.display(description='Conversão', ordering='taxa_conversao')
+    def taxa_conversao_display(self, obj):
+        return self._percentual(obj.taxa_conversao)
@@ -0,0 +1,348 @@
+"""
+API JSON somente leitura do catálogo: produtos (com imagens), categorias e tags.
+
+- ``?campos=nome,preco_final,imagens`` escolhe os campos da resposta. Cada
+  campo declara as colunas, o select_related e o prefetch de que precisa,
+  então a consulta carrega só o que vai ser devolvido (imagens e tags só são
+  buscadas quando pedidas).
+- Paginação por cursor (``?cursor=``, ``?limite=``) sobre a chave primária:
+  qualquer página custa o mesmo, sem OFFSET nem COUNT.
+- ETag e Last-Modified saem de uma consulta leve (pk e ``data_atualizacao``
+  das linhas da página) somada à versão da taxonomia (categorias e tags, que
+  não têm data). Uma revalidação sem mudança responde 304 sem carregar nem
+  serializar os objetos.
+- As respostas saem comprimidas com brotli, se o cliente aceita e o pacote
+  ``brotli`` está instalado, ou com gzip.
+
+Para que ``data_atualizacao`` acompanhe tudo que a API mostra, as gravações
+em lote de preço e estoque e as alterações de imagens e tags também a
+atualizam (produtos.promocoes, pedidos.services, produtos.signals).
+"""
+import base64
+import binascii
+from dataclasses import dataclass
+import hashlib
+import re
+from typing import Callable
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.utils.text import compress_string
+from django.views import View
+
+from .models import Categoria, ImagemProduto, Produto, Tag
+
+try:
+    import brotli
+except ImportError:  # sem o pacote as respostas usam só gzip
+    brotli = None
+
+CHAVE_VERSAO_TAXONOMIA = 'produtos:api:versao_taxonomia'
+
+LIMITE_PADRAO = 24
+LIMITE_MAXIMO = 100
+
+# Respostas menores que isso (bytes) não compensam comprimir
+TAMANHO_MINIMO_COMPRESSAO = 200
+ACEITA_BROTLI = re.compile(r'\bbr\b')
+ACEITA_GZIP = re.compile(r'\bgzip\b')
+
+
+def versao_taxonomia():
+    return cache.get_or_set(CHAVE_VERSAO_TAXONOMIA, 1, None)
+
+
+def invalidar_taxonomia():
+    """Muda a ETag de todas as respostas (categorias e tags aparecem dentro dos produtos)"""
+    try:
+        cache.incr(CHAVE_VERSAO_TAXONOMIA)
+    except ValueError:
+        cache.set(CHAVE_VERSAO_TAXONOMIA, 2, None)
+
+
+def comprimir(request, resposta):
+    """Comprime a resposta com brotli ou gzip, conforme o Accept-Encoding"""
+    if resposta.status_code != 200 or resposta.has_header('Content-Encoding'):
+        return resposta
+    if len(resposta.content) < TAMANHO_MINIMO_COMPRESSAO:
+        return resposta
+
+    patch_vary_headers(resposta, ('Accept-Encoding',))
+    aceitas = request.headers.get('Accept-Encoding', '')
+    if brotli is not None and ACEITA_BROTLI.search(aceitas):
+        conteudo, codificacao = brotli.compress(resposta.content, quality=5), 'br'
+    elif ACEITA_GZIP.search(aceitas):
+        conteudo, codificacao = compress_string(resposta.content), 'gzip'
+    else:
+        return resposta
+
+    resposta.content = conteudo
+    resposta['Content-Length'] = str(len(conteudo))
+    resposta['Content-Encoding'] = codificacao
+    # O corpo comprimido não é idêntico byte a byte ao original (RFC 9110)
+    etag = resposta.get('ETag')
+    if etag and etag.startswith('"'):
+        resposta['ETag'] = f'W/{etag}'
+    return resposta
+
+
+@dataclass(frozen=True)
+class Campo:
+    """Campo da API: como obter o valor e o que a consulta precisa carregar"""
+    valor: Callable
+    colunas: tuple = ()
+    relacionado: str = None
+    prefetch: Prefetch = None
+
+
+def _texto(coluna):
+    return Campo(lambda obj: getattr(obj, coluna), (coluna,))
+
+
+def _decimal(coluna):
+    return Campo(lambda obj: None if getattr(obj, coluna) is None else str(getattr(obj, coluna)), (coluna,))
+
+
+def _resumo_categoria(categoria):
+    return {'id': categoria.pk, 'slug': categoria.slug, 'nome': categoria.nome}
+
+
+def _resumo_tag(tag):
+    return {'id': tag.pk, 'slug': tag.slug, 'nome': tag.nome}
+
+
+def _imagem(imagem):
+    return {'url': imagem.imagem.url, 'alt': imagem.alt_text, 'ordem': imagem.ordem}
+
+
+CAMPOS_PRODUTO = {
+    'id': Campo(lambda produto: produto.pk, ('id',)),
+    'slug': _texto('slug'),
+    'nome': _texto('nome'),
+    'url': Campo(lambda produto: produto.get_absolute_url(), ('slug',)),
+    'descricao_curta': _texto('descricao_curta'),
+    'descricao': _texto('descricao'),
+    'preco': _decimal('preco'),
+    'preco_final': _decimal('preco_final'),
+    'percentual_desconto': _texto('percentual_desconto'),
+    'tamanhos': _texto('tamanhos_disponiveis'),
+    'cores': _texto('cores_disponiveis'),
+    'material': _texto('material'),
+    'peso': _decimal('peso'),
+    'estoque': Campo(lambda produto: produto.estoque_disponivel(), ('estoque_virtual', 'vendas_simuladas')),
+    'destaque': _texto('destaque'),
+    'data_atualizacao': Campo(lambda produto: produto.data_atualizacao.isoformat(), ('data_atualizacao',)),
+    'categoria': Campo(
+        lambda produto: _resumo_categoria(produto.categoria),
+        ('categoria', 'categoria__slug', 'categoria__nome'),
+        relacionado='categoria',
+    ),
+    'tags': Campo(
+        lambda produto: [_resumo_tag(tag) for tag in produto.tags.all()],
+        prefetch=Prefetch('tags', queryset=Tag.objects.only('id', 'slug', 'nome')),
+    ),
+    'imagens': Campo(
+        lambda produto: [_imagem(imagem) for imagem in produto.imagens.all()],
+        prefetch=Prefetch(
+            'imagens', queryset=ImagemProduto.objects.only('id', 'produto_id', 'imagem', 'alt_text', 'ordem')
+        ),
+    ),
+}
+
+CAMPOS_CATEGORIA = {
+    'id': Campo(lambda categoria: categoria.pk, ('id',)),
+    'slug': _texto('slug'),
+    'nome': _texto('nome'),
+    'url': Campo(lambda categoria: categoria.get_absolute_url(), ('slug',)),
+    'descricao': _texto('descricao'),
+    'imagem': Campo(lambda categoria: categoria.imagem.url if categoria.imagem else '', ('imagem',)),
+    'ordem': _texto('ordem'),
+}
+
+CAMPOS_TAG = {
+    'id': Campo(lambda tag: tag.pk, ('id',)),
+    'slug': _texto('slug'),
+    'nome': _texto('nome'),
+    'cor': _texto('cor'),
+}
+
+
+class RequisicaoInvalida(Exception):
+    pass
+
+
+class RecursoApiView(View):
+    """Base das views da API: campos, cursor, ETag e serialização"""
+    http_method_names = ['get', 'head', 'options']
+    campos = {}
+    campos_padrao = ()
+    # Coluna de data das linhas usada na ETag e no Last-Modified
+    coluna_data = None
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def campos_pedidos(self):
+        valor = self.request.GET.get('campos')
+        if not valor:
+            return list(self.campos_padrao)
+        nomes = list(dict.fromkeys(nome.strip() for nome in valor.split(',') if nome.strip()))
+        desconhecidos = [nome for nome in nomes if nome not in self.campos]
+        if desconhecidos:
+            raise RequisicaoInvalida(f"Campos desconhecidos: {', '.join(desconhecidos)}")
+        return nomes
+
+    def consultar(self, queryset, nomes):
+        """Aplica only/select_related/prefetch_related dos campos pedidos"""
+        campos = [self.campos[nome] for nome in nomes]
+        colunas = {'id'} | {coluna for campo in campos for coluna in campo.colunas}
+        queryset = queryset.only(*colunas)
+        relacionados = [campo.relacionado for campo in campos if campo.relacionado]
+        if relacionados:
+            queryset = queryset.select_related(*relacionados)
+        prefetch = [campo.prefetch for campo in campos if campo.prefetch]
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+    def serializar(self, obj, nomes):
+        return {nome: self.campos[nome].valor(obj) for nome in nomes}
+
+    def versao(self, linhas):
+        """ETag e data da última modificação para as linhas (pk, data) da resposta"""
+        partes = [str(versao_taxonomia()), self.request.get_full_path()]
+        partes.extend(f'{pk}:{data.isoformat() if data else ""}' for pk, data in linhas)
+        etag = hashlib.md5('|'.join(partes).encode()).hexdigest()
+        datas = [data for pk, data in linhas if data]
+        return etag, max(datas) if datas else None
+
+    def responder(self, linhas, gerar):
+        """Resposta condicional: ``gerar`` só é chamado quando não cabe um 304"""
+        etag, ultima_modificacao = self.versao(linhas)
+        etag = quote_etag(etag)
+        timestamp = int(ultima_modificacao.timestamp()) if ultima_modificacao else None
+
+        resposta = get_conditional_response(self.request, etag=etag, last_modified=timestamp)
+        if resposta is None:
+            resposta = JsonResponse(gerar(), json_dumps_params={'ensure_ascii': False})
+        resposta['ETag'] = etag
+        if timestamp:
+            resposta['Last-Modified'] = http_date(timestamp)
+        patch_cache_control(resposta, public=True, no_cache=True)
+        return comprimir(self.request, resposta)
+
+    def erro(self, mensagem, status=400):
+        return JsonResponse({'success': False, 'message': mensagem}, status=status)
+
+
+class ListaApiView(RecursoApiView):
+    """Lista paginada por cursor (pk crescente)"""
+
+    def cursor(self):
+        valor = self.request.GET.get('cursor')
+        if not valor:
+            return 0
+        try:
+            return int(base64.urlsafe_b64decode(valor.encode()).decode())
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise RequisicaoInvalida('Cursor inválido')
+
+    def limite(self):
+        try:
+            limite = int(self.request.GET.get('limite', LIMITE_PADRAO))
+        except ValueError:
+            raise RequisicaoInvalida('Limite inválido')
+        return max(1, min(limite, LIMITE_MAXIMO))
+
+    def proxima_pagina(self, ultimo_pk):
+        parametros = self.request.GET.copy()
+        parametros['cursor'] = base64.urlsafe_b64encode(str(ultimo_pk).encode()).decode()
+        return self.request.build_absolute_uri(f'{self.request.path}?{parametros.urlencode()}')
+
+    def get(self, request):
+        try:
+            nomes = self.campos_pedidos()
+            inicio = self.cursor()
+            limite = self.limite()
+        except RequisicaoInvalida as e:
+            return self.erro(str(e))
+
+        queryset = self.get_queryset().filter(pk__gt=inicio).order_by('pk')
+        colunas = ('pk', self.coluna_data) if self.coluna_data else ('pk',)
+        linhas = list(queryset.values_list(*colunas)[:limite + 1])
+        tem_mais = len(linhas) > limite
+        linhas = [(linha[0], linha[1] if self.coluna_data else None) for linha in linhas[:limite]]
+
+        def gerar():
+            ids = [pk for pk, data in linhas]
+            objetos = self.consultar(queryset.filter(pk__in=ids), nomes) if ids else []
+            return {
+                'resultados': [self.serializar(obj, nomes) for obj in objetos],
+                'proximo': self.proxima_pagina(ids[-1]) if tem_mais else None,
+            }
+
+        return self.responder(linhas, gerar)
+
+
+class ProdutosApiView(ListaApiView):
+    """
+    GET /produtos/api/produtos/?campos=...&categoria=<slug>&tag=<slug>&destaque=1
+    """
+    campos = CAMPOS_PRODUTO
+    campos_padrao = ('id', 'slug', 'nome', 'url', 'preco', 'preco_final', 'percentual_desconto', 'estoque', 'categoria')
+    coluna_data = 'data_atualizacao'
+
+    def get_queryset(self):
+        queryset = Produto.objects.filter(ativo=True)
+        categoria = self.request.GET.get('categoria')
+        if categoria:
+            queryset = queryset.filter(categoria__slug=categoria)
+        tag = self.request.GET.get('tag')
+        if tag:
+            queryset = queryset.filter(tags__slug=tag)
+        if self.request.GET.get('destaque') in ('1', 'true'):
+            queryset = queryset.filter(destaque=True)
+        return queryset
+
+
+class ProdutoApiView(RecursoApiView):
+    """GET /produtos/api/produtos/<slug>/?campos=..."""
+    campos = CAMPOS_PRODUTO
+    campos_padrao = tuple(CAMPOS_PRODUTO)
+    coluna_data = 'data_atualizacao'
+
+    def get_queryset(self):
+        return Produto.objects.filter(ativo=True)
+
+    def get(self, request, slug):
+        try:
+            nomes = self.campos_pedidos()
+        except RequisicaoInvalida as e:
+            return self.erro(str(e))
+
+        queryset = self.get_queryset().filter(slug=slug)
+        linha = queryset.values_list('pk', self.coluna_data).first()
+        if linha is None:
+            return self.erro('Produto não encontrado', status=404)
+        return self.responder([linha], lambda: self.serializar(self.consultar(queryset, nomes).get(), nomes))
+
+
+class CategoriasApiView(ListaApiView):
+    """GET /produtos/api/categorias/?campos=..."""
+    campos = CAMPOS_CATEGORIA
+    campos_padrao = ('id', 'slug', 'nome', 'url')
+
+    def get_queryset(self):
+        return Categoria.objects.filter(ativo=True)
+
+
+class TagsApiView(ListaApiView):
+    """GET /produtos/api/tags/?campos=..."""
+    campos = CAMPOS_TAG
+    campos_padrao = ('id', 'slug', 'nome')
+
+    def get_queryset(self):
+        return Tag.objects.all()
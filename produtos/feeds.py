@@ -0,0 +1,271 @@
+"""
+Feeds do catálogo para marketplaces e Google Shopping (XML e CSV).
+
+Os arquivos ``FEEDS_ROOT/google.xml.gz`` e ``FEEDS_ROOT/produtos.csv.gz``
+são servidos pelo nginx como estáticos (deployment/nginx.conf), sem passar
+pelo Django. ``gerar_feeds`` faz a geração em duas etapas:
+
+1. Renderiza de novo só os produtos com ``data_atualizacao`` posterior à
+   última geração (preço, estoque, imagens e tags também atualizam essa
+   data), lidos com ``iterator()``, e grava os trechos em ItemFeed; produtos
+   desativados saem da tabela.
+2. Se algo mudou, remonta cada arquivo percorrendo os trechos com
+   ``iterator()`` e escrevendo direto num gzip temporário, que substitui o
+   anterior com ``os.replace`` (quem baixa o feed nunca vê um arquivo pela
+   metade). Nenhuma etapa guarda o catálogo inteiro em memória.
+
+O estado da última geração fica em ``FEEDS_ROOT/.estado.json``; sem ele (ou
+com ``completo=True``) todos os produtos são renderizados. A busca por
+alterados começa SOBREPOSICAO antes da geração anterior: uma transação que
+gravou ``data_atualizacao`` antes dela e só fez commit depois da leitura
+ainda é pega. Trechos renderizados iguais aos gravados não contam como
+alteração, então a sobreposição não força regravar os arquivos.
+"""
+import csv
+from datetime import datetime, timedelta
+import gzip
+import io
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.db import connection, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from .models import ImagemProduto, ItemFeed, Produto
+
+logger = logging.getLogger(__name__)
+
+ARQUIVOS = {
+    'xml': 'google.xml.gz',
+    'csv': 'produtos.csv.gz',
+}
+ARQUIVO_ESTADO = '.estado.json'
+
+CABECALHO_XML = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<rss version="2.0" xmlns:g="http://base.google.com/ns/1.0">\n'
+    '<channel>\n'
+    '<title>{titulo}</title>\n'
+    '<link>{link}</link>\n'
+    '<description>Catálogo de produtos</description>\n'
+)
+RODAPE_XML = '</channel>\n</rss>\n'
+
+COLUNAS_CSV = [
+    'id', 'item_group_id', 'title', 'description', 'link', 'image_link', 'additional_image_link',
+    'price', 'sale_price', 'availability', 'quantity', 'brand', 'condition', 'product_type', 'size', 'color',
+]
+
+# Margem para transações que fizeram commit depois da leitura da geração anterior
+SOBREPOSICAO = timedelta(minutes=10)
+
+# Limites do Google Merchant Center
+TAMANHO_TITULO = 150
+TAMANHO_DESCRICAO = 5000
+IMAGENS_ADICIONAIS = 10
+
+
+def diretorio_feeds():
+    return Path(getattr(settings, 'FEEDS_ROOT', Path(settings.MEDIA_ROOT) / 'feeds'))
+
+
+def escrever_gzip(caminho, partes):
+    """
+    Grava as partes (strings) num arquivo gzip, de forma incremental e atômica.
+
+    O conteúdo vai para um temporário no mesmo diretório, trocado pelo
+    arquivo final só no fim.
+    """
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=caminho.parent, prefix=f'.{caminho.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(descritor, 'wb') as bruto, gzip.GzipFile(fileobj=bruto, mode='wb', mtime=0) as arquivo:
+            texto = io.TextIOWrapper(arquivo, encoding='utf-8', newline='')
+            for parte in partes:
+                texto.write(parte)
+            texto.flush()
+            texto.detach()
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+class Renderizador:
+    """Monta os trechos XML e CSV de um produto (um item por tamanho)"""
+
+    def __init__(self):
+        self.site_url = f'https://{Site.objects.get_current().domain}'
+        self.marca = getattr(settings, 'FEED_MARCA', 'Encanto Íntimo')
+
+    def absoluta(self, url):
+        return url if url.startswith(('http://', 'https://')) else self.site_url + url
+
+    def variantes(self, produto):
+        """Campos de cada item do feed, na ordem de COLUNAS_CSV"""
+        imagens = [self.absoluta(imagem.imagem.url) for imagem in produto.imagens.all()]
+        estoque = produto.estoque_disponivel()
+        base = {
+            'item_group_id': str(produto.pk),
+            'title': produto.nome[:TAMANHO_TITULO],
+            'description': strip_tags(produto.descricao or produto.descricao_curta)[:TAMANHO_DESCRICAO],
+            'link': self.absoluta(produto.get_absolute_url()),
+            'image_link': imagens[0] if imagens else '',
+            'additional_image_link': ','.join(imagens[1:IMAGENS_ADICIONAIS + 1]),
+            'price': f'{produto.preco} BRL',
+            'sale_price': f'{produto.preco_final} BRL' if produto.tem_promocao else '',
+            'availability': 'in_stock' if estoque > 0 else 'out_of_stock',
+            'quantity': str(estoque),
+            'brand': self.marca,
+            'condition': 'new',
+            'product_type': produto.categoria.nome,
+            'color': '/'.join(produto.cores_disponiveis[:3]),
+        }
+        tamanhos = produto.tamanhos_disponiveis or ['']
+        for tamanho in tamanhos:
+            yield dict(base, id=f'{produto.pk}-{tamanho}' if tamanho else str(produto.pk), size=tamanho)
+
+    def xml(self, variantes):
+        partes = []
+        for campos in variantes:
+            partes.append('<item>\n')
+            for coluna in COLUNAS_CSV:
+                valor = campos[coluna]
+                if not valor:
+                    continue
+                if coluna == 'additional_image_link':
+                    for link in valor.split(','):
+                        partes.append(f'<g:{coluna}>{escape(link)}</g:{coluna}>\n')
+                    continue
+                # title, description e link são elementos do RSS; os demais, do namespace g:
+                tag = coluna if coluna in ('title', 'description', 'link') else f'g:{coluna}'
+                partes.append(f'<{tag}>{escape(valor)}</{tag}>\n')
+            partes.append('</item>\n')
+        return ''.join(partes)
+
+    def csv(self, variantes):
+        saida = io.StringIO()
+        escritor = csv.writer(saida, lineterminator='\n')
+        for campos in variantes:
+            escritor.writerow([campos[coluna] for coluna in COLUNAS_CSV])
+        return saida.getvalue()
+
+    def item(self, produto):
+        variantes = list(self.variantes(produto))
+        return ItemFeed(produto_id=produto.pk, xml=self.xml(variantes), csv=self.csv(variantes))
+
+
+def _opcoes_upsert():
+    """Parâmetros de bulk_create para regravar ItemFeed no banco atual"""
+    opcoes = {'update_conflicts': True, 'update_fields': ['xml', 'csv', 'data_geracao']}
+    if connection.features.supports_update_conflicts_with_target:
+        opcoes['unique_fields'] = ['produto']
+    return opcoes
+
+
+def atualizar_itens(desde=None, lote=500):
+    """
+    Renderiza os produtos alterados desde ``desde`` (todos, se None).
+
+    Retorna (trechos que mudaram, trechos removidos).
+    """
+    produtos = Produto.objects.select_related('categoria').prefetch_related(
+        Prefetch('imagens', queryset=ImagemProduto.objects.only('id', 'produto_id', 'imagem', 'ordem'))
+    ).order_by('pk')
+    if desde is not None:
+        produtos = produtos.filter(data_atualizacao__gte=desde)
+
+    renderizador = Renderizador()
+    renderizados = removidos = 0
+    gravar, inativos = [], []
+
+    def descarregar():
+        nonlocal renderizados, removidos
+        # Só regrava os trechos que mudaram
+        gravados = {
+            produto_id: (trecho_xml, trecho_csv)
+            for produto_id, trecho_xml, trecho_csv in ItemFeed.objects.filter(
+                produto_id__in=[item.produto_id for item in gravar]
+            ).values_list('produto_id', 'xml', 'csv')
+        }
+        gravar[:] = [item for item in gravar if gravados.get(item.produto_id) != (item.xml, item.csv)]
+        with transaction.atomic():
+            if gravar:
+                ItemFeed.objects.bulk_create(gravar, **_opcoes_upsert())
+            if inativos:
+                removidos += ItemFeed.objects.filter(produto_id__in=inativos).delete()[0]
+        renderizados += len(gravar)
+        gravar.clear()
+        inativos.clear()
+
+    for produto in produtos.iterator(chunk_size=lote):
+        if produto.ativo:
+            gravar.append(renderizador.item(produto))
+        else:
+            inativos.append(produto.pk)
+        if len(gravar) + len(inativos) >= lote:
+            descarregar()
+    descarregar()
+    if desde is None:
+        # Geração completa: trechos de produtos que não existem mais ou ficaram inativos
+        removidos += ItemFeed.objects.filter(produto__ativo=False).delete()[0]
+    return renderizados, removidos
+
+
+def _partes(formato, renderizador):
+    if formato == 'xml':
+        yield CABECALHO_XML.format(titulo=escape(renderizador.marca), link=escape(renderizador.site_url))
+    else:
+        saida = io.StringIO()
+        csv.writer(saida, lineterminator='\n').writerow(COLUNAS_CSV)
+        yield saida.getvalue()
+    trechos = ItemFeed.objects.filter(produto__ativo=True).order_by('produto_id').values_list(formato, flat=True)
+    yield from trechos.iterator(chunk_size=2000)
+    if formato == 'xml':
+        yield RODAPE_XML
+
+
+def ler_estado():
+    try:
+        with open(diretorio_feeds() / ARQUIVO_ESTADO, encoding='utf-8') as arquivo:
+            estado = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+    if not all((diretorio_feeds() / nome).exists() for nome in ARQUIVOS.values()):
+        return None
+    estado['gerado_em'] = datetime.fromisoformat(estado['gerado_em'])
+    return estado
+
+
+def gerar_feeds(completo=False):
+    """Atualiza os feeds; retorna as métricas da execução"""
+    inicio = timezone.now()
+    estado = None if completo else ler_estado()
+    desde = estado['gerado_em'] - SOBREPOSICAO if estado else None
+
+    renderizados, removidos = atualizar_itens(desde)
+    itens = ItemFeed.objects.filter(produto__ativo=True).count()
+    metricas = {'renderizados': renderizados, 'removidos': removidos, 'itens': itens, 'gerado': False}
+    # Sem alteração e sem produto excluído desde a última geração: os arquivos continuam valendo
+    if estado and not renderizados and not removidos and itens == estado['itens']:
+        return metricas
+
+    renderizador = Renderizador()
+    for formato, nome in ARQUIVOS.items():
+        escrever_gzip(diretorio_feeds() / nome, _partes(formato, renderizador))
+    with open(diretorio_feeds() / ARQUIVO_ESTADO, 'w', encoding='utf-8') as arquivo:
+        json.dump({'gerado_em': inicio.isoformat(), 'itens': itens}, arquivo)
+
+    metricas['gerado'] = True
+    logger.info(f'Feeds de produtos gerados: {itens} produtos ({renderizados} renderizados, {removidos} removidos)')
+    return metricas
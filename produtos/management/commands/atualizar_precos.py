@@ -0,0 +1,17 @@
+"""
+Recalcula o preço final dos produtos a partir das promoções em vigor.
+
+Uso:
+    python manage.py atualizar_precos
+"""
+from django.core.management.base import BaseCommand
+
+from produtos.promocoes import atualizar_precos
+
+
+class Command(BaseCommand):
+    help = 'Recalcula o preço final de todos os produtos e registra o histórico de preços'
+
+    def handle(self, *args, **options):
+        alterados = atualizar_precos()
+        self.stdout.write(self.style.SUCCESS(f'Preço final alterado em {alterados} produtos.'))
@@ -0,0 +1,31 @@
+"""
+Gera os feeds de produtos (Google Shopping e marketplaces) em FEEDS_ROOT.
+
+Uso:
+    python manage.py gerar_feeds
+    python manage.py gerar_feeds --completo   # renderiza todos os produtos de novo
+"""
+from django.core.management.base import BaseCommand
+
+from produtos.feeds import gerar_feeds
+
+
+class Command(BaseCommand):
+    help = 'Atualiza os feeds XML e CSV de produtos, renderizando só os produtos alterados'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--completo',
+            action='store_true',
+            help='Ignora a última geração e renderiza todos os produtos',
+        )
+
+    def handle(self, *args, **options):
+        metricas = gerar_feeds(completo=options['completo'])
+        if not metricas['gerado']:
+            self.stdout.write('Nenhum produto alterado desde a última geração; feeds mantidos.')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Feeds gerados com {metricas['itens']} produtos "
+            f"({metricas['renderizados']} renderizados, {metricas['removidos']} removidos)."
+        ))
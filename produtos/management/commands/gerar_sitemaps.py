@@ -0,0 +1,28 @@
+"""
+Gera os sitemaps do catálogo (produtos e categorias) em SITEMAPS_ROOT.
+
+Uso:
+    python manage.py gerar_sitemaps
+    python manage.py gerar_sitemaps --completo   # regrava todos os arquivos
+"""
+from django.core.management.base import BaseCommand
+
+from produtos.sitemaps import gerar_sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Atualiza os sitemaps de produtos e categorias, regravando só os arquivos alterados'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--completo',
+            action='store_true',
+            help='Ignora a última geração e regrava todos os arquivos',
+        )
+
+    def handle(self, *args, **options):
+        metricas = gerar_sitemaps(completo=options['completo'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Sitemaps com {metricas['produtos']} produtos e {metricas['categorias']} categorias: "
+            f"{metricas['regravados']} arquivos regravados, {metricas['removidos']} removidos."
+        ))
@@ -0,0 +1,26 @@
+"""
+Recalcula as vendas de 7 e 30 dias dos produtos a partir dos pedidos.
+
+Uso:
+    python manage.py recalcular_vendas
+    python manage.py recalcular_vendas --lote 200
+"""
+from django.core.management.base import BaseCommand
+
+from produtos.services import recalcular_vendas
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os rankings de vendas (7 e 30 dias) de cada produto'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=500,
+            help='Quantidade de produtos atualizados por UPDATE',
+        )
+
+    def handle(self, *args, **options):
+        atualizados = recalcular_vendas(lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'{atualizados} produtos com vendas recalculadas.'))
@@ -0,0 +1,197 @@
+"""
+Métricas de navegação por produto: impressões em listas, visualizações da
+página do produto e adições ao carrinho.
+
+As views só incrementam um buffer em memória do próprio worker
+(``registrar``); uma thread do processo envia as contagens agregadas a cada
+``METRICAS_INTERVALO_ENVIO`` segundos, ou antes se o buffer passar de
+``LIMITE_BUFFER`` chaves. O envio soma as contagens às linhas diárias de
+MetricaProduto: por lote, um INSERT que ignora as linhas já existentes e um
+único UPDATE com Case/When, então o custo no banco depende do número de
+produtos vistos no intervalo e não do número de páginas servidas.
+
+Contagens ainda no buffer quando um worker morre sem encerrar normalmente
+são perdidas; para métricas de navegação isso é aceitável.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, FloatField, Func, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+from pedidos.models import ItemPedido
+from pedidos.services import STATUS_COMPRA
+from .models import MetricaProduto, Produto
+
+logger = logging.getLogger(__name__)
+
+EVENTOS = ('impressoes', 'visualizacoes', 'adicoes_carrinho')
+
+# Chaves (dia, produto) no buffer que antecipam o envio
+LIMITE_BUFFER = 5000
+
+
+def gravar_contagens(contagens, lote=500):
+    """
+    Soma as contagens {(data, produto_id): Counter(evento)} ao banco.
+
+    Produtos excluídos enquanto as contagens estavam no buffer são ignorados.
+    """
+    por_data = defaultdict(dict)
+    for (data, produto_id), eventos in contagens.items():
+        por_data[data][produto_id] = eventos
+
+    for data, produtos in por_data.items():
+        ids = sorted(produtos)
+        for inicio in range(0, len(ids), lote):
+            existentes = Produto.objects.filter(pk__in=ids[inicio:inicio + lote]).values_list('pk', flat=True)
+            parte = {produto_id: produtos[produto_id] for produto_id in existentes}
+            if not parte:
+                continue
+            somas = {
+                evento: F(evento) + Case(
+                    *[When(produto_id=produto_id, then=Value(eventos[evento]))
+                      for produto_id, eventos in parte.items() if eventos[evento]],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+                for evento in EVENTOS
+                if any(eventos[evento] for eventos in parte.values())
+            }
+            with transaction.atomic():
+                MetricaProduto.objects.bulk_create(
+                    [MetricaProduto(produto_id=produto_id, data=data) for produto_id in parte],
+                    ignore_conflicts=True,
+                )
+                MetricaProduto.objects.filter(data=data, produto_id__in=parte).update(**somas)
+
+
+class Coletor:
+    """Buffer de eventos de um processo, enviado ao banco por uma thread própria"""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._contagens = defaultdict(Counter)
+        self._acordar = threading.Event()
+        self._pid = None
+
+    def registrar(self, evento, produto_ids):
+        if evento not in EVENTOS:
+            raise ValueError(f'Evento desconhecido: {evento}')
+        data = timezone.localdate()
+        with self._trava:
+            self._iniciar()
+            for produto_id in produto_ids:
+                self._contagens[(data, produto_id)][evento] += 1
+            cheio = len(self._contagens) >= LIMITE_BUFFER
+        if cheio:
+            self._acordar.set()
+
+    def _iniciar(self):
+        """Sobe a thread de envio no primeiro evento do processo (chamado com a trava)"""
+        if self._pid == os.getpid():
+            return
+        if self._pid is None:
+            atexit.register(self.enviar)
+        # Em um worker recém-criado por fork o buffer é cópia do processo pai,
+        # que continua responsável por enviá-lo
+        self._pid = os.getpid()
+        self._contagens = defaultdict(Counter)
+        threading.Thread(target=self._executar, name='metricas-produtos', daemon=True).start()
+
+    def _executar(self):
+        intervalo = getattr(settings, 'METRICAS_INTERVALO_ENVIO', 5)
+        while True:
+            self._acordar.wait(intervalo)
+            self._acordar.clear()
+            try:
+                self.enviar()
+            except Exception as e:
+                logger.error(f'Erro ao gravar métricas de produtos: {str(e)}')
+            finally:
+                # A thread vive o processo inteiro; não prende uma conexão entre envios
+                connection.close()
+
+    def enviar(self):
+        """Grava e esvazia o buffer; em caso de erro as contagens voltam ao buffer"""
+        with self._trava:
+            contagens, self._contagens = self._contagens, defaultdict(Counter)
+        if not contagens:
+            return 0
+        try:
+            gravar_contagens(contagens)
+        except Exception:
+            with self._trava:
+                for chave, eventos in contagens.items():
+                    self._contagens[chave].update(eventos)
+            raise
+        return len(contagens)
+
+
+coletor = Coletor()
+
+
+def registrar(evento, produto_ids):
+    """Conta um evento para cada produto (sem acesso ao banco)"""
+    coletor.registrar(evento, produto_ids)
+
+
+def limpar_metricas(dias=None):
+    """Apaga as métricas diárias mais antigas que a retenção configurada"""
+    if dias is None:
+        dias = getattr(settings, 'METRICAS_RETENCAO_DIAS', 400)
+    limite = timezone.localdate() - timedelta(days=dias)
+    apagadas, _ = MetricaProduto.objects.filter(data__lt=limite).delete()
+    return apagadas
+
+
+def _taxa(parte, total):
+    """Percentual parte/total, nulo quando o total é zero"""
+    return Cast(parte, FloatField()) * Value(100.0) / NullIf(Cast(total, FloatField()), Value(0.0))
+
+
+def anotar_funil(produtos, dias=30):
+    """
+    Anota o funil de cada produto nos últimos ``dias``: impressões,
+    visualizações, adições ao carrinho, pedidos confirmados e as taxas de
+    cada etapa (percentuais).
+    """
+    inicio = timezone.localdate() - timedelta(days=dias - 1)
+    metricas = MetricaProduto.objects.filter(produto=OuterRef('pk'), data__gte=inicio).order_by()
+    pedidos = ItemPedido.objects.filter(
+        produto=OuterRef('pk'),
+        pedido__status__in=STATUS_COMPRA,
+        pedido__data_pedido__gte=timezone.make_aware(datetime.combine(inicio, time.min)),
+    ).order_by()
+
+    def soma(campo):
+        return Coalesce(
+            Subquery(metricas.annotate(total=Func(F(campo), function='SUM')).values('total')[:1]),
+            Value(0),
+        )
+
+    produtos = produtos.annotate(
+        funil_impressoes=soma('impressoes'),
+        funil_visualizacoes=soma('visualizacoes'),
+        funil_adicoes=soma('adicoes_carrinho'),
+        funil_pedidos=Coalesce(
+            Subquery(
+                pedidos.annotate(
+                    total=Func(F('pedido_id'), function='COUNT', template='%(function)s(DISTINCT %(expressions)s)')
+                ).values('total')[:1]
+            ),
+            Value(0),
+        ),
+    )
+    return produtos.annotate(
+        taxa_clique=_taxa(F('funil_visualizacoes'), F('funil_impressoes')),
+        taxa_carrinho=_taxa(F('funil_adicoes'), F('funil_visualizacoes')),
+        taxa_conversao=_taxa(F('funil_pedidos'), F('funil_visualizacoes')),
+    )
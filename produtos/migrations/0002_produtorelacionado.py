@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProdutoRelacionado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('comprados_juntos', 'Comprados Juntos'), ('similares', 'Similares')], max_length=20, verbose_name='Tipo')),
+                ('pontuacao', models.FloatField(verbose_name='Pontuação')),
+                ('posicao', models.PositiveSmallIntegerField(verbose_name='Posição')),
+                ('data_calculo', models.DateTimeField(auto_now_add=True, verbose_name='Data do Cálculo')),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relacionados', to='produtos.produto', verbose_name='Produto')),
+                ('relacionado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='produtos.produto', verbose_name='Produto Relacionado')),
+            ],
+            options={
+                'verbose_name': 'Produto Relacionado',
+                'verbose_name_plural': 'Produtos Relacionados',
+                'ordering': ['produto', 'tipo', 'posicao'],
+                'indexes': [models.Index(fields=['produto', 'tipo', 'posicao'], name='produtos_relacionado_pos_idx')],
+                'unique_together': {('produto', 'tipo', 'relacionado')},
+            },
+        ),
+    ]
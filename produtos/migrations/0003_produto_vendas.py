@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0002_produtorelacionado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produto',
+            name='vendas_30_dias',
+            field=models.IntegerField(default=0, verbose_name='Vendas (30 dias)'),
+        ),
+        migrations.AddField(
+            model_name='produto',
+            name='vendas_7_dias',
+            field=models.IntegerField(default=0, verbose_name='Vendas (7 dias)'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['ativo', '-vendas_7_dias'], name='produtos_ativo_vendas7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['ativo', '-vendas_30_dias'], name='produtos_ativo_vendas30_idx'),
+        ),
+    ]
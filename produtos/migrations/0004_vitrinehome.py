@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0003_produto_vendas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VitrineHome',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dados', models.JSONField(default=dict, verbose_name='Dados')),
+                ('data_geracao', models.DateTimeField(auto_now=True, verbose_name='Data de Geração')),
+            ],
+            options={
+                'verbose_name': 'Vitrine da Home',
+                'verbose_name_plural': 'Vitrine da Home',
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0004_vitrinehome'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FunilProduto',
+            fields=[
+            ],
+            options={
+                'verbose_name': 'Funil do Produto',
+                'verbose_name_plural': 'Funil dos Produtos',
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('produtos.produto',),
+        ),
+        migrations.CreateModel(
+            name='MetricaProduto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(verbose_name='Data')),
+                ('impressoes', models.PositiveIntegerField(default=0, verbose_name='Impressões em Listas')),
+                ('visualizacoes', models.PositiveIntegerField(default=0, verbose_name='Visualizações')),
+                ('adicoes_carrinho', models.PositiveIntegerField(default=0, verbose_name='Adições ao Carrinho')),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metricas', to='produtos.produto', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Métrica do Produto',
+                'verbose_name_plural': 'Métricas dos Produtos',
+                'ordering': ['-data'],
+                'indexes': [models.Index(fields=['data'], name='produtos_metrica_data_idx')],
+                'unique_together': {('produto', 'data')},
+            },
+        ),
+    ]
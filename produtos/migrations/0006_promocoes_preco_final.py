@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+
+
+def preencher_preco_final(apps, schema_editor):
+    Produto = apps.get_model('produtos', 'Produto')
+    Produto.objects.update(preco_final=F('preco'))
+    Produto.objects.filter(preco_promocional__gt=0, preco_promocional__lt=F('preco')).update(
+        preco_final=F('preco_promocional')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0005_metricas_funil'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produto',
+            name='preco_final',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10, verbose_name='Preço Final'),
+        ),
+        migrations.CreateModel(
+            name='Promocao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, verbose_name='Nome')),
+                ('tipo_desconto', models.CharField(choices=[('percentual', 'Percentual'), ('valor_fixo', 'Valor Fixo')], default='percentual', max_length=20, verbose_name='Tipo de Desconto')),
+                ('valor', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Valor do Desconto')),
+                ('data_inicio', models.DateTimeField(verbose_name='Início')),
+                ('data_fim', models.DateTimeField(blank=True, null=True, verbose_name='Fim')),
+                ('toda_loja', models.BooleanField(default=False, verbose_name='Toda a Loja')),
+                ('ativo', models.BooleanField(default=True, verbose_name='Ativo')),
+                ('vigente', models.BooleanField(default=False, editable=False, verbose_name='Vigente')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('categorias', models.ManyToManyField(blank=True, related_name='promocoes', to='produtos.categoria', verbose_name='Categorias')),
+                ('produtos', models.ManyToManyField(blank=True, related_name='promocoes', to='produtos.produto', verbose_name='Produtos')),
+                ('tags', models.ManyToManyField(blank=True, related_name='promocoes', to='produtos.tag', verbose_name='Tags')),
+            ],
+            options={
+                'verbose_name': 'Promoção',
+                'verbose_name_plural': 'Promoções',
+                'ordering': ['-data_inicio'],
+            },
+        ),
+        migrations.CreateModel(
+            name='HistoricoPreco',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('preco', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Preço')),
+                ('preco_final', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Preço Final')),
+                ('data', models.DateTimeField(auto_now_add=True, verbose_name='Data')),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historico_precos', to='produtos.produto', verbose_name='Produto')),
+                ('promocao', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='produtos.promocao', verbose_name='Promoção')),
+            ],
+            options={
+                'verbose_name': 'Histórico de Preço',
+                'verbose_name_plural': 'Histórico de Preços',
+                'ordering': ['-data'],
+            },
+        ),
+        migrations.AddField(
+            model_name='produto',
+            name='promocao_vigente',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='produtos.promocao', verbose_name='Promoção Vigente'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['ativo', 'preco_final'], name='produtos_ativo_preco_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='promocao',
+            index=models.Index(fields=['ativo', 'data_inicio', 'data_fim'], name='produtos_promocao_janela_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicopreco',
+            index=models.Index(fields=['produto', '-data'], name='produtos_historico_preco_idx'),
+        ),
+        migrations.RunPython(preencher_preco_final, migrations.RunPython.noop),
+    ]
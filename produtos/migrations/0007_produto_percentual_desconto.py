@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:57
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def preencher_percentual_desconto(apps, schema_editor):
+    Produto = apps.get_model('produtos', 'Produto')
+    produtos = list(Produto.objects.filter(preco__gt=0, preco_final__lt=F('preco')).only('preco', 'preco_final'))
+    for produto in produtos:
+        produto.percentual_desconto = int((produto.preco - produto.preco_final) * 100 / produto.preco)
+    Produto.objects.bulk_update(produtos, ['percentual_desconto'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0006_promocoes_preco_final'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produto',
+            name='percentual_desconto',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Desconto (%)'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['ativo', '-percentual_desconto'], name='produtos_ativo_desconto_idx'),
+        ),
+        migrations.RunPython(preencher_percentual_desconto, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0007_produto_percentual_desconto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemFeed',
+            fields=[
+                ('produto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='item_feed', serialize=False, to='produtos.produto', verbose_name='Produto')),
+                ('xml', models.TextField(verbose_name='XML')),
+                ('csv', models.TextField(verbose_name='CSV')),
+                ('data_geracao', models.DateTimeField(auto_now=True, verbose_name='Data de Geração')),
+            ],
+            options={
+                'verbose_name': 'Item de Feed',
+                'verbose_name_plural': 'Itens de Feed',
+            },
+        ),
+    ]
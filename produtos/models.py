@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.urls import reverse
 from django.utils.text import slugify
@@ -48,6 +49,13 @@ class Tag(models.Model):
         super().save(*args, **kwargs)
 
 
+def calcular_percentual_desconto(preco, preco_final):
+    """Desconto do preço final sobre o preço cheio, em percentual inteiro (truncado)"""
+    if preco and preco_final < preco:
+        return int((preco - preco_final) * 100 / preco)
+    return 0
+
+
 class Produto(models.Model):
     TAMANHOS_CHOICES = [
         ('PP', 'PP'),
@@ -66,6 +74,16 @@ class Produto(models.Model):
     descricao_curta = models.CharField(max_length=300, blank=True, verbose_name="Descrição Curta")
     preco = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Preço")
     preco_promocional = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Preço Promocional")
+
+    # Preço cobrado: o menor entre o preço, o promocional e as promoções
+    # vigentes; mantido por produtos.promocoes para ordenar e filtrar no banco
+    preco_final = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False, verbose_name="Preço Final")
+    promocao_vigente = models.ForeignKey(
+        'Promocao', on_delete=models.SET_NULL, blank=True, null=True, editable=False,
+        related_name='+', verbose_name="Promoção Vigente",
+    )
+    # Acompanha preco_final, para ordenar por "maior desconto" com índice
+    percentual_desconto = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="Desconto (%)")
     
     # Relacionamentos
     categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE, related_name='produtos', verbose_name="Categoria")
@@ -81,6 +99,10 @@ class Produto(models.Model):
     # Estoque virtual
     estoque_virtual = models.PositiveIntegerField(default=999, verbose_name="Estoque Virtual")
     vendas_simuladas = models.PositiveIntegerField(default=0, verbose_name="Vendas Simuladas")
+
+    # Unidades vendidas nas janelas móveis (produtos.services)
+    vendas_7_dias = models.IntegerField(default=0, verbose_name="Vendas (7 dias)")
+    vendas_30_dias = models.IntegerField(default=0, verbose_name="Vendas (30 dias)")
     
     # SEO
     meta_title = models.CharField(max_length=60, blank=True, verbose_name="Meta Title")
@@ -96,6 +118,16 @@ class Produto(models.Model):
         verbose_name = "Produto"
         verbose_name_plural = "Produtos"
         ordering = ['-data_cadastro']
+        indexes = [
+            # Ordenações "em alta" e "mais vendidos" da listagem e da home
+            models.Index(fields=['ativo', '-vendas_7_dias'], name='produtos_ativo_vendas7_idx'),
+            models.Index(fields=['ativo', '-vendas_30_dias'], name='produtos_ativo_vendas30_idx'),
+            models.Index(fields=['ativo', 'preco_final'], name='produtos_ativo_preco_idx'),
+            models.Index(fields=['ativo', '-percentual_desconto'], name='produtos_ativo_desconto_idx'),
+            # Ordenação padrão (mais recentes) e por nome da listagem
+            models.Index(fields=['ativo', '-data_cadastro'], name='produtos_ativo_cadastro_idx'),
+            models.Index(fields=['ativo', 'nome'], name='produtos_ativo_nome_idx'),
+        ]
 
     def __str__(self):
         return self.nome
@@ -103,26 +135,29 @@ class Produto(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.nome)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'preco', 'preco_promocional'} & set(update_fields):
+            # As promoções por regra são reaplicadas após o commit (produtos.signals)
+            self.preco_final = self.preco_base
+            self.promocao_vigente = None
+            self.percentual_desconto = calcular_percentual_desconto(self.preco, self.preco_final)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'preco_final', 'promocao_vigente', 'percentual_desconto'}
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
         return reverse('produtos:produto_detail', kwargs={'slug': self.slug})
 
     @property
-    def preco_final(self):
-        if self.preco_promocional:
+    def preco_base(self):
+        """Preço sem as promoções por regra (considera o promocional manual)"""
+        if self.preco_promocional and self.preco_promocional < self.preco:
             return self.preco_promocional
         return self.preco
 
     @property
     def tem_promocao(self):
-        return bool(self.preco_promocional and self.preco_promocional < self.preco)
-
-    @property
-    def percentual_desconto(self):
-        if self.tem_promocao:
-            return int(((self.preco - self.preco_promocional) / self.preco) * 100)
-        return 0
+        return self.preco_final < self.preco
 
     @property
     def imagem_principal(self):
@@ -146,3 +181,177 @@ class ImagemProduto(models.Model):
 
     def __str__(self):
         return f'{self.produto.nome} - Imagem {self.ordem}'
+
+
+class Promocao(models.Model):
+    """
+    Desconto com janela de vigência aplicado a produtos, categorias, tags ou
+    à loja inteira. Quando várias promoções valem para um produto, fica o
+    menor preço.
+    """
+    TIPO_DESCONTO_CHOICES = [
+        ('percentual', 'Percentual'),
+        ('valor_fixo', 'Valor Fixo'),
+    ]
+
+    nome = models.CharField(max_length=100, verbose_name="Nome")
+    tipo_desconto = models.CharField(max_length=20, choices=TIPO_DESCONTO_CHOICES, default='percentual', verbose_name="Tipo de Desconto")
+    valor = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Valor do Desconto")
+    data_inicio = models.DateTimeField(verbose_name="Início")
+    data_fim = models.DateTimeField(blank=True, null=True, verbose_name="Fim")
+
+    # Abrangência
+    toda_loja = models.BooleanField(default=False, verbose_name="Toda a Loja")
+    produtos = models.ManyToManyField(Produto, blank=True, related_name='promocoes', verbose_name="Produtos")
+    categorias = models.ManyToManyField(Categoria, blank=True, related_name='promocoes', verbose_name="Categorias")
+    tags = models.ManyToManyField(Tag, blank=True, related_name='promocoes', verbose_name="Tags")
+
+    ativo = models.BooleanField(default=True, verbose_name="Ativo")
+    # Situação aplicada na última atualização de preços (detecta início/fim de janela)
+    vigente = models.BooleanField(default=False, editable=False, verbose_name="Vigente")
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
+
+    class Meta:
+        verbose_name = "Promoção"
+        verbose_name_plural = "Promoções"
+        ordering = ['-data_inicio']
+        indexes = [
+            models.Index(fields=['ativo', 'data_inicio', 'data_fim'], name='produtos_promocao_janela_idx'),
+        ]
+
+    def __str__(self):
+        return self.nome
+
+    def clean(self):
+        erros = {}
+        if self.valor is not None:
+            if self.valor <= 0:
+                erros['valor'] = 'O desconto deve ser maior que zero.'
+            elif self.tipo_desconto == 'percentual' and self.valor > 100:
+                erros['valor'] = 'O desconto percentual não pode passar de 100%.'
+        if self.data_inicio and self.data_fim and self.data_fim <= self.data_inicio:
+            erros['data_fim'] = 'O fim da promoção deve ser depois do início.'
+        if erros:
+            raise ValidationError(erros)
+
+    def em_vigor(self, momento):
+        return self.ativo and self.data_inicio <= momento and (self.data_fim is None or momento < self.data_fim)
+
+
+class HistoricoPreco(models.Model):
+    """Cada mudança de preço ou preço final de um produto"""
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name='historico_precos', verbose_name="Produto")
+    preco = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Preço")
+    preco_final = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Preço Final")
+    promocao = models.ForeignKey(Promocao, on_delete=models.SET_NULL, blank=True, null=True, related_name='+', verbose_name="Promoção")
+    data = models.DateTimeField(auto_now_add=True, verbose_name="Data")
+
+    class Meta:
+        verbose_name = "Histórico de Preço"
+        verbose_name_plural = "Histórico de Preços"
+        ordering = ['-data']
+        indexes = [
+            models.Index(fields=['produto', '-data'], name='produtos_historico_preco_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.produto}: R$ {self.preco_final} em {self.data:%d/%m/%Y %H:%M}'
+
+
+class ProdutoRelacionado(models.Model):
+    """
+    Vizinhos de um produto pré-calculados pela tarefa noturna
+    (produtos.recomendacoes), já na ordem de exibição.
+    """
+    TIPO_CHOICES = [
+        ('comprados_juntos', 'Comprados Juntos'),
+        ('similares', 'Similares'),
+    ]
+
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name='relacionados', verbose_name="Produto")
+    relacionado = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name='+', verbose_name="Produto Relacionado")
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, verbose_name="Tipo")
+    pontuacao = models.FloatField(verbose_name="Pontuação")
+    posicao = models.PositiveSmallIntegerField(verbose_name="Posição")
+    data_calculo = models.DateTimeField(auto_now_add=True, verbose_name="Data do Cálculo")
+
+    class Meta:
+        verbose_name = "Produto Relacionado"
+        verbose_name_plural = "Produtos Relacionados"
+        ordering = ['produto', 'tipo', 'posicao']
+        unique_together = ('produto', 'tipo', 'relacionado')
+        indexes = [
+            # Página do produto: um único range scan já ordenado
+            models.Index(fields=['produto', 'tipo', 'posicao'], name='produtos_relacionado_pos_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.produto} -> {self.relacionado} ({self.get_tipo_display()})'
+
+
+class MetricaProduto(models.Model):
+    """
+    Eventos de navegação de um produto em um dia, acumulados pelo coletor
+    de produtos.metricas (nenhuma gravação por visualização de página).
+    """
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name='metricas', verbose_name="Produto")
+    data = models.DateField(verbose_name="Data")
+    impressoes = models.PositiveIntegerField(default=0, verbose_name="Impressões em Listas")
+    visualizacoes = models.PositiveIntegerField(default=0, verbose_name="Visualizações")
+    adicoes_carrinho = models.PositiveIntegerField(default=0, verbose_name="Adições ao Carrinho")
+
+    class Meta:
+        verbose_name = "Métrica do Produto"
+        verbose_name_plural = "Métricas dos Produtos"
+        ordering = ['-data']
+        unique_together = ('produto', 'data')
+        indexes = [
+            models.Index(fields=['data'], name='produtos_metrica_data_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.produto} em {self.data:%d/%m/%Y}'
+
+
+class FunilProduto(Produto):
+    """Produto visto pelo relatório de funil do admin (impressão -> compra)"""
+
+    class Meta:
+        proxy = True
+        verbose_name = "Funil do Produto"
+        verbose_name_plural = "Funil dos Produtos"
+
+
+class ItemFeed(models.Model):
+    """
+    Trechos já renderizados de um produto ativo nos feeds de produtos
+    (produtos.feeds); só os produtos alterados desde a última geração são
+    renderizados de novo.
+    """
+    produto = models.OneToOneField(Produto, on_delete=models.CASCADE, primary_key=True, related_name='item_feed', verbose_name="Produto")
+    xml = models.TextField(verbose_name="XML")
+    csv = models.TextField(verbose_name="CSV")
+    data_geracao = models.DateTimeField(auto_now=True, verbose_name="Data de Geração")
+
+    class Meta:
+        verbose_name = "Item de Feed"
+        verbose_name_plural = "Itens de Feed"
+
+    def __str__(self):
+        return f'Feed de {self.produto_id}'
+
+
+class VitrineHome(models.Model):
+    """
+    Conteúdo pré-montado da página inicial (produtos.vitrine). Uma única
+    linha, regravada a cada alteração do catálogo.
+    """
+    dados = models.JSONField(default=dict, verbose_name="Dados")
+    data_geracao = models.DateTimeField(auto_now=True, verbose_name="Data de Geração")
+
+    class Meta:
+        verbose_name = "Vitrine da Home"
+        verbose_name_plural = "Vitrine da Home"
+
+    def __str__(self):
+        return f'Vitrine gerada em {self.data_geracao:%d/%m/%Y %H:%M}'
@@ -0,0 +1,199 @@
+"""
+Promoções agendadas e preço final dos produtos.
+
+``Produto.preco_final`` é uma coluna: o menor valor entre o preço, o preço
+promocional informado à mão e o preço de cada promoção em vigor que alcança
+o produto (toda a loja, o próprio produto, a categoria ou uma das tags).
+``percentual_desconto`` é gravado junto, derivado dos dois preços.
+Assim a listagem ordena e filtra por preço final no banco, e carrinho e
+checkout leem o mesmo valor.
+
+``atualizar_precos`` recalcula os preços, grava só os que mudaram (UPDATE
+com Case/When por lote) e registra cada mudança em HistoricoPreco. Ela roda:
+
+- após o commit de alterações em produtos e promoções (produtos.signals);
+- pela tarefa agendada, a cada minuto, quando alguma promoção começou ou
+  terminou desde a última atualização (campo ``Promocao.vigente``).
+"""
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+import logging
+import threading
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.utils import timezone
+
+from .models import HistoricoPreco, Produto, Promocao, calcular_percentual_desconto
+from .vitrine import agendar_reconstrucao, consumir_agendamento, reconstruir_home
+
+logger = logging.getLogger(__name__)
+
+CENTAVO = Decimal('0.01')
+
+# Relação M2M da promoção -> coluna do alvo na tabela intermediária
+ESCOPOS = {
+    'produtos': 'produto_id',
+    'categorias': 'categoria_id',
+    'tags': 'tag_id',
+}
+
+# Atualização agendada e ainda não feita nesta thread (_Atualizacao)
+_agendada = threading.local()
+
+
+def em_vigor(momento):
+    return Q(ativo=True, data_inicio__lte=momento) & (Q(data_fim__isnull=True) | Q(data_fim__gt=momento))
+
+
+def preco_com_desconto(promocao, preco):
+    if promocao.tipo_desconto == 'percentual':
+        novo = preco * (100 - min(promocao.valor, Decimal('100'))) / 100
+    else:
+        novo = preco - promocao.valor
+    return max(novo.quantize(CENTAVO, rounding=ROUND_HALF_UP), CENTAVO)
+
+
+def _promocoes_em_vigor(momento):
+    """Promoções em vigor com os ids de produtos, categorias e tags de cada uma"""
+    promocoes = {promocao.pk: promocao for promocao in Promocao.objects.filter(em_vigor(momento))}
+    for campo, coluna in ESCOPOS.items():
+        alvos = defaultdict(set)
+        relacao = getattr(Promocao, campo).through.objects.filter(promocao_id__in=promocoes)
+        for promocao_id, alvo_id in relacao.values_list('promocao_id', coluna):
+            alvos[promocao_id].add(alvo_id)
+        for promocao in promocoes.values():
+            setattr(promocao, f'ids_{campo}', alvos[promocao.pk])
+    return list(promocoes.values())
+
+
+def _alcanca(promocao, produto_id, categoria_id, tags):
+    return (
+        promocao.toda_loja
+        or produto_id in promocao.ids_produtos
+        or categoria_id in promocao.ids_categorias
+        or not promocao.ids_tags.isdisjoint(tags)
+    )
+
+
+def _por_produto(valores, output_field):
+    return Case(
+        *[When(pk=produto_id, then=Value(valor)) for produto_id, valor in valores.items()],
+        output_field=output_field,
+    )
+
+
+def atualizar_precos(produto_ids=None, momento=None, lote=500, vitrine=True):
+    """
+    Recalcula o preço final dos produtos (todos, sem ``produto_ids``).
+
+    Com ``vitrine``, agenda a reconstrução da home quando algum preço muda.
+    Retorna a quantidade de produtos cujo preço final mudou.
+    """
+    momento = momento or timezone.now()
+    promocoes = _promocoes_em_vigor(momento)
+
+    produtos = Produto.objects.all() if produto_ids is None else Produto.objects.filter(pk__in=produto_ids)
+    ultimo = HistoricoPreco.objects.filter(produto=OuterRef('pk')).order_by('-data', '-pk')
+    linhas = produtos.order_by('pk').annotate(
+        ultimo_preco=Subquery(ultimo.values('preco')[:1]),
+        ultimo_preco_final=Subquery(ultimo.values('preco_final')[:1]),
+    ).values_list(
+        'pk', 'preco', 'preco_promocional', 'categoria_id', 'preco_final', 'promocao_vigente_id',
+        'ultimo_preco', 'ultimo_preco_final',
+    )
+
+    tags = defaultdict(set)
+    if any(promocao.ids_tags for promocao in promocoes):
+        relacao = Produto.tags.through.objects.all()
+        if produto_ids is not None:
+            relacao = relacao.filter(produto_id__in=produto_ids)
+        for produto_id, tag_id in relacao.values_list('produto_id', 'tag_id'):
+            tags[produto_id].add(tag_id)
+
+    precos, vigentes, descontos, historico = {}, {}, {}, []
+    for (produto_id, preco, promocional, categoria_id, atual, promocao_atual,
+         ultimo_preco, ultimo_preco_final) in linhas:
+        final = promocional if promocional and promocional < preco else preco
+        escolhida = None
+        for promocao in promocoes:
+            if _alcanca(promocao, produto_id, categoria_id, tags[produto_id]):
+                candidato = preco_com_desconto(promocao, preco)
+                if candidato < final:
+                    final, escolhida = candidato, promocao.pk
+
+        if (final, escolhida) != (atual, promocao_atual):
+            precos[produto_id] = final
+            vigentes[produto_id] = escolhida
+            descontos[produto_id] = calcular_percentual_desconto(preco, final)
+        if (preco, final) != (ultimo_preco, ultimo_preco_final):
+            historico.append(HistoricoPreco(produto_id=produto_id, preco=preco, preco_final=final, promocao_id=escolhida))
+
+    ids = sorted(precos)
+    with transaction.atomic():
+        for inicio in range(0, len(ids), lote):
+            parte = ids[inicio:inicio + lote]
+            Produto.objects.filter(pk__in=parte).update(
+                preco_final=_por_produto({pk: precos[pk] for pk in parte}, DecimalField(max_digits=10, decimal_places=2)),
+                promocao_vigente=_por_produto({pk: vigentes[pk] for pk in parte}, IntegerField()),
+                percentual_desconto=_por_produto({pk: descontos[pk] for pk in parte}, IntegerField()),
+                data_atualizacao=momento,
+            )
+        HistoricoPreco.objects.bulk_create(historico, batch_size=lote)
+        if produto_ids is None:
+            vigentes_agora = [promocao.pk for promocao in promocoes]
+            Promocao.objects.filter(pk__in=vigentes_agora, vigente=False).update(vigente=True)
+            Promocao.objects.exclude(pk__in=vigentes_agora).filter(vigente=True).update(vigente=False)
+
+    if precos:
+        if vitrine:
+            # UPDATE não dispara os sinais do catálogo
+            agendar_reconstrucao()
+        logger.info(f'Preço final atualizado em {len(precos)} produtos ({len(promocoes)} promoções em vigor)')
+    return len(precos)
+
+
+def janela_mudou(momento=None):
+    """True se alguma promoção começou ou terminou desde a última atualização"""
+    momento = momento or timezone.now()
+    return Promocao.objects.filter(
+        (em_vigor(momento) & Q(vigente=False)) | (~em_vigor(momento) & Q(vigente=True))
+    ).exists()
+
+
+class _Atualizacao:
+    """Produtos alterados na transação, juntados até o commit"""
+
+    def __init__(self, produto_ids):
+        self.produto_ids = None if produto_ids is None else set(produto_ids)
+
+    def juntar(self, produto_ids):
+        if self.produto_ids is not None:
+            self.produto_ids = None if produto_ids is None else self.produto_ids | set(produto_ids)
+
+    def __call__(self):
+        alterados = atualizar_precos(None if self.produto_ids is None else sorted(self.produto_ids), vitrine=False)
+        # Reconstrução agendada na mesma transação (vitrine.agendar_reconstrucao)
+        # é feita aqui, já com os preços novos
+        if consumir_agendamento() or alterados:
+            reconstruir_home()
+
+
+def _atualizar_agendada():
+    atualizacao = getattr(_agendada, 'atualizacao', None)
+    _agendada.atualizacao = None
+    if atualizacao is not None:
+        atualizacao()
+
+
+def agendar_atualizacao(produto_ids=None):
+    """Atualiza os preços após o commit, uma vez por transação (None = todos)"""
+    # Como em vitrine.agendar_reconstrucao, cada chamada registra o gatilho e só
+    # o primeiro a rodar atualiza. Depois de um rollback, os ids que ficaram
+    # presos entram na próxima atualização, que só recalcula a mais
+    atualizacao = getattr(_agendada, 'atualizacao', None)
+    if atualizacao is None:
+        _agendada.atualizacao = _Atualizacao(produto_ids)
+    else:
+        atualizacao.juntar(produto_ids)
+    transaction.on_commit(_atualizar_agendada)
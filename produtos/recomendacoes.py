@@ -0,0 +1,271 @@
+"""
+Produtos relacionados pré-calculados.
+
+Dois tipos de vizinho são gravados em ProdutoRelacionado, já ordenados:
+
+- ``comprados_juntos``: co-compra item a item. Os itens de pedidos
+  confirmados são lidos uma única vez, em streaming, para um array NumPy; os
+  pares de produtos de cada pedido viram uma matriz esparsa em formato
+  coordenada (linha, coluna, pedidos em comum) e a pontuação é a
+  similaridade do cosseno ``em_comum / sqrt(pedidos_a * pedidos_b)``, que não
+  favorece só os campeões de venda.
+- ``similares``: fallback para produtos com pouco ou nenhum histórico. Conta
+  tags em comum e mesma categoria, com a popularidade desempatando.
+
+A tarefa noturna (produtos.tarefas) recalcula tudo; a página do produto lê
+os vizinhos com uma única consulta pelo índice (produto, tipo, posicao).
+"""
+import logging
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from pedidos.models import ItemPedido
+from pedidos.services import STATUS_COMPRA
+from .models import Produto, ProdutoRelacionado
+
+logger = logging.getLogger(__name__)
+
+TIPO_ITEM = np.dtype([('pedido', np.int64), ('produto', np.int64)])
+
+# Pedidos maiores que isso geram pares demais e quase nenhum sinal
+MAX_ITENS_PEDIDO = 30
+
+# Linhas da matriz de similaridade calculadas por vez (limita a memória)
+BLOCO_SIMILARES = 500
+
+
+def _parametros():
+    return (
+        getattr(settings, 'RECOMENDACOES_TOP_K', 12),
+        getattr(settings, 'RECOMENDACOES_SUPORTE_MINIMO', 2),
+    )
+
+
+def converter_itens(linhas):
+    """Linhas (pedido_id, produto_id) -> array (pedido, produto)"""
+    return np.fromiter(linhas, dtype=TIPO_ITEM)
+
+
+def carregar_itens(lote=10000):
+    """Itens de pedidos confirmados lidos em streaming"""
+    return converter_itens(
+        ItemPedido.objects.filter(pedido__status__in=STATUS_COMPRA)
+        .order_by()
+        .values_list('pedido_id', 'produto_id')
+        .iterator(chunk_size=lote)
+    )
+
+
+def pares_comprados(itens, max_itens=MAX_ITENS_PEDIDO):
+    """
+    Pares de produtos comprados no mesmo pedido.
+
+    Retorna os ids dos produtos, o número de pedidos de cada um e os pares
+    (a, b) de índices nesse array, com a < b. Os pedidos são agrupados por
+    quantidade de produtos distintos e cada grupo gera seus pares de uma vez
+    com ``triu_indices``.
+    """
+    # Ordena por pedido e conta cada produto uma vez por pedido (tamanhos e cores)
+    itens = np.unique(itens)
+    produtos, coluna = np.unique(itens['produto'], return_inverse=True)
+    pedidos_por_produto = np.bincount(coluna, minlength=len(produtos))
+
+    _, inicios, tamanhos = np.unique(itens['pedido'], return_index=True, return_counts=True)
+    a, b = [], []
+    for tamanho in np.unique(tamanhos):
+        if tamanho < 2 or tamanho > max_itens:
+            continue
+        grupo = inicios[tamanhos == tamanho]
+        matriz = coluna[grupo[:, None] + np.arange(tamanho)]
+        i, j = np.triu_indices(tamanho, 1)
+        a.append(matriz[:, i].ravel())
+        b.append(matriz[:, j].ravel())
+
+    vazio = np.empty(0, dtype=np.int64)
+    return (
+        produtos,
+        pedidos_por_produto,
+        np.concatenate(a) if a else vazio,
+        np.concatenate(b) if b else vazio,
+    )
+
+
+def coocorrencia(a, b, n):
+    """Matriz esparsa (linha, coluna, pedidos em comum) a partir dos pares"""
+    chaves, em_comum = np.unique(a * n + b, return_counts=True)
+    return chaves // n, chaves % n, em_comum
+
+
+def melhores(origem, destino, pontuacao, k):
+    """
+    Os ``k`` destinos de maior pontuação de cada origem.
+
+    Retorna (origem, destino, pontuacao, posicao) ordenados por origem e
+    posição; empates ficam com o menor destino.
+    """
+    ordem = np.lexsort((destino, -pontuacao, origem))
+    origem, destino, pontuacao = origem[ordem], destino[ordem], pontuacao[ordem]
+    posicao = np.arange(len(origem)) - np.searchsorted(origem, origem, side='left')
+    manter = posicao < k
+    return origem[manter], destino[manter], pontuacao[manter], posicao[manter]
+
+
+def calcular_comprados_juntos(itens, ativos, k, suporte_minimo):
+    """
+    Vizinhos por co-compra entre produtos ativos.
+
+    Retorna (ids dos produtos, pedidos por produto, vizinhos), em que
+    vizinhos é o resultado de ``melhores`` já com ids de produto.
+    """
+    produtos, pedidos_por_produto, a, b = pares_comprados(itens)
+    linha, coluna, em_comum = coocorrencia(a, b, len(produtos))
+
+    manter = (em_comum >= suporte_minimo) & np.isin(produtos[linha], ativos) & np.isin(produtos[coluna], ativos)
+    linha, coluna, em_comum = linha[manter], coluna[manter], em_comum[manter]
+    pontuacao = em_comum / np.sqrt(pedidos_por_produto[linha] * pedidos_por_produto[coluna])
+
+    # A matriz é simétrica: cada par vale nos dois sentidos
+    origem = np.concatenate([linha, coluna])
+    destino = np.concatenate([coluna, linha])
+    origem, destino, pontuacao, posicao = melhores(origem, destino, np.tile(pontuacao, 2), k)
+    return produtos, pedidos_por_produto, (produtos[origem], produtos[destino], pontuacao, posicao)
+
+
+def calcular_similares(ids, categorias, tags, popularidade, k):
+    """
+    Vizinhos por catálogo: tags em comum + mesma categoria.
+
+    ``tags`` é a matriz produto x tag (0/1) e ``popularidade`` o número de
+    pedidos de cada produto; a popularidade relativa soma no máximo 0,5, só
+    para desempatar. Produtos sem tag nem categoria em comum não entram.
+    """
+    tags = tags.astype(np.float32)
+    relativa = 0.5 * popularidade / max(popularidade.max(initial=0), 1)
+
+    partes = []
+    for inicio in range(0, len(ids), BLOCO_SIMILARES):
+        fim = min(inicio + BLOCO_SIMILARES, len(ids))
+        afinidade = tags[inicio:fim] @ tags.T + (categorias[inicio:fim, None] == categorias[None, :])
+        afinidade[np.arange(fim - inicio), np.arange(inicio, fim)] = 0  # o próprio produto
+
+        pontuacao = afinidade + relativa
+        ordem = np.argsort(-pontuacao, axis=1, kind='stable')[:, :k]
+        linhas = np.arange(fim - inicio)[:, None]
+        manter = afinidade[linhas, ordem] > 0
+        partes.append((
+            np.broadcast_to(ids[inicio:fim, None], ordem.shape)[manter],
+            ids[ordem][manter],
+            pontuacao[linhas, ordem][manter],
+            np.broadcast_to(np.arange(ordem.shape[1]), ordem.shape)[manter],
+        ))
+
+    if not partes:
+        vazio = np.empty(0, dtype=np.int64)
+        return vazio, vazio, np.empty(0), vazio
+    # Quem não tem k candidatos fica com menos vizinhos
+    return tuple(np.concatenate(coluna) for coluna in zip(*partes))
+
+
+def carregar_catalogo():
+    """Ids, categorias e matriz produto x tag dos produtos ativos"""
+    catalogo = np.array(
+        list(Produto.objects.filter(ativo=True).order_by('pk').values_list('pk', 'categoria_id')),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    ids, categorias = catalogo[:, 0], catalogo[:, 1]
+
+    relacoes = np.array(
+        list(Produto.tags.through.objects.filter(produto__ativo=True).values_list('produto_id', 'tag_id')),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    _, coluna_tag = np.unique(relacoes[:, 1], return_inverse=True)
+    tags = np.zeros((len(ids), coluna_tag.max(initial=-1) + 1), dtype=np.int8)
+    tags[np.searchsorted(ids, relacoes[:, 0]), coluna_tag] = 1
+    return ids, categorias, tags
+
+
+def gravar_relacionados(por_tipo, lote=1000):
+    """Substitui todos os vizinhos gravados, em uma única transação"""
+    objetos = [
+        ProdutoRelacionado(
+            produto_id=int(produto_id),
+            relacionado_id=int(relacionado_id),
+            tipo=tipo,
+            pontuacao=float(pontuacao),
+            posicao=int(posicao),
+        )
+        for tipo, vizinhos in por_tipo.items()
+        for produto_id, relacionado_id, pontuacao, posicao in zip(*vizinhos)
+    ]
+    with transaction.atomic():
+        ProdutoRelacionado.objects.all().delete()
+        ProdutoRelacionado.objects.bulk_create(objetos, batch_size=lote)
+    return len(objetos)
+
+
+def calcular_recomendacoes(lote=10000):
+    """
+    Recalcula os produtos relacionados de todo o catálogo.
+
+    Retorna as métricas da execução, incluindo o tempo de cada etapa.
+    """
+    k, suporte_minimo = _parametros()
+    tempos = {}
+
+    inicio = time.perf_counter()
+    itens = carregar_itens(lote)
+    ids, categorias, tags = carregar_catalogo()
+    tempos['leitura'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    produtos, pedidos_por_produto, comprados_juntos = calcular_comprados_juntos(itens, ids, k, suporte_minimo)
+    popularidade = np.zeros(len(ids))
+    vendidos = np.isin(produtos, ids)
+    popularidade[np.searchsorted(ids, produtos[vendidos])] = pedidos_por_produto[vendidos]
+    similares = calcular_similares(ids, categorias, tags, popularidade, k)
+    tempos['calculo'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    gravados = gravar_relacionados({'comprados_juntos': comprados_juntos, 'similares': similares})
+    tempos['gravacao'] = time.perf_counter() - inicio
+
+    metricas = {
+        'itens': len(itens),
+        'produtos': len(ids),
+        'comprados_juntos': len(np.unique(comprados_juntos[0])),
+        'relacionados': gravados,
+        'tempos': tempos,
+    }
+    logger.info(
+        f"Produtos relacionados: {metricas['relacionados']} vizinhos de {metricas['produtos']} produtos "
+        f"a partir de {metricas['itens']} itens em {sum(tempos.values()):.2f}s"
+    )
+    return metricas
+
+
+def relacionados_do_produto(produto, limite=4):
+    """
+    Vizinhos para a página do produto, por tipo.
+
+    Uma consulta pelo índice (produto, tipo, posicao) mais o prefetch das
+    imagens. Produtos que já aparecem em "comprados juntos" não se repetem
+    em "similares".
+    """
+    vizinhos = (
+        ProdutoRelacionado.objects
+        .filter(produto=produto, relacionado__ativo=True)
+        .select_related('relacionado')
+        .prefetch_related('relacionado__imagens')
+        .order_by('tipo', 'posicao')
+    )
+    por_tipo = {'comprados_juntos': [], 'similares': []}
+    vistos = set()
+    for vizinho in vizinhos:
+        lista = por_tipo[vizinho.tipo]
+        if len(lista) < limite and vizinho.relacionado_id not in vistos:
+            lista.append(vizinho.relacionado)
+            vistos.add(vizinho.relacionado_id)
+    return por_tipo
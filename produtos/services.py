@@ -0,0 +1,104 @@
+"""
+Rankings de vendas dos produtos.
+
+``vendas_7_dias`` e ``vendas_30_dias`` guardam as unidades vendidas em
+pedidos confirmados dentro de cada janela, assim "em alta" e "mais
+vendidos" são um ORDER BY em coluna indexada, sem agregar ItemPedido a cada
+requisição. A confirmação de um pedido soma as quantidades na hora;
+cancelamento e devolução de pedido já confirmado subtraem. A tarefa
+noturna (produtos.tarefas) recalcula as janelas a partir dos pedidos, o que
+tira as vendas que ficaram velhas e corrige qualquer divergência.
+"""
+from datetime import timedelta
+import logging
+
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from pedidos.models import ItemPedido
+from pedidos.services import STATUS_COMPRA, ao_transicionar
+from .models import Produto
+
+logger = logging.getLogger(__name__)
+
+# Campo do Produto -> tamanho da janela em dias
+JANELAS = {
+    'vendas_7_dias': 7,
+    'vendas_30_dias': 30,
+}
+
+
+def _por_produto(valores, campo):
+    """Case/When com o valor de cada produto, para atualizar vários em um UPDATE"""
+    return Case(
+        *[When(pk=produto_id, then=Value(valor[campo])) for produto_id, valor in valores.items()],
+        default=F(campo),
+        output_field=IntegerField(),
+    )
+
+
+def recalcular_vendas(lote=500):
+    """
+    Regrava as vendas de cada janela a partir dos pedidos confirmados.
+
+    Uma única consulta agregada lê os itens dos últimos 30 dias (índice
+    status/data dos pedidos); só produtos com vendas, ou que tinham vendas,
+    são atualizados, em lotes de um UPDATE com Case/When. Retorna a
+    quantidade de produtos atualizados.
+    """
+    agora = timezone.now()
+    somas = {
+        campo: Sum(Case(
+            When(pedido__data_pedido__gte=agora - timedelta(days=dias), then=F('quantidade')),
+            default=Value(0),
+        ))
+        for campo, dias in JANELAS.items()
+    }
+    linhas = (
+        ItemPedido.objects
+        .filter(pedido__status__in=STATUS_COMPRA, pedido__data_pedido__gte=agora - timedelta(days=max(JANELAS.values())))
+        .order_by()
+        .values('produto_id')
+        .annotate(**somas)
+    )
+    vendas = {linha.pop('produto_id'): linha for linha in linhas}
+
+    # Produtos cujas vendas saíram das janelas voltam a zero
+    anteriores = Produto.objects.filter(Q(vendas_7_dias__gt=0) | Q(vendas_30_dias__gt=0)).values_list('pk', flat=True)
+    for produto_id in anteriores:
+        vendas.setdefault(produto_id, dict.fromkeys(JANELAS, 0))
+
+    ids = sorted(vendas)
+    for inicio in range(0, len(ids), lote):
+        parte = {produto_id: vendas[produto_id] for produto_id in ids[inicio:inicio + lote]}
+        Produto.objects.filter(pk__in=parte).update(**{campo: _por_produto(parte, campo) for campo in JANELAS})
+    return len(ids)
+
+
+@ao_transicionar('confirmado', 'cancelado', 'devolvido')
+def atualizar_vendas(pedido, anterior, novo):
+    if anterior == 'pendente' and novo == 'cancelado':
+        # Pedido nunca confirmado não entrou nas vendas
+        return
+
+    idade = timezone.now() - pedido.data_pedido
+    campos = [campo for campo, dias in JANELAS.items() if idade < timedelta(days=dias)]
+    if not campos:
+        return
+
+    sinal = 1 if novo == 'confirmado' else -1
+    quantidades = {
+        produto_id: {campo: sinal * total for campo in campos}
+        for produto_id, total in (
+            ItemPedido.objects.filter(pedido=pedido)
+            .order_by()
+            .values('produto_id')
+            .annotate(total=Sum('quantidade'))
+            .values_list('produto_id', 'total')
+        )
+    }
+    if quantidades:
+        Produto.objects.filter(pk__in=quantidades).update(**{
+            campo: Greatest(F(campo) + _por_produto(quantidades, campo), Value(0)) for campo in campos
+        })
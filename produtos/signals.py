@@ -0,0 +1,72 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .api import invalidar_taxonomia
+from .models import Categoria, ImagemProduto, Produto, Promocao, Tag
+from .promocoes import agendar_atualizacao
+from .vitrine import agendar_reconstrucao
+
+
+@receiver(post_save, sender=Produto)
+def produto_salvo(sender, instance, **kwargs):
+    # O save grava o preço sem as promoções por regra; elas entram após o
+    # commit. Conectado antes de catalogo_alterado, assim a vitrine é
+    # reconstruída uma vez, já com os preços novos
+    agendar_atualizacao([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Produto)
+@receiver([post_save, post_delete], sender=Categoria)
+@receiver([post_save, post_delete], sender=ImagemProduto)
+def catalogo_alterado(sender, **kwargs):
+    agendar_reconstrucao()
+
+
+def _tocar_produtos(produto_ids):
+    """Atualiza data_atualizacao de produtos cujos dados relacionados mudaram (ETags da API)"""
+    Produto.objects.filter(pk__in=produto_ids).update(data_atualizacao=timezone.now())
+
+
+@receiver([post_save, post_delete], sender=ImagemProduto)
+def imagem_alterada(sender, instance, **kwargs):
+    _tocar_produtos([instance.produto_id])
+
+
+@receiver([post_save, post_delete], sender=Categoria)
+@receiver([post_save, post_delete], sender=Tag)
+def taxonomia_alterada(sender, instance, **kwargs):
+    invalidar_taxonomia()
+    if sender is Categoria and kwargs.get('created') is False:
+        # O nome da categoria vai no feed de cada produto (produtos.feeds)
+        Produto.objects.filter(categoria=instance).update(data_atualizacao=timezone.now())
+
+
+@receiver(m2m_changed, sender=Produto.tags.through)
+def tags_alteradas(sender, instance, action, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        if isinstance(instance, Produto):
+            produto_ids = [instance.pk]
+        elif action == 'post_clear':
+            # Tag esvaziada pelo lado dela: os produtos afetados já não são conhecidos
+            invalidar_taxonomia()
+            produto_ids = None
+        else:
+            # Alteração feita pelo lado da tag
+            produto_ids = pk_set
+        if produto_ids is not None:
+            _tocar_produtos(produto_ids)
+        agendar_atualizacao(produto_ids)
+
+
+@receiver([post_save, post_delete], sender=Promocao)
+def promocao_alterada(sender, **kwargs):
+    agendar_atualizacao()
+
+
+@receiver(m2m_changed, sender=Promocao.produtos.through)
+@receiver(m2m_changed, sender=Promocao.categorias.through)
+@receiver(m2m_changed, sender=Promocao.tags.through)
+def abrangencia_alterada(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        agendar_atualizacao()
@@ -0,0 +1,170 @@
+"""
+Sitemaps do catálogo (produtos e categorias), gravados como arquivos estáticos.
+
+O nginx serve ``/sitemap.xml`` (índice) e ``/sitemaps/`` direto de
+SITEMAPS_ROOT (deployment/nginx.conf). Os produtos ativos são divididos em
+fragmentos por faixa de id (ids 0 a 49.999 no primeiro, e assim por diante),
+de modo que nenhum arquivo passa do limite de 50 mil URLs do protocolo e um
+produto novo ou alterado muda só o fragmento da sua faixa.
+
+``gerar_sitemaps`` consulta, numa única agregação, a quantidade de produtos
+ativos e o maior ``data_atualizacao`` de cada fragmento; só os fragmentos
+cuja assinatura mudou desde a última geração são regravados (com
+``iterator()``, em gzip, trocando o arquivo com ``os.replace``), e o índice
+só é regravado quando algum deles muda. As categorias ficam num arquivo
+próprio, com a última alteração dos seus produtos como ``lastmod``.
+"""
+from datetime import datetime
+import hashlib
+import json
+import logging
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.db.models import Count, F, Max, Q, Value
+from django.db.models.functions import Floor
+
+from .feeds import escrever_gzip
+from .models import Categoria, Produto
+
+logger = logging.getLogger(__name__)
+
+URLS_POR_ARQUIVO = 50000
+ARQUIVO_INDICE = 'sitemap.xml.gz'
+ARQUIVO_CATEGORIAS = 'categorias.xml.gz'
+ARQUIVO_ESTADO = '.estado.json'
+
+CABECALHO_URLSET = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+RODAPE_URLSET = '</urlset>\n'
+
+
+def diretorio_sitemaps():
+    return Path(getattr(settings, 'SITEMAPS_ROOT', Path(settings.MEDIA_ROOT) / 'sitemaps'))
+
+
+def nome_fragmento(numero):
+    return f'produtos-{numero}.xml.gz'
+
+
+def _url(endereco, atualizacao):
+    lastmod = f'<lastmod>{atualizacao.date().isoformat()}</lastmod>' if atualizacao else ''
+    return f'<url><loc>{escape(endereco)}</loc>{lastmod}</url>\n'
+
+
+def assinaturas_produtos():
+    """{fragmento: (produtos ativos, última atualização)} em uma consulta"""
+    linhas = Produto.objects.filter(ativo=True).annotate(
+        fragmento=Floor(F('pk') / Value(URLS_POR_ARQUIVO))
+    ).values('fragmento').annotate(
+        total=Count('pk'), ultima=Max('data_atualizacao'),
+    ).order_by('fragmento').values_list('fragmento', 'total', 'ultima')
+    return {int(fragmento): (total, ultima) for fragmento, total, ultima in linhas}
+
+
+def _partes_produtos(site_url, numero):
+    yield CABECALHO_URLSET
+    produtos = Produto.objects.filter(
+        ativo=True, pk__gte=numero * URLS_POR_ARQUIVO, pk__lt=(numero + 1) * URLS_POR_ARQUIVO,
+    ).only('slug', 'data_atualizacao').order_by('pk')
+    for produto in produtos.iterator(chunk_size=2000):
+        yield _url(site_url + produto.get_absolute_url(), produto.data_atualizacao)
+    yield RODAPE_URLSET
+
+
+def _categorias():
+    """(categoria, última atualização dos seus produtos ativos) das categorias ativas"""
+    return [
+        (categoria, categoria.ultima)
+        for categoria in Categoria.objects.filter(ativo=True).annotate(
+            ultima=Max('produtos__data_atualizacao', filter=Q(produtos__ativo=True))
+        ).only('slug')
+    ]
+
+
+def _partes_categorias(site_url, categorias):
+    yield CABECALHO_URLSET
+    for categoria, ultima in categorias:
+        yield _url(site_url + categoria.get_absolute_url(), ultima)
+    yield RODAPE_URLSET
+
+
+def _partes_indice(site_url, arquivos):
+    base = site_url + getattr(settings, 'SITEMAPS_URL', '/sitemaps/')
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    )
+    for nome, ultima in arquivos:
+        lastmod = f'<lastmod>{ultima.isoformat()}</lastmod>' if ultima else ''
+        yield f'<sitemap><loc>{escape(base + nome)}</loc>{lastmod}</sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def ler_estado():
+    try:
+        with open(diretorio_sitemaps() / ARQUIVO_ESTADO, encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return {}
+
+
+def gerar_sitemaps(completo=False):
+    """Regrava os arquivos de sitemap que mudaram; retorna as métricas da execução"""
+    diretorio = diretorio_sitemaps()
+    dominio = Site.objects.get_current().domain
+    site_url = f'https://{dominio}'
+    estado = {} if completo else ler_estado()
+    if estado.get('dominio') != dominio or not (diretorio / ARQUIVO_INDICE).exists():
+        estado = {}
+    anteriores = estado.get('produtos', {})
+
+    assinaturas = {
+        str(numero): [total, ultima.isoformat() if ultima else None]
+        for numero, (total, ultima) in assinaturas_produtos().items()
+    }
+    regravados = 0
+    for numero, assinatura in assinaturas.items():
+        if anteriores.get(numero) != assinatura or not (diretorio / nome_fragmento(numero)).exists():
+            escrever_gzip(diretorio / nome_fragmento(numero), _partes_produtos(site_url, int(numero)))
+            regravados += 1
+    # Faixas que ficaram sem produto ativo
+    removidos = [numero for numero in anteriores if numero not in assinaturas]
+    for numero in removidos:
+        (diretorio / nome_fragmento(numero)).unlink(missing_ok=True)
+
+    categorias = _categorias()
+    assinatura_categorias = hashlib.md5(
+        repr([(categoria.slug, ultima) for categoria, ultima in categorias]).encode()
+    ).hexdigest()
+    if estado.get('categorias') != assinatura_categorias:
+        escrever_gzip(diretorio / ARQUIVO_CATEGORIAS, _partes_categorias(site_url, categorias))
+        regravados += 1
+
+    metricas = {
+        'produtos': sum(total for total, _ in assinaturas.values()),
+        'categorias': len(categorias),
+        'regravados': regravados,
+        'removidos': len(removidos),
+    }
+    if not regravados and not removidos:
+        return metricas
+
+    ultima_categoria = max((ultima for _, ultima in categorias if ultima), default=None)
+    arquivos = [(ARQUIVO_CATEGORIAS, ultima_categoria)] + [
+        (nome_fragmento(numero), ultima and datetime.fromisoformat(ultima))
+        for numero, (_, ultima) in sorted(assinaturas.items(), key=lambda item: int(item[0]))
+    ]
+    escrever_gzip(diretorio / ARQUIVO_INDICE, _partes_indice(site_url, arquivos))
+    with open(diretorio / ARQUIVO_ESTADO, 'w', encoding='utf-8') as arquivo:
+        json.dump({'dominio': dominio, 'produtos': assinaturas, 'categorias': assinatura_categorias}, arquivo)
+
+    logger.info(
+        f"Sitemaps atualizados: {regravados} arquivos regravados, {len(removidos)} removidos "
+        f"({metricas['produtos']} produtos, {metricas['categorias']} categorias)"
+    )
+    return metricas
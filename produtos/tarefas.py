@@ -0,0 +1,55 @@
+from agendador.registro import tarefa
+from .feeds import gerar_feeds
+from .metricas import limpar_metricas
+from .promocoes import atualizar_precos, janela_mudou
+from .recomendacoes import calcular_recomendacoes
+from .services import recalcular_vendas
+from .sitemaps import gerar_sitemaps
+from .vitrine import reconstruir_home
+
+
+@tarefa('15 0 * * *', jitter=300)
+def rankings_vendas():
+    atualizados = recalcular_vendas()
+    reconstruir_home()
+    return f'{atualizados} produtos com vendas recalculadas'
+
+
+@tarefa('*/15 * * * *', jitter=60)
+def vitrine_home():
+    # Acompanha os contadores de vendas, que mudam sem passar pelos sinais
+    dados = reconstruir_home()
+    return f"Vitrine com {len(dados['destaques'])} destaques e {len(dados['promocoes'])} promoções"
+
+
+@tarefa('30 4 * * *', jitter=300)
+def produtos_relacionados():
+    metricas = calcular_recomendacoes()
+    return f"{metricas['relacionados']} produtos relacionados gravados a partir de {metricas['itens']} itens"
+
+
+@tarefa('45 3 * * *', jitter=300)
+def limpar_metricas_produtos():
+    return f'{limpar_metricas()} métricas diárias antigas removidas'
+
+
+@tarefa('* * * * *', tempo_maximo=300)
+def promocoes_agendadas():
+    # Só recalcula quando alguma promoção começou ou terminou
+    if not janela_mudou():
+        return 'Nenhuma promoção começou ou terminou'
+    return f'Preço final atualizado em {atualizar_precos()} produtos'
+
+
+@tarefa('20 * * * *', jitter=120, tempo_maximo=900)
+def feeds_produtos():
+    metricas = gerar_feeds()
+    if not metricas['gerado']:
+        return 'Nenhum produto alterado desde a última geração dos feeds'
+    return f"Feeds com {metricas['itens']} produtos ({metricas['renderizados']} renderizados, {metricas['removidos']} removidos)"
+
+
+@tarefa('50 * * * *', jitter=120, tempo_maximo=900)
+def sitemaps_catalogo():
+    metricas = gerar_sitemaps()
+    return f"Sitemaps com {metricas['produtos']} produtos: {metricas['regravados']} arquivos regravados"
@@ -1,11 +1,18 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'produtos'
 
 urlpatterns = [
     path('', views.ProdutoListView.as_view(), name='lista'),
     path('buscar/', views.ProdutoBuscarView.as_view(), name='buscar'),
+    path('autocomplete/', views.ProdutoAutocompleteView.as_view(), name='autocomplete'),
     path('categoria/<slug:slug>/', views.CategoriaProdutosView.as_view(), name='categoria'),
+    
+    # API JSON do catálogo (somente leitura)
+    path('api/produtos/', api.ProdutosApiView.as_view(), name='api_produtos'),
+    path('api/produtos/<slug:slug>/', api.ProdutoApiView.as_view(), name='api_produto'),
+    path('api/categorias/', api.CategoriasApiView.as_view(), name='api_categorias'),
+    path('api/tags/', api.TagsApiView.as_view(), name='api_tags'),
     path('<slug:slug>/', views.ProdutoDetailView.as_view(), name='produto_detail'),
 ]
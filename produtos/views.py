@@ -1,10 +1,59 @@
 from django.shortcuts import render, get_object_or_404
-from django.views.generic import ListView, DetailView
+from django.http import JsonResponse
+from django.views.generic import ListView, DetailView, TemplateView, View
 from django.db.models import Q
+from django.utils.cache import patch_cache_control
+from encanto_intimo.assincrono import ViewHibridaMixin
+from . import metricas
 from .models import Produto, Categoria
+from .recomendacoes import relacionados_do_produto
+from .vitrine import dados_home
 
 
-class ProdutoListView(ListView):
+# Ordenações aceitas em ?ordem= (todas sobre colunas indexadas com ``ativo``).
+# O pk desempata, mantendo a paginação estável.
+ORDENACOES = {
+    '-data_cadastro': ['-data_cadastro', '-pk'],
+    'preco_final': ['preco_final', 'pk'],
+    '-preco_final': ['-preco_final', '-pk'],
+    'maior_desconto': ['-percentual_desconto', '-pk'],
+    'nome': ['nome', 'pk'],
+    # Rankings de vendas (produtos.services)
+    'mais_vendidos': ['-vendas_30_dias', '-pk'],
+    'em_alta': ['-vendas_7_dias', '-pk'],
+}
+# Valores antigos de links já publicados
+ORDENACOES['preco'] = ORDENACOES['preco_final']
+ORDENACOES['-preco'] = ORDENACOES['-preco_final']
+ORDENACAO_PADRAO = '-data_cadastro'
+
+
+class ImpressoesMixin:
+    """Conta uma impressão para cada produto da página listada"""
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        metricas.registrar('impressoes', [produto.pk for produto in context['object_list']])
+        return context
+
+
+class HomeView(TemplateView):
+    """Página inicial servida a partir do snapshot de produtos.vitrine"""
+    template_name = 'home.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        dados = dados_home()
+        context.update(dados)
+        metricas.registrar('impressoes', {
+            produto['id']
+            for secao in ('destaques', 'promocoes', 'mais_vendidos')
+            for produto in dados[secao]
+        })
+        return context
+
+
+class ProdutoListView(ImpressoesMixin, ListView):
     model = Produto
     template_name = 'produtos/lista.html'
     context_object_name = 'produtos'
@@ -20,15 +69,15 @@ class ProdutoListView(ListView):
             
         preco_min = self.request.GET.get('preco_min')
         if preco_min:
-            queryset = queryset.filter(preco__gte=preco_min)
+            queryset = queryset.filter(preco_final__gte=preco_min)
             
         preco_max = self.request.GET.get('preco_max')
         if preco_max:
-            queryset = queryset.filter(preco__lte=preco_max)
+            queryset = queryset.filter(preco_final__lte=preco_max)
             
         # Ordenação
-        ordem = self.request.GET.get('ordem', '-data_cadastro')
-        queryset = queryset.order_by(ordem)
+        ordem = self.request.GET.get('ordem')
+        queryset = queryset.order_by(*ORDENACOES.get(ordem, ORDENACOES[ORDENACAO_PADRAO]))
         
         return queryset
 
@@ -43,8 +92,16 @@ class ProdutoDetailView(DetailView):
     def get_queryset(self):
         return Produto.objects.filter(ativo=True).select_related('categoria', 'fornecedor').prefetch_related('imagens', 'tags')
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        metricas.registrar('visualizacoes', [self.object.pk])
+        relacionados = relacionados_do_produto(self.object)
+        context['comprados_juntos'] = relacionados['comprados_juntos']
+        context['produtos_relacionados'] = relacionados['similares']
+        return context
+
 
-class ProdutoBuscarView(ListView):
+class ProdutoBuscarView(ImpressoesMixin, ListView):
     model = Produto
     template_name = 'produtos/buscar.html'
     context_object_name = 'produtos'
@@ -67,7 +124,41 @@ class ProdutoBuscarView(ListView):
         return context
 
 
-class CategoriaProdutosView(ListView):
+class ProdutoAutocompleteView(ViewHibridaMixin, View):
+    """
+    Sugestões de nomes para a barra de busca (JSON).
+    
+    Chamada a cada tecla digitada; em ASGI usa o ORM assíncrono e não ocupa
+    uma thread por requisição.
+    """
+    limite = 8
+    
+    def _consulta(self, termo):
+        return (
+            Produto.objects.filter(ativo=True, nome__icontains=termo)
+            .order_by('nome')
+            .values('nome', 'slug')[:self.limite]
+        )
+    
+    def _resposta(self, sugestoes):
+        resposta = JsonResponse({'sugestoes': sugestoes})
+        patch_cache_control(resposta, public=True, max_age=60)
+        return resposta
+    
+    def get(self, request):
+        termo = request.GET.get('q', '').strip()
+        if len(termo) < 2:
+            return JsonResponse({'sugestoes': []})
+        return self._resposta(list(self._consulta(termo)))
+    
+    async def aget(self, request):
+        termo = request.GET.get('q', '').strip()
+        if len(termo) < 2:
+            return JsonResponse({'sugestoes': []})
+        return self._resposta([produto async for produto in self._consulta(termo)])
+
+
+class CategoriaProdutosView(ImpressoesMixin, ListView):
     model = Produto
     template_name = 'produtos/categoria.html'
     context_object_name = 'produtos'
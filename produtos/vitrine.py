@@ -0,0 +1,128 @@
+"""
+Conteúdo da página inicial.
+
+As seções da home (produtos em destaque, categorias ativas, promoções e
+mais vendidos) são montadas de uma vez por ``reconstruir_home`` e gravadas
+como JSON na única linha de VitrineHome; a página lê esse snapshot do cache
+e, quando a chave não está lá (cache frio, outro processo, TTL vencido),
+com uma única consulta pela chave primária.
+
+A reconstrução roda após o commit de qualquer alteração em Produto,
+Categoria ou ImagemProduto (produtos.signals), uma vez por transação, e
+periodicamente pela tarefa agendada, que acompanha os rankings de vendas.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import Categoria, Produto, VitrineHome
+
+logger = logging.getLogger(__name__)
+
+CHAVE_CACHE = 'produtos:vitrine:home'
+
+# Produtos exibidos em cada seção
+LIMITES = {
+    'destaques': 8,
+    'promocoes': 8,
+    'mais_vendidos': 4,
+}
+
+# Reconstrução agendada e ainda não feita nesta thread
+_agendada = threading.local()
+
+
+def _produto(produto):
+    imagem = produto.imagem_principal
+    return {
+        'id': produto.pk,
+        'nome': produto.nome,
+        'url': produto.get_absolute_url(),
+        'descricao_curta': produto.descricao_curta or produto.descricao[:150],
+        'imagem': imagem.url if imagem else '',
+        'preco': str(produto.preco),
+        'preco_final': str(produto.preco_final),
+        'tem_promocao': produto.tem_promocao,
+        'percentual_desconto': produto.percentual_desconto,
+    }
+
+
+def _categoria(categoria):
+    return {
+        'nome': categoria.nome,
+        'url': categoria.get_absolute_url(),
+        'imagem': categoria.imagem.url if categoria.imagem else '',
+    }
+
+
+def montar_home():
+    """Seções da home como dados simples (serializáveis em JSON)"""
+    ativos = Produto.objects.filter(ativo=True).prefetch_related('imagens')
+    secoes = {
+        'destaques': ativos.filter(destaque=True).order_by('-data_cadastro'),
+        # Maiores descontos primeiro
+        'promocoes': ativos.filter(preco_final__lt=F('preco')).order_by('-percentual_desconto', '-pk'),
+        'mais_vendidos': ativos.order_by('-vendas_30_dias', '-pk'),
+    }
+    dados = {
+        secao: [_produto(produto) for produto in produtos[:LIMITES[secao]]]
+        for secao, produtos in secoes.items()
+    }
+    dados['categorias'] = [_categoria(categoria) for categoria in Categoria.objects.filter(ativo=True)]
+    return dados
+
+
+def _timeout():
+    return getattr(settings, 'HOME_CACHE_TIMEOUT', 300)
+
+
+def reconstruir_home():
+    """Remonta o snapshot, grava no banco e atualiza o cache"""
+    dados = montar_home()
+    VitrineHome.objects.update_or_create(pk=1, defaults={'dados': dados})
+    cache.set(CHAVE_CACHE, dados, _timeout())
+    logger.info(
+        f"Vitrine da home reconstruída: {len(dados['destaques'])} destaques, "
+        f"{len(dados['promocoes'])} promoções, {len(dados['categorias'])} categorias"
+    )
+    return dados
+
+
+def _reconstruir_agendada():
+    if consumir_agendamento():
+        reconstruir_home()
+
+
+def consumir_agendamento():
+    """Desmarca a reconstrução agendada; True se havia uma pendente"""
+    pendente = getattr(_agendada, 'pendente', False)
+    _agendada.pendente = False
+    return pendente
+
+
+def agendar_reconstrucao():
+    """Reconstrói a vitrine após o commit, uma única vez por transação"""
+    # Um save no admin dispara vários sinais (produto, imagens do inline). Cada
+    # um registra o gatilho, mas só o primeiro a rodar reconstrói: com um único
+    # registro, um rollback descartaria o gatilho e deixaria a marca presa. A
+    # atualização de preços pendente (produtos.promocoes) também consome a
+    # marca, reconstruindo a vitrine depois de gravar os preços
+    _agendada.pendente = True
+    transaction.on_commit(_reconstruir_agendada)
+
+
+def dados_home():
+    """Snapshot da home: do cache, da linha gravada ou, na primeira vez, montado agora"""
+    dados = cache.get(CHAVE_CACHE)
+    if dados is not None:
+        return dados
+
+    dados = VitrineHome.objects.filter(pk=1).values_list('dados', flat=True).first()
+    if dados is None:
+        return reconstruir_home()
+    cache.set(CHAVE_CACHE, dados, _timeout())
+    return dados
@@ -162,36 +162,57 @@ class CarrinhoManager {
         });
     }
 
-    // Atualizar quantidade via AJAX
+    // Atualizar quantidade: alterações próximas são agrupadas em um único envio
     updateQuantity(itemId, quantity) {
+        this.pendentes = this.pendentes || {};
+        this.pendentes[itemId] = quantity;
+        clearTimeout(this.timerLote);
+        this.timerLote = setTimeout(() => this.enviarLote(), 400);
+    }
+
+    // Enviar alterações pendentes para o endpoint em lote
+    enviarLote() {
+        const pendentes = this.pendentes || {};
+        this.pendentes = {};
+        const operacoes = Object.entries(pendentes).map(([itemId, quantidade]) => ({
+            acao: 'update',
+            item_id: parseInt(itemId),
+            quantidade: quantidade
+        }));
+        if (operacoes.length === 0) {
+            return;
+        }
+
         $.ajax({
-            url: `/carrinho/atualizar/${itemId}/`,
+            url: window.urls.atualizar_lote,
             method: 'POST',
-            data: {
-                'quantidade': quantity,
-                'csrfmiddlewaretoken': $('[name=csrfmiddlewaretoken]').val()
-            },
+            contentType: 'application/json',
+            data: JSON.stringify({ operacoes: operacoes }),
             headers: {
+                'X-CSRFToken': $('[name=csrfmiddlewaretoken]').val(),
                 'X-Requested-With': 'XMLHttpRequest'
             },
             success: (data) => {
-                if (data.success) {
-                    if (data.removed) {
+                const presentes = new Set(data.itens.map((item) => String(item.id)));
+                Object.keys(pendentes).forEach((itemId) => {
+                    if (!presentes.has(String(itemId))) {
                         $(`.cart-item[data-item-id="${itemId}"]`).remove();
-                        if ($('.cart-item').length === 0) {
-                            location.reload();
-                        }
-                    } else {
-                        $(`.item-total[data-item-id="${itemId}"]`).text(this.formatMoney(data.item_total));
                     }
-                    this.updateTotals(data);
-                    this.showMessage(data.message, 'success');
-                } else {
-                    this.showMessage(data.message, 'danger');
+                });
+                if ($('.cart-item').length === 0) {
+                    location.reload();
+                    return;
                 }
+                data.itens.forEach((item) => {
+                    $(`.item-total[data-item-id="${item.id}"]`).text(this.formatMoney(item.item_total));
+                });
+                this.updateTotals(data);
+                this.showMessage(data.message, 'success');
             },
-            error: () => {
-                this.showMessage('Erro ao atualizar carrinho', 'danger');
+            error: (xhr) => {
+                const data = xhr.responseJSON || {};
+                const erro = (data.erros && data.erros.length) ? data.erros[0].message : data.message;
+                this.showMessage(erro || 'Erro ao atualizar carrinho', 'danger');
             }
         });
     }
@@ -268,13 +289,11 @@ class CarrinhoManager {
 
     // Buscar endereço por CEP (checkout)
     buscarEnderecoPorCep(cep) {
-        $.getJSON(`https://viacep.com.br/ws/${cep}/json/`, (data) => {
-            if (!data.erro) {
-                $('#endereco').val(data.logradouro);
-                $('#bairro').val(data.bairro);
-                $('#cidade').val(data.localidade);
-                $('#estado').val(data.uf);
-            }
+        $.getJSON(window.urls.buscar_cep.replace('00000000', cep), (data) => {
+            $('#endereco').val(data.logradouro);
+            $('#bairro').val(data.bairro);
+            $('#cidade').val(data.cidade);
+            $('#estado').val(data.estado);
         });
     }
 